@@ -1,8 +1,36 @@
 from multilayer_cache.core import cache_layer
 from multilayer_cache.core import async_cache_layer
+from multilayer_cache.core import cache_layer_many
+from multilayer_cache.core import async_cache_layer_many
 from multilayer_cache.core import type_hinted_cache_layer
 from multilayer_cache.core import type_hinted_async_cache_layer
 from multilayer_cache.core import KEY_NOT_FOUND
 from multilayer_cache.core import CacheLayerInspect
 from multilayer_cache.core import CacheLayerInspectHit
 from multilayer_cache.core import CacheLayerInspectMiss
+from multilayer_cache.core import CacheLayerInspectNegativeHit
+from multilayer_cache.core import CacheLayerEvent
+from multilayer_cache.concurrency import AsyncSingleFlight
+from multilayer_cache.concurrency import StripedLock
+from multilayer_cache.expiry import TTL
+from multilayer_cache.expiry import NegativeCache
+from multilayer_cache.layer import CacheLayer
+from multilayer_cache.layer import AsyncCacheLayer
+from multilayer_cache.codecs import Codec
+from multilayer_cache.codecs import IdentityCodec
+from multilayer_cache.codecs import PickleCodec
+from multilayer_cache.codecs import PickleBytesCodec
+from multilayer_cache.codecs import MarshalCodec
+from multilayer_cache.codecs import JsonCodec
+from multilayer_cache.codecs import ZlibCodec
+from multilayer_cache.codecs import LzmaCodec
+from multilayer_cache.codecs import Bz2Codec
+from multilayer_cache.metrics import Metrics
+from multilayer_cache.tracing import Tracer
+from multilayer_cache.tracing import Span
+from multilayer_cache.tracing import InMemoryExporter
+from multilayer_cache.tracing import OTLPFileExporter
+from multilayer_cache.executors import BoundedExecutor
+from multilayer_cache.executors import ExecutorSaturated
+from multilayer_cache.offload import ProcessTransform
+from multilayer_cache.batching import BatchLoader
@@ -0,0 +1,289 @@
+from multilayer_cache.core import CacheLayerEvent
+
+from typing import Any
+from typing import Awaitable
+from typing import BinaryIO
+from typing import Callable
+from typing import Iterator
+
+import time
+import struct
+import hashlib
+import threading
+import contextvars
+from dataclasses import dataclass
+
+
+# Binary access trace
+#
+#   header   b"MLCTRACE" version:u8
+#   records  tag:1 byte followed by
+#       b"L" layer definition   layer:u16 name_length:u16 name:utf-8
+#       b"T" tree edge          outer layer:u16 inner layer:u16
+#       b"E" event              timestamp:f64 layer:u16 key_hash:u64 result:u8 value_size:u32
+#                               caller_layer:u16 caller_key_hash:u64
+#
+# An event's caller is the lookup of the outer layer whose miss caused it (NO_LAYER for lookups
+# made by the application). Callers are linked only along edges of the tree given to the recorder,
+# and only for lookups made by sources wrapped with TraceRecorder.linked or async_linked.
+
+MAGIC = b"MLCTRACE"
+VERSION = 1
+
+HEADER = struct.Struct("<8sB")
+LAYER = struct.Struct("<HH")
+EDGE = struct.Struct("<HH")
+EVENT = struct.Struct("<dHQBIHQ")
+
+NO_LAYER = 0xFFFF
+
+HIT = 0
+MISS = 1
+NEGATIVE_HIT = 2
+
+RESULTS = {"hit": HIT, "miss": MISS, "negative_hit": NEGATIVE_HIT}
+
+
+def stable_key_hash(key: Any) -> int:
+    # Stable across processes, unlike hash() of str
+    return int.from_bytes(hashlib.blake2b(repr(key).encode(), digest_size=8).digest(), "little")
+
+
+@dataclass(slots=True, frozen=True)
+class TraceEvent:
+    timestamp: float
+    layer: int
+    key_hash: int
+    result: int
+    value_size: int
+    caller_layer: int
+    caller_key_hash: int
+
+
+class TraceRecorder:
+    """
+    Records cache layer lookups to a compact binary trace
+
+    Works as an inspect handler (inspect=recorder, or to_async(recorder) for async layers),
+    in which case value sizes are unknown and recorded as 0, or through record().
+    Events are buffered and written in blocks.
+
+    tree maps a layer identifier to the identifier of the layer its source looks up,
+    and lets the recorder link inner lookups to the outer lookups that caused them,
+    so that the tree can be re-simulated by replay. Lookups are linked while the source
+    of the outer layer runs, so the source must be wrapped:
+
+        raw = CacheLayer("raw", ..., inspect=recorder)
+        parsed = CacheLayer("parsed", ..., source=recorder.linked(raw), inspect=recorder)
+
+    Lookups the application makes directly on an inner layer stay unlinked.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        tree: dict[Any, Any] | None = None,
+        key_hash: Callable[[Any], int] = stable_key_hash,
+        clock: Callable[[], float] = time.time,
+        buffer_size: int = 1 << 16,
+    ):
+        self.path = path
+        self.key_hash = key_hash
+        self.clock = clock
+        self.buffer_size = buffer_size
+        self._file: BinaryIO = open(path, "wb")
+        self._buffer = bytearray(HEADER.pack(MAGIC, VERSION))
+        self._lock = threading.Lock()
+        self._layers: dict[Any, int] = {}
+        self._inner: dict[int, int] = {}
+        # The last miss in this thread or task: (layer, key hash)
+        self._missed: contextvars.ContextVar[tuple[int, int] | None] = contextvars.ContextVar(
+            "multilayer_cache_trace_missed", default=None,
+        )
+        # The miss whose source is running, set by linked sources for the duration of the call
+        self._caller: contextvars.ContextVar[tuple[int, int] | None] = contextvars.ContextVar(
+            "multilayer_cache_trace_caller", default=None,
+        )
+
+        for outer, inner in (tree or {}).items():
+            outer_layer = self._layer(outer)
+            inner_layer = self._layer(inner)
+            self._inner[outer_layer] = inner_layer
+            self._buffer += b"T" + EDGE.pack(outer_layer, inner_layer)
+
+    def _layer(self, identifier: Any) -> int:
+        layer = self._layers.get(identifier)
+
+        if layer is None:
+            layer = len(self._layers)
+
+            if layer >= NO_LAYER:
+                raise ValueError("too many layers")
+
+            name = str(identifier).encode()
+            self._layers[identifier] = layer
+            self._buffer += b"L" + LAYER.pack(layer, len(name)) + name
+
+        return layer
+
+    def __call__(self, event: CacheLayerEvent):
+        self.record(event.identifier, event.key, event.choice)
+
+    def record(self, identifier: Any, key: Any, result: str, value_size: int = 0):
+        key_hash = self.key_hash(key)
+        caller = self._caller.get()
+
+        with self._lock:
+            layer = self._layer(identifier)
+
+            if caller is not None and self._inner.get(caller[0]) == layer:
+                caller_layer, caller_key_hash = caller
+            else:
+                caller_layer, caller_key_hash = NO_LAYER, 0
+
+            self._buffer += b"E" + EVENT.pack(
+                self.clock(), layer, key_hash, RESULTS[result], value_size, caller_layer, caller_key_hash,
+            )
+
+            if len(self._buffer) >= self.buffer_size:
+                self._flush()
+
+        self._missed.set((layer, key_hash) if result == "miss" else None)
+
+    def linked(self, source: Any) -> Callable[[Any, Any], Any]:
+        """
+        Wraps the source of a layer (a function or a CacheLayer), so that the lookups
+        it makes are linked to the miss that called it
+        """
+
+        if not callable(source):
+            source = source.get
+
+        missed = self._missed
+        caller = self._caller
+
+        def linked_source(key: Any, default: Any) -> Any:
+            token = caller.set(missed.get())
+
+            try:
+                return source(key, default)
+            finally:
+                caller.reset(token)
+
+        return linked_source
+
+    def async_linked(self, source: Any) -> Callable[[Any, Any], Awaitable[Any]]:
+        """
+        linked for the source of an async layer (an async function or an AsyncCacheLayer)
+        """
+
+        if not callable(source):
+            source = source.get
+
+        missed = self._missed
+        caller = self._caller
+
+        async def linked_source(key: Any, default: Any) -> Any:
+            token = caller.set(missed.get())
+
+            try:
+                return await source(key, default)
+            finally:
+                caller.reset(token)
+
+        return linked_source
+
+    def _flush(self):
+        self._file.write(self._buffer)
+        self._buffer.clear()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._flush()
+                self._file.close()
+
+    def __enter__(self) -> "TraceRecorder":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+@dataclass(slots=True)
+class TraceHeader:
+    # layer -> identifier (as a string)
+    layers: dict[int, str]
+    # outer layer -> inner layer
+    tree: dict[int, int]
+
+
+def read_trace(path: str, header: TraceHeader | None = None, chunk_size: int = 1 << 20) -> Iterator[TraceEvent]:
+    """
+    Streams events of a trace
+
+    Layer definitions and tree edges met on the way are collected into header, when given.
+    """
+
+    if header is None:
+        header = TraceHeader({}, {})
+
+    event_size = EVENT.size
+
+    with open(path, "rb") as file:
+        magic, version = HEADER.unpack(file.read(HEADER.size))
+
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} access trace")
+
+        data = b""
+
+        while True:
+            chunk = file.read(chunk_size)
+
+            if not chunk:
+                if data:
+                    raise ValueError(f"{path} ends with a truncated record")
+                return
+
+            data = data + chunk if data else chunk
+            view = memoryview(data)
+            offset = 0
+            end = len(data)
+
+            while offset < end:
+                tag = data[offset]
+
+                if tag == 0x45:  # E
+                    if offset + 1 + event_size > end:
+                        break
+                    yield TraceEvent(*EVENT.unpack_from(view, offset + 1))
+                    offset += 1 + event_size
+
+                elif tag == 0x4C:  # L
+                    if offset + 1 + LAYER.size > end:
+                        break
+                    layer, length = LAYER.unpack_from(view, offset + 1)
+                    start = offset + 1 + LAYER.size
+                    if start + length > end:
+                        break
+                    header.layers[layer] = bytes(view[start:start + length]).decode()
+                    offset = start + length
+
+                elif tag == 0x54:  # T
+                    if offset + 1 + EDGE.size > end:
+                        break
+                    outer, inner = EDGE.unpack_from(view, offset + 1)
+                    header.tree[outer] = inner
+                    offset += 1 + EDGE.size
+
+                else:
+                    raise ValueError(f"{path} has an unknown record at {offset}")
+
+            view.release()
+            data = data[offset:]
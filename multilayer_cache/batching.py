@@ -0,0 +1,125 @@
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Generic
+from typing import Hashable
+from typing import TypeVar
+
+import asyncio
+
+
+# Represents [K]ey used for retrieving from the source
+K = TypeVar("K", bound=Hashable)
+# Represents value type the source returns
+T = TypeVar("T")
+
+
+# Passed to load_many as the default, so that every caller gets its own default back
+_NOT_FOUND = object()
+
+
+class BatchLoader(Generic[K, T]):
+    """
+    Coalesces single-key source calls into bulk calls
+
+    Has the get(key, default) contract, so it can be the source of AsyncCacheLayer or
+    the on_cache_miss_source of async_cache_layer, while the source is called with
+    load_many(keys, default) -> values in keys order. Keys requested within one loop tick
+    (or within window seconds of the first) are deduplicated and loaded together, in calls of
+    at most max_batch keys, and each caller gets its own value, default or exception back.
+    """
+
+    def __init__(
+        self,
+        load_many: Callable[[list[K], Any], Awaitable[list[T | Any]]],
+        max_batch: int = 256,
+        window: float = 0.0,
+    ):
+        if max_batch < 1:
+            raise ValueError("max_batch must be positive")
+
+        self.load_many = load_many
+        self.max_batch = max_batch
+        self.window = window
+        self._pending: dict[K, list[tuple[asyncio.Future, Any]]] = {}
+        self._scheduled: asyncio.Handle | None = None
+        # Loads in flight, referenced so that they are not garbage collected while running
+        self._tasks: set[asyncio.Task] = set()
+        # Bulk calls made and keys they loaded
+        self.batches = 0
+        self.keys = 0
+
+    def __call__(self, key: K, default: Any) -> "asyncio.Future[T | Any]":
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiters = self._pending.get(key)
+
+        if waiters is None:
+            waiters = self._pending[key] = []
+
+        waiters.append((future, default))
+
+        if len(self._pending) >= self.max_batch:
+            self._dispatch()
+        elif self._scheduled is None:
+            self._scheduled = (
+                loop.call_later(self.window, self._dispatch) if self.window > 0
+                else loop.call_soon(self._dispatch)
+            )
+
+        return future
+
+    def _dispatch(self):
+        if self._scheduled is not None:
+            self._scheduled.cancel()
+            self._scheduled = None
+
+        pending, self._pending = self._pending, {}
+        batch: dict[K, list[tuple[asyncio.Future, Any]]] = {}
+
+        for key, waiters in pending.items():
+            waiters = [(future, default) for future, default in waiters if not future.cancelled()]
+
+            if waiters:
+                batch[key] = waiters
+
+            if len(batch) == self.max_batch:
+                self._start(batch)
+                batch = {}
+
+        if batch:
+            self._start(batch)
+
+    def _start(self, batch: dict[K, list[tuple[asyncio.Future, Any]]]):
+        task = asyncio.ensure_future(self._load(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _load(self, batch: dict[K, list[tuple[asyncio.Future, Any]]]):
+        keys = list(batch)
+        self.batches += 1
+        self.keys += len(keys)
+
+        try:
+            values = await self.load_many(keys, _NOT_FOUND)
+
+            if len(values) != len(keys):
+                raise ValueError(f"load_many returned {len(values)} values for {len(keys)} keys")
+
+        except Exception as e:
+            for waiters in batch.values():
+                for future, _ in waiters:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        except BaseException:
+            for waiters in batch.values():
+                for future, _ in waiters:
+                    future.cancel()
+            raise
+
+        for waiters, value in zip(batch.values(), values):
+            for future, default in waiters:
+                if not future.done():
+                    future.set_result(default if value is _NOT_FOUND else value)
@@ -0,0 +1,96 @@
+# Runs the cache layer overhead benchmark suite
+#
+#   python -m multilayer_cache.benchmarks [--quick] [--json results.json] [--compare baseline.json]
+#
+# With --compare, cases slower than the baseline by more than --threshold are reported
+# and the exit status is 1
+
+from multilayer_cache.benchmarks import overhead
+
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+from pathlib import Path
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: list[dict], baseline: dict, threshold: float) -> list[str]:
+    baseline_results = {result["name"]: result for result in baseline["results"]}
+    regressions = []
+
+    for result in results:
+        before = baseline_results.get(result["name"])
+
+        if before is None:
+            continue
+
+        change = result["ns_per_op"] / before["ns_per_op"] - 1
+
+        if change > threshold:
+            regressions.append(f"{result['name']}: {before['ns_per_op']:.0f} -> {result['ns_per_op']:.0f} ns/op (+{change:.0%})")
+
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m multilayer_cache.benchmarks")
+    parser.add_argument("--quick", action="store_true", help="fewer depths, hit ratios and operations")
+    parser.add_argument("--ops", type=int, default=None, help="operations per case")
+    parser.add_argument("--api", action="append", choices=overhead.APIS, help="limit to these APIs")
+    parser.add_argument("--json", type=Path, help="write results to this file")
+    parser.add_argument("--compare", type=Path, help="baseline results to compare with")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        depths, hit_ratios, ops = (1, 2, 4, 8), (0.0, 0.5, 1.0), 2_000
+    else:
+        depths, hit_ratios, ops = overhead.DEPTHS, overhead.HIT_RATIOS, 10_000
+
+    ops = args.ops or ops
+    apis = tuple(args.api) if args.api else overhead.APIS
+
+    results = []
+
+    for case in overhead.cases(apis, depths, hit_ratios):
+        result = overhead.run_case(case, ops)
+        results.append(result.to_dict())
+        print(f"{case.name:<72} {result.ns_per_op:10.0f} ns/op {result.peak_alloc_bytes_per_op:10.0f} B/op", flush=True)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+    if args.json is not None:
+        args.json.write_text(json.dumps(report, indent=2))
+
+    if args.compare is not None:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.threshold)
+
+        for regression in regressions:
+            print(f"regression {regression}")
+
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
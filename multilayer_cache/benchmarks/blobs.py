@@ -0,0 +1,68 @@
+# Hit latency and heap allocation of BlobStore against reading files normally
+#
+#   python -m multilayer_cache.benchmarks.blobs
+#
+# A BlobStore hit maps the blob and returns a view, a plain read copies it into a bytes object.
+# Pages of a view are read from the page cache when the consumer touches them
+
+from multilayer_cache.stores import BlobStore
+
+from typing import Callable
+
+import os
+import timeit
+import tempfile
+import tracemalloc
+
+
+SIZES = (4 * 1024, 1024 * 1024, 10 * 1024 * 1024)
+KEYS = 8
+
+
+def allocated(fn: Callable[[], object]) -> int:
+    tracemalloc.start()
+    result = fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return peak
+
+
+def main():
+    for size in SIZES:
+        with tempfile.TemporaryDirectory() as directory:
+            store = BlobStore(os.path.join(directory, "blobs"))
+            files = os.path.join(directory, "files")
+            os.makedirs(files)
+
+            for key in range(KEYS):
+                data = os.urandom(size)
+                store.set(key, data)
+
+                with open(os.path.join(files, str(key)), "wb") as file:
+                    file.write(data)
+
+            def blob_hit():
+                return [store.get(key, None) for key in range(KEYS)]
+
+            def file_read():
+                values = []
+                for key in range(KEYS):
+                    with open(os.path.join(files, str(key)), "rb") as file:
+                        values.append(file.read())
+                return values
+
+            blob_hit()
+            number = max(1, 2_000_000 // size)
+
+            print(f"{size // 1024:>6} KiB")
+
+            for name, fn in (("blob store (mmap)", blob_hit), ("open().read()", file_read)):
+                seconds = min(timeit.repeat(fn, number=number, repeat=3)) / number / KEYS
+                print(f"  {name:<18} {seconds * 1e6:>10.1f} us/hit  {allocated(fn) // KEYS:>10} B allocated/hit")
+
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
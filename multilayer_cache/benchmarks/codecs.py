@@ -0,0 +1,73 @@
+# Hit latency and stored memory per codec on parsed-file payloads
+#
+#   python -m multilayer_cache.benchmarks.codecs
+#
+# A hit costs one decode, memory is what the local cache retains per entry
+
+from multilayer_cache.codecs import Codec
+from multilayer_cache.codecs import IdentityCodec
+from multilayer_cache.codecs import PickleCodec
+from multilayer_cache.codecs import MarshalCodec
+from multilayer_cache.codecs import JsonCodec
+
+import gc
+import timeit
+import tracemalloc
+from typing import Any
+
+
+CODECS: dict[str, Codec] = {
+    "identity": IdentityCodec(),
+    "pickle5": PickleCodec(),
+    "marshal": MarshalCodec(),
+    "json": JsonCodec(),
+}
+
+ENTRIES = 1_000
+
+
+def parsed_file(i: int, records: int) -> dict[str, Any]:
+    # Shaped like a parsed JSON document: metadata and a list of flat records
+    return {
+        "key": f"blob-{i}",
+        "version": "0",
+        "meta": {"source": "bucket", "size": records, "tags": ["parsed", "json", f"batch-{i % 7}"]},
+        "records": [
+            {"id": i * records + n, "name": f"record-{n}", "score": n * 0.5, "active": n % 2 == 0, "labels": ["a", "b"]}
+            for n in range(records)
+        ],
+    }
+
+
+def retained_bytes(codec: Codec, records: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    store = [codec.encode(parsed_file(i, records)) for i in range(ENTRIES)]
+
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    del store
+    return (after - before) / ENTRIES
+
+
+def hit_ns(codec: Codec, records: int, number: int = 2_000) -> float:
+    encoded = codec.encode(parsed_file(0, records))
+    decode = codec.decode
+    timer = timeit.Timer(lambda: decode(encoded))
+    return min(timer.repeat(repeat=5, number=number)) / number * 1e9
+
+
+def main():
+    for records in (10, 100, 1000):
+        print(f"parsed file with {records} records")
+
+        for name, codec in CODECS.items():
+            print(f"  {name:>9}: hit {hit_ns(codec, records):10.0f} ns  stored {retained_bytes(codec, records) / 1024:8.1f} KiB/entry")
+
+
+if __name__ == "__main__":
+    main()
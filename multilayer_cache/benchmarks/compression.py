@@ -0,0 +1,61 @@
+# Compression ratio and CPU time per codec on raw JSON files
+#
+#   python -m multilayer_cache.benchmarks.compression
+#
+# Every file is stored once in a CompressedStore without a hot set and read back once,
+# the last column is a hit on a value kept decompressed in the hot set
+
+from multilayer_cache.codecs import Codec
+from multilayer_cache.codecs import ZlibCodec
+from multilayer_cache.codecs import LzmaCodec
+from multilayer_cache.codecs import Bz2Codec
+from multilayer_cache.stores import LRUStore
+from multilayer_cache.stores import CompressedStore
+from multilayer_cache.benchmarks.codecs import parsed_file
+
+import json
+import timeit
+
+
+CODECS: dict[str, Codec[bytes, bytes]] = {
+    "zlib-1": ZlibCodec(1),
+    "zlib-6": ZlibCodec(6),
+    "zlib-9": ZlibCodec(9),
+    "lzma-6": LzmaCodec(6),
+    "bz2-9": Bz2Codec(9),
+}
+
+FILES = 200
+
+
+def main():
+    for records in (10, 100, 1000):
+        files = [json.dumps(parsed_file(i, records)) for i in range(FILES)]
+        size = sum(len(text) for text in files) // FILES
+        print(f"raw JSON files of {records} records, {size} bytes on average")
+
+        for name, codec in CODECS.items():
+            store = CompressedStore(LRUStore(FILES), codec=codec, threshold=0, hot=0)
+
+            for i, text in enumerate(files):
+                store.set(i, text)
+
+            for i in range(FILES):
+                store.get(i, None)
+
+            stats = store.compression
+            hot = CompressedStore(LRUStore(1), codec=codec, threshold=0, hot=1)
+            hot.set(0, files[0])
+            hot.get(0, None)
+            hot_hit = min(timeit.repeat(lambda: hot.get(0, None), number=10_000, repeat=3)) / 10_000
+
+            print(
+                f"  {name:<8} ratio {stats.ratio:5.1f}x"
+                f"  compress {stats.compress_seconds / FILES * 1e6:8.1f} us"
+                f"  decompress {stats.decompress_seconds / FILES * 1e6:7.1f} us"
+                f"  hot hit {hot_hit * 1e9:5.0f} ns"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# Total fetch time of LRU and GDSF on Zipfian key streams with costs and sizes that vary by key
+#
+#   python -m multilayer_cache.benchmarks.cost
+#
+# A tenth of the keys are blobs refetched from a bucket, the rest are values derived from warm
+# layers that are cheap to recompute. Costs are simulated, a miss adds the key's cost
+# to the total fetch time and reports it the way a layer with record_cost does
+
+from multilayer_cache.stores import Store
+from multilayer_cache.stores import BudgetedStore
+from multilayer_cache.stores import GDSFStore
+from multilayer_cache.benchmarks.workloads import zipf_stream
+
+from typing import Callable
+
+import random
+
+
+KEYS = 20_000
+ACCESSES = 200_000
+
+
+def key_costs(keys: int, seed: int = 0) -> tuple[list[float], list[int]]:
+    rng = random.Random(seed)
+    costs, sizes = [], []
+
+    for _ in range(keys):
+        if rng.random() < 0.1:
+            # Refetched from the bucket
+            costs.append(rng.lognormvariate(-3.0, 0.5))
+        else:
+            # Derived from a warm layer
+            costs.append(rng.lognormvariate(-7.0, 0.5))
+
+        sizes.append(int(rng.lognormvariate(9.0, 1.0)) + 1)
+
+    return costs, sizes
+
+
+def stores(max_bytes: int, sizes: list[int]) -> dict[str, Store]:
+    weigher = sizes.__getitem__
+    return {
+        "lru": BudgetedStore("lru", max_bytes=max_bytes, weigher=weigher),
+        "gdsf": GDSFStore(max_bytes, weigher=weigher),
+    }
+
+
+def fetch_time(store: Store, stream: list[int], costs: list[float]) -> float:
+    missing = object()
+    get = store.get
+    set = store.set
+    record_cost: Callable[[int, float], None] | None = getattr(store, "record_cost", None)
+    total = 0.0
+
+    for key in stream:
+        if get(key, missing) is missing:
+            total += costs[key]
+
+            if record_cost is not None:
+                record_cost(key, costs[key])
+
+            set(key, key)
+
+    return total
+
+
+def main():
+    costs, sizes = key_costs(KEYS)
+    total_bytes = sum(sizes)
+
+    for s in (0.8, 1.0):
+        stream = zipf_stream(KEYS, ACCESSES, s)
+        uncached = sum(costs[key] for key in stream)
+        print(f"zipf s={s}, {KEYS} keys, {ACCESSES} accesses, {uncached:.0f} s fetch time uncached")
+
+        for fraction in (0.01, 0.05, 0.2):
+            max_bytes = int(total_bytes * fraction)
+            times = {name: fetch_time(store, stream, costs) for name, store in stores(max_bytes, sizes).items()}
+            print(
+                f"  {fraction:>4.0%} of bytes: "
+                + "  ".join(f"{name}={seconds:8.1f} s" for name, seconds in times.items())
+                + f"  gdsf/lru={times['gdsf'] / times['lru']:.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# Hit ratios of the bounded stores on Zipfian key streams
+#
+#   python -m multilayer_cache.benchmarks.hit_ratio
+#
+# Every access is a lookup followed by a store on miss, the way a cache layer uses its local cache
+
+from multilayer_cache.stores import Store
+from multilayer_cache.stores import LRUStore
+from multilayer_cache.stores import LFUStore
+from multilayer_cache.stores import WTinyLFUStore
+from multilayer_cache.benchmarks.workloads import zipf_stream
+
+from typing import Callable
+
+
+KEYS = 100_000
+ACCESSES = 500_000
+
+STORES: dict[str, Callable[[int], Store]] = {
+    "lru": LRUStore,
+    "lfu": LFUStore,
+    "w-tinylfu": WTinyLFUStore,
+}
+
+
+def hit_ratio(store: Store, stream: list[int]) -> float:
+    missing = object()
+    get = store.get
+    set = store.set
+
+    for key in stream:
+        if get(key, missing) is missing:
+            set(key, key)
+
+    return store.stats.hit_ratio
+
+
+def main():
+    capacities = [KEYS // 1000, KEYS // 100, KEYS // 10]
+
+    for s in (0.8, 1.0, 1.2):
+        stream = zipf_stream(KEYS, ACCESSES, s)
+        print(f"zipf s={s}, {KEYS} keys, {ACCESSES} accesses")
+
+        for capacity in capacities:
+            ratios = "  ".join(
+                f"{name}={hit_ratio(new(capacity), stream):.3f}"
+                for name, new in STORES.items()
+            )
+            print(f"  capacity={capacity:>6}: {ratios}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# Cost per layer of a 3-layer chain depending on how inspect events are handled
+#
+#   python -m multilayer_cache.benchmarks.inspect_overhead
+#
+# hit path: every layer stores values and is warmed before timing, so each lookup hits
+# the outermost layer and produces one event
+#
+# miss path: outer layers do not store values, so every lookup misses them, hits in the innermost
+# layer and produces one event per layer
+#
+# "pydantic models" reproduces the previous behaviour, where every lookup built and validated
+# a CacheLayerInspect model regardless of whether anybody listened
+
+from multilayer_cache import cache_layer
+from multilayer_cache import KEY_NOT_FOUND
+
+import timeit
+from functools import partial
+from typing import Any
+from typing import Callable
+
+
+DEPTH = 3
+
+
+def build_chain(depth: int, inspect: Callable[[Any], None] | None, store_outer: bool) -> Callable[[Any], Any]:
+    source = {"a": "a"}
+
+    def on_cache_miss_source(key, default):
+        return source.get(key, default)
+
+    get = None
+
+    for level in range(depth):
+        inner_cache = {}
+        # Without store_outer only the innermost layer keeps values
+        store = store_outer or level == 0
+
+        layer = partial(
+            cache_layer,
+            get_cache_value=lambda key, default, inner_cache=inner_cache: inner_cache.get(key, default),
+            set_cache_value=lambda key, value, inner_cache=inner_cache, store=store: store and inner_cache.update({key: value}),
+            on_cache_miss_source=on_cache_miss_source,
+            get_identifier=lambda level=level: f"layer_{level}",
+            inspect=inspect,
+        )
+
+        def get(key, default=KEY_NOT_FOUND, layer=layer):
+            return layer(get_cache_key=lambda: key, get_default=lambda: default)
+
+        # The next (outer) layer sources from this one
+        on_cache_miss_source = get
+
+    return get
+
+
+def measure(inspect: Callable[[Any], None] | None, hit: bool, depth: int = DEPTH, number: int = 20_000) -> float:
+    """
+    Returns nanoseconds per layer of a lookup that hits the outermost layer (hit=True),
+    or that misses the outer layers and is served by the innermost one
+    """
+
+    get = build_chain(depth, inspect, store_outer=hit)
+    # Warm up the layers that store values
+    get("a")
+
+    timer = timeit.Timer(lambda: get("a"))
+    seconds = min(timer.repeat(repeat=5, number=number))
+    # A hit passes through the outermost layer only
+    return seconds / number / (1 if hit else depth) * 1e9
+
+
+def main():
+    cases = {
+        "pydantic models (before)": lambda event: event.to_model(),
+        "lightweight records": lambda event: None,
+        "no inspector": None,
+    }
+
+    print(f"depth={DEPTH}")
+    for name, inspect in cases.items():
+        print(
+            f"{name:>26}: hit path {measure(inspect, hit=True):8.0f} ns/layer"
+            f"  miss path {measure(inspect, hit=False):8.0f} ns/layer"
+        )
+
+
+if __name__ == "__main__":
+    main()
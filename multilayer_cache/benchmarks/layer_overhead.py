@@ -0,0 +1,80 @@
+# Per-call overhead of a 3-deep chain built with functools.partial (as in the examples)
+# compared with precompiled CacheLayer objects
+#
+#   python -m multilayer_cache.benchmarks.layer_overhead
+#
+# "outer hit" is served by the outermost layer, "inner hit" passes through all layers
+# (outer layers do not store values) and is served by the innermost one
+
+from multilayer_cache import cache_layer
+from multilayer_cache import CacheLayer
+from multilayer_cache import KEY_NOT_FOUND
+
+import timeit
+from functools import partial
+from typing import Any
+from typing import Callable
+
+
+DEPTH = 3
+
+
+def build_partial_chain(depth: int, store_outer: bool) -> Callable[[Any], Any]:
+    source = {"a": "a"}
+    on_cache_miss_source = lambda key, default: source.get(key, default)
+
+    for level in range(depth):
+        inner_cache = {}
+        store = store_outer or level == 0
+
+        layer = partial(
+            cache_layer,
+            get_cache_value=lambda key, default, inner_cache=inner_cache: inner_cache.get(key, default),
+            set_cache_value=lambda key, value, inner_cache=inner_cache, store=store: store and inner_cache.update({key: value}),
+            on_cache_miss_source=on_cache_miss_source,
+            get_identifier=lambda level=level: f"layer_{level}",
+        )
+
+        def get(key, default=KEY_NOT_FOUND, layer=layer):
+            return layer(get_cache_key=lambda: key, get_default=lambda: default)
+
+        on_cache_miss_source = get
+
+    return get
+
+
+def build_layer_chain(depth: int, store_outer: bool) -> Callable[[Any], Any]:
+    source = {"a": "a"}
+    layer = source.get
+
+    for level in range(depth):
+        inner_cache = {}
+        store = store_outer or level == 0
+
+        layer = CacheLayer(
+            f"layer_{level}",
+            get_cache_value=inner_cache.get,
+            set_cache_value=inner_cache.__setitem__ if store else lambda key, value: None,
+            source=layer,
+        )
+
+    return layer.get
+
+
+def measure(get: Callable[[Any], Any], number: int = 50_000) -> float:
+    get("a")
+    timer = timeit.Timer(lambda: get("a"))
+    return min(timer.repeat(repeat=5, number=number)) / number * 1e9
+
+
+def main():
+    print(f"depth={DEPTH}")
+
+    for case, store_outer in (("outer hit", True), ("inner hit", False)):
+        partial_ns = measure(build_partial_chain(DEPTH, store_outer))
+        layer_ns = measure(build_layer_chain(DEPTH, store_outer))
+        print(f"  {case}: partial={partial_ns:.0f} ns/call  CacheLayer={layer_ns:.0f} ns/call  ({partial_ns / layer_ns:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
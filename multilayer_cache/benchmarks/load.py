@@ -0,0 +1,193 @@
+# End-to-end load harness: a 2-layer chain (raw files, parsed files) over a simulated bucket
+#
+#   python -m multilayer_cache.benchmarks.load --mode async --pattern zipf --requests 20000 \
+#       --concurrency 64 --latency-ms 20 --error-rate 0.01 --capacity 1000
+#
+# Reports throughput, p50/p99 latency of lookups and how many calls reached the bucket.
+# In sync mode the threads share the chain, every store access holds a lock of its store
+# (LRUStore is not thread-safe), so the figures include the contention on those locks
+
+from multilayer_cache import CacheLayer
+from multilayer_cache import AsyncCacheLayer
+from multilayer_cache import StripedLock
+from multilayer_cache import AsyncSingleFlight
+from multilayer_cache.stores import LRUStore
+from multilayer_cache.util import to_async
+from multilayer_cache.benchmarks.workloads import PATTERNS
+from multilayer_cache.benchmarks.workloads import SimulatedBucket
+from multilayer_cache.benchmarks.workloads import lognormal
+
+import json
+import time
+import asyncio
+import threading
+import argparse
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from dataclasses import dataclass
+from dataclasses import asdict
+from concurrent.futures import ThreadPoolExecutor
+
+
+@dataclass(slots=True)
+class LoadReport:
+    requests: int
+    errors: int
+    seconds: float
+    throughput: float
+    p50_ms: float
+    p99_ms: float
+    source_calls: int
+    source_errors: int
+    max_source_in_flight: int
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def report(latencies: list[float], errors: int, seconds: float, bucket: SimulatedBucket) -> LoadReport:
+    latencies.sort()
+    return LoadReport(
+        requests=len(latencies),
+        errors=errors,
+        seconds=seconds,
+        throughput=len(latencies) / seconds if seconds else 0.0,
+        p50_ms=percentile(latencies, 0.50) * 1000,
+        p99_ms=percentile(latencies, 0.99) * 1000,
+        source_calls=bucket.calls,
+        source_errors=bucket.errors,
+        max_source_in_flight=bucket.max_in_flight,
+    )
+
+
+def build_files(keys: int) -> dict[int, str]:
+    return {key: json.dumps({"key": key, "value": "x" * 64}) for key in range(keys)}
+
+
+def locked(store: LRUStore) -> tuple[Callable[[Any, Any], Any], Callable[[Any, Any], None]]:
+    # Reads reorder the entries of an LRUStore, so threads must not access it at the same time
+    lock = threading.Lock()
+
+    def get(key, default):
+        with lock:
+            return store.get(key, default)
+
+    def set(key, value):
+        with lock:
+            store.set(key, value)
+
+    return get, set
+
+
+def sync_chain(bucket: SimulatedBucket, capacity: int, coalesce: bool = True) -> Callable[[Any], Any]:
+    locks = StripedLock() if coalesce else None
+    files_get, files_set = locked(LRUStore(capacity))
+    parsed_get, parsed_set = locked(LRUStore(capacity))
+
+    files = CacheLayer("cached_files", files_get, files_set, source=bucket.get, locks=locks)
+    parsed = CacheLayer("parsed_cached_files", parsed_get, parsed_set, source=files, transform=json.loads, locks=locks)
+
+    return parsed.get
+
+
+def async_chain(bucket: SimulatedBucket, capacity: int, coalesce: bool = True) -> Callable[[Any], Awaitable[Any]]:
+    single_flight = AsyncSingleFlight() if coalesce else None
+    files_store = LRUStore(capacity)
+    parsed_store = LRUStore(capacity)
+
+    files = AsyncCacheLayer(
+        "cached_files", to_async(files_store.get), to_async(files_store.set),
+        source=bucket.async_get, single_flight=single_flight,
+    )
+    parsed = AsyncCacheLayer(
+        "parsed_cached_files", to_async(parsed_store.get), to_async(parsed_store.set),
+        source=files, transform=json.loads, single_flight=single_flight,
+    )
+
+    return parsed.get
+
+
+def run_sync(get: Callable[[Any], Any], keys: list[Any], threads: int, bucket: SimulatedBucket) -> LoadReport:
+    def request(key) -> tuple[float, bool]:
+        started = time.perf_counter()
+        try:
+            get(key)
+            failed = False
+        except Exception:
+            failed = True
+        return time.perf_counter() - started, failed
+
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(threads) as pool:
+        results = list(pool.map(request, keys))
+
+    seconds = time.perf_counter() - started
+    return report([latency for latency, _ in results], sum(failed for _, failed in results), seconds, bucket)
+
+
+async def run_async(get: Callable[[Any], Awaitable[Any]], keys: list[Any], concurrency: int, bucket: SimulatedBucket) -> LoadReport:
+    latencies: list[float] = []
+    errors = 0
+    queue = iter(keys)
+
+    async def worker():
+        nonlocal errors
+
+        for key in queue:
+            started = time.perf_counter()
+            try:
+                await get(key)
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    seconds = time.perf_counter() - started
+
+    return report(latencies, errors, seconds, bucket)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(prog="python -m multilayer_cache.benchmarks.load")
+    parser.add_argument("--mode", choices=("sync", "async"), default="async")
+    parser.add_argument("--pattern", choices=tuple(PATTERNS), default="zipf")
+    parser.add_argument("--keys", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=64, help="threads or coroutines issuing lookups")
+    parser.add_argument("--capacity", type=int, default=1_000, help="entries per layer")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="median bucket latency (lognormal)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--source-concurrency", type=int, default=None, help="bucket calls in flight at most")
+    parser.add_argument("--no-coalesce", action="store_true", help="without per-key locks / single flight")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    bucket = SimulatedBucket(
+        build_files(args.keys),
+        latency=lognormal(args.latency_ms / 1000),
+        error_rate=args.error_rate,
+        concurrency=args.source_concurrency,
+        seed=0,
+    )
+    keys = PATTERNS[args.pattern](args.keys, args.requests)
+
+    if args.mode == "sync":
+        result = run_sync(sync_chain(bucket, args.capacity, not args.no_coalesce), keys, args.concurrency, bucket)
+    else:
+        result = asyncio.run(run_async(async_chain(bucket, args.capacity, not args.no_coalesce), keys, args.concurrency, bucket))
+
+    if args.json:
+        print(json.dumps(asdict(result)))
+    else:
+        for field, value in asdict(result).items():
+            print(f"{field:>22}: {value:.2f}" if isinstance(value, float) else f"{field:>22}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# Throughput of parsing between async layers, on the event loop and in worker processes
+#
+#   python -m multilayer_cache.benchmarks.offload
+#
+# Every document is a concurrent miss, so misses of a tick are batched across the workers
+
+from multilayer_cache.offload import ProcessTransform
+
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+
+import os
+import json
+import time
+import asyncio
+
+
+DOCUMENTS = 200
+RECORDS = 2_000
+
+
+def document(i: int) -> str:
+    return json.dumps({
+        "key": f"blob-{i}",
+        "records": [{"id": n, "name": f"record-{n}", "score": n * 0.5, "labels": ["a", "b"]} for n in range(RECORDS)],
+    })
+
+
+async def throughput(parse: Callable[[str], Awaitable[Any]], documents: list[str]) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(*(parse(d) for d in documents))
+    return len(documents) / (time.perf_counter() - started)
+
+
+async def run():
+    documents = [document(i) for i in range(DOCUMENTS)]
+    size = sum(map(len, documents)) / len(documents)
+    print(f"{DOCUMENTS} documents of {size / 1024:.0f} KiB")
+
+    async def inline(value: str) -> Any:
+        return json.loads(value)
+
+    print(f"  event loop        {await throughput(inline, documents):>8.0f} docs/s")
+
+    workers = 1
+
+    while workers <= (os.cpu_count() or 1):
+        with ProcessTransform(json.loads, max_workers=workers, shared_memory_threshold=64 * 1024) as parse:
+            # Start the workers before measuring
+            await parse("{}")
+            print(f"  {workers:>2} processes      {await throughput(parse, documents):>8.0f} docs/s")
+
+        workers *= 2
+
+
+def main():
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+# Overhead of cache layers across chain depth, sync/async, hit ratio and inspection
+#
+# A chain of `depth` layers is built over a source. The outermost local cache holds the "hot" keys,
+# local caches ignore writes so the hit ratio stays fixed: a hit is served by the outermost layer,
+# a miss passes through every layer down to the source.
+
+from multilayer_cache import cache_layer
+from multilayer_cache import async_cache_layer
+from multilayer_cache import type_hinted_cache_layer
+from multilayer_cache import type_hinted_async_cache_layer
+from multilayer_cache import KEY_NOT_FOUND
+
+import time
+import asyncio
+import tracemalloc
+from functools import partial
+from typing import Any
+from typing import Callable
+from dataclasses import dataclass
+from dataclasses import asdict
+
+
+APIS = ("dict", "cache_layer", "type_hinted_cache_layer", "async_cache_layer", "type_hinted_async_cache_layer")
+DEPTHS = tuple(range(1, 9))
+HIT_RATIOS = (0.0, 0.25, 0.5, 0.75, 1.0)
+
+
+@dataclass(slots=True)
+class Case:
+    api: str
+    depth: int
+    hit_ratio: float
+    inspect: bool
+
+    @property
+    def name(self) -> str:
+        return f"{self.api}/depth={self.depth}/hit_ratio={self.hit_ratio}/inspect={self.inspect}"
+
+
+@dataclass(slots=True)
+class Result:
+    case: Case
+    ops: int
+    ns_per_op: float
+    # Peak of memory allocated during an operation, tracemalloc
+    peak_alloc_bytes_per_op: float
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"name": self.case.name, **asdict(self.case), **{
+            "ops": self.ops,
+            "ns_per_op": self.ns_per_op,
+            "peak_alloc_bytes_per_op": self.peak_alloc_bytes_per_op,
+        }}
+
+
+def key_stream(ops: int, hit_ratio: float) -> list[str]:
+    # Evenly interleaved hot ("h") and cold ("c") keys
+    keys = []
+    hits = 0.0
+
+    for i in range(ops):
+        hits += hit_ratio
+        if hits >= 1.0:
+            hits -= 1.0
+            keys.append(f"h{i % 64}")
+        else:
+            keys.append(f"c{i % 64}")
+
+    return keys
+
+
+def hot_cache() -> dict[str, str]:
+    return {f"h{i}": "value" for i in range(64)}
+
+
+def build_sync(api: str, depth: int, inspect: bool) -> Callable[[str], Any]:
+    if api == "dict":
+        cache = hot_cache()
+        return lambda key: cache.get(key, "value")
+
+    layer_fn = cache_layer if api == "cache_layer" else type_hinted_cache_layer[Any, Any, Any].new
+    inspect_fn = (lambda event: None) if inspect else None
+
+    source = lambda key, default: "value"
+    get = None
+
+    for level in range(depth):
+        cache = hot_cache() if level == depth - 1 else {}
+
+        layer = partial(
+            layer_fn,
+            get_cache_value=lambda key, default, cache=cache: cache.get(key, default),
+            set_cache_value=lambda key, value: None,
+            on_cache_miss_source=source,
+            get_identifier=lambda level=level: level,
+            inspect=inspect_fn,
+        )
+
+        def get(key, default=KEY_NOT_FOUND, layer=layer):
+            return layer(get_cache_key=lambda: key, get_default=lambda: default)
+
+        source = get
+
+    return get
+
+
+def build_async(api: str, depth: int, inspect: bool) -> Callable[[str], Any]:
+    layer_fn = async_cache_layer if api == "async_cache_layer" else type_hinted_async_cache_layer[Any, Any, Any].new
+
+    async def inspect_fn(event):
+        pass
+
+    async def source(key, default):
+        return "value"
+
+    async def set_cache_value(key, value):
+        pass
+
+    async def get_identifier():
+        return 0
+
+    get = None
+
+    for level in range(depth):
+        cache = hot_cache() if level == depth - 1 else {}
+
+        async def get_cache_value(key, default, cache=cache):
+            return cache.get(key, default)
+
+        layer = partial(
+            layer_fn,
+            get_cache_value=get_cache_value,
+            set_cache_value=set_cache_value,
+            on_cache_miss_source=source,
+            get_identifier=get_identifier,
+            inspect=inspect_fn if inspect else None,
+        )
+
+        def get(key, default=KEY_NOT_FOUND, layer=layer):
+            async def get_cache_key():
+                return key
+
+            async def get_default():
+                return default
+
+            return layer(get_cache_key=get_cache_key, get_default=get_default)
+
+        source = get
+
+    return get
+
+
+def run_case(case: Case, ops: int, repeat: int = 3, alloc_samples: int = 200) -> Result:
+    keys = key_stream(ops, case.hit_ratio)
+    sample = keys[:alloc_samples]
+
+    if case.api.startswith(("async", "type_hinted_async")):
+        get = build_async(case.api, case.depth, case.inspect)
+
+        async def timed() -> float:
+            started = time.perf_counter_ns()
+            for key in keys:
+                await get(key)
+            return time.perf_counter_ns() - started
+
+        async def peak() -> float:
+            total = 0
+            tracemalloc.start()
+            for key in sample:
+                tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+                await get(key)
+                total += tracemalloc.get_traced_memory()[1] - base
+            tracemalloc.stop()
+            return total / len(sample)
+
+        async def run() -> tuple[float, float]:
+            await get(keys[0])
+            best = min([await timed() for _ in range(repeat)])
+            return best, await peak()
+
+        best, peak_bytes = asyncio.run(run())
+
+    else:
+        get = build_sync(case.api, case.depth, case.inspect)
+        get(keys[0])
+
+        def timed() -> float:
+            started = time.perf_counter_ns()
+            for key in keys:
+                get(key)
+            return time.perf_counter_ns() - started
+
+        best = min(timed() for _ in range(repeat))
+
+        total = 0
+        tracemalloc.start()
+        for key in sample:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            get(key)
+            total += tracemalloc.get_traced_memory()[1] - base
+        tracemalloc.stop()
+        peak_bytes = total / len(sample)
+
+    return Result(case=case, ops=ops, ns_per_op=best / ops, peak_alloc_bytes_per_op=peak_bytes)
+
+
+def cases(
+    apis: tuple[str, ...] = APIS,
+    depths: tuple[int, ...] = DEPTHS,
+    hit_ratios: tuple[float, ...] = HIT_RATIOS,
+) -> list[Case]:
+    result = []
+
+    for api in apis:
+        if api == "dict":
+            # Baseline, a single lookup
+            result.extend(Case(api, 1, hit_ratio, False) for hit_ratio in hit_ratios)
+            continue
+
+        for depth in depths:
+            for hit_ratio in hit_ratios:
+                for inspect in (False, True):
+                    result.append(Case(api, depth, hit_ratio, inspect))
+
+    return result
@@ -0,0 +1,62 @@
+# Throughput of RESPStore against the in-process stand-in server, pipelined and not
+#
+#   python -m multilayer_cache.benchmarks.resp
+#
+# Concurrent callers issue single-key gets, MGET reads the same keys in batches
+
+from multilayer_cache.stores import RESPServer
+from multilayer_cache.stores import RESPStore
+
+import time
+import asyncio
+
+
+KEYS = 1_000
+OPS = 20_000
+CONCURRENCY = 100
+POOL_SIZE = 4
+BATCH = 100
+
+
+async def gets(store: RESPStore) -> float:
+    per_caller = OPS // CONCURRENCY
+
+    async def caller(offset: int):
+        for i in range(per_caller):
+            await store.get((offset + i) % KEYS, None)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller(c * per_caller) for c in range(CONCURRENCY)))
+    return OPS / (time.perf_counter() - started)
+
+
+async def mgets(store: RESPStore) -> float:
+    keys = [i % KEYS for i in range(OPS)]
+    started = time.perf_counter()
+
+    for start in range(0, OPS, BATCH):
+        await store.get_many(keys[start:start + BATCH], None)
+
+    return OPS / (time.perf_counter() - started)
+
+
+async def run():
+    async with RESPServer() as server:
+        print(f"{OPS} gets of {KEYS} keys, {CONCURRENCY} callers, {POOL_SIZE} connections")
+
+        for pipeline in (False, True):
+            async with RESPStore(*server.address, pool_size=POOL_SIZE, pipeline=pipeline) as store:
+                await store.set_many({i: f"value-{i}" for i in range(KEYS)})
+                name = "pipelined" if pipeline else "unpipelined"
+                print(f"  {name:<12} get   {await gets(store):>10.0f} keys/s")
+
+                if pipeline:
+                    print(f"  {'':<12} mget  {await mgets(store):>10.0f} keys/s (batches of {BATCH})")
+
+
+def main():
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
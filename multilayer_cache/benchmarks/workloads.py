@@ -0,0 +1,146 @@
+# Key streams and a latency-injecting blob store stand-in for benchmarks and load tests
+
+import math
+import time
+import random
+import asyncio
+import itertools
+import threading
+from typing import Any
+from typing import Callable
+
+
+# Samples a latency in seconds
+Latency = Callable[[random.Random], float]
+
+
+def constant(seconds: float) -> Latency:
+    return lambda rng: seconds
+
+
+def uniform(low: float, high: float) -> Latency:
+    return lambda rng: rng.uniform(low, high)
+
+
+def exponential(mean: float) -> Latency:
+    return lambda rng: rng.expovariate(1 / mean)
+
+
+def lognormal(median: float, sigma: float = 0.5) -> Latency:
+    # Long tailed, typical for object stores
+    mu = math.log(median)
+    return lambda rng: rng.lognormvariate(mu, sigma)
+
+
+def zipf_stream(keys: int, length: int, s: float = 1.0, seed: int = 0) -> list[int]:
+    cum_weights = list(itertools.accumulate(1 / rank ** s for rank in range(1, keys + 1)))
+    rng = random.Random(seed)
+    # Shuffle ranks to keys, so popularity does not follow key order
+    ids = list(range(keys))
+    rng.shuffle(ids)
+    return [ids[rank] for rank in rng.choices(range(keys), cum_weights=cum_weights, k=length)]
+
+
+def uniform_stream(keys: int, length: int, seed: int = 0) -> list[int]:
+    rng = random.Random(seed)
+    return [rng.randrange(keys) for _ in range(length)]
+
+
+def scan_stream(keys: int, length: int) -> list[int]:
+    return [i % keys for i in range(length)]
+
+
+PATTERNS: dict[str, Callable[[int, int], list[int]]] = {
+    "zipf": zipf_stream,
+    "uniform": uniform_stream,
+    "scan": scan_stream,
+}
+
+
+class SourceError(Exception):
+    ...
+
+
+class SimulatedBucket:
+    """
+    Blob store stand-in with latency, failures and a concurrency limit
+
+    get and async_get follow the get(key, default) contract of cache layer sources.
+    Every call sleeps for a sampled latency, fails with SourceError at error_rate,
+    and waits while concurrency calls are in flight.
+    """
+
+    def __init__(
+        self,
+        files: dict[Any, Any],
+        latency: Latency = constant(0.0),
+        error_rate: float = 0.0,
+        concurrency: int | None = None,
+        seed: int | None = None,
+    ):
+        self.files = files
+        self.latency = latency
+        self.error_rate = error_rate
+        self.concurrency = concurrency
+        self.calls = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(concurrency) if concurrency else None
+        self._async_semaphore: asyncio.Semaphore | None = None
+
+    def _enter(self) -> tuple[float, bool]:
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            fails = self._rng.random() < self.error_rate
+            self.errors += fails
+            return self.latency(self._rng), fails
+
+    def _exit(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def get(self, key: Any, default: Any) -> Any:
+        if self._semaphore is not None:
+            self._semaphore.acquire()
+
+        try:
+            latency, fails = self._enter()
+            try:
+                time.sleep(latency)
+            finally:
+                self._exit()
+        finally:
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+        if fails:
+            raise SourceError(key)
+
+        return self.files.get(key, default)
+
+    async def async_get(self, key: Any, default: Any) -> Any:
+        if self.concurrency and self._async_semaphore is None:
+            self._async_semaphore = asyncio.Semaphore(self.concurrency)
+
+        if self._async_semaphore is not None:
+            await self._async_semaphore.acquire()
+
+        try:
+            latency, fails = self._enter()
+            try:
+                await asyncio.sleep(latency)
+            finally:
+                self._exit()
+        finally:
+            if self._async_semaphore is not None:
+                self._async_semaphore.release()
+
+        if fails:
+            raise SourceError(key)
+
+        return self.files.get(key, default)
@@ -0,0 +1,152 @@
+from typing import Any
+from typing import Generic
+from typing import Protocol
+from typing import TypeVar
+
+import json
+import zlib
+import pickle
+import marshal
+
+
+# Represents value type a cache returns
+T = TypeVar("T")
+# Represents value type the local cache stores
+C = TypeVar("C")
+
+
+class Codec(Protocol, Generic[T, C]):
+    """
+    Transformation of values to (encode) and from (decode) the local cache of a layer
+    """
+
+    def encode(self, value: T) -> C:
+        ...
+
+    def decode(self, value: C) -> T:
+        ...
+
+
+class IdentityCodec(Codec[T, T]):
+    """
+    Stores the live object, hits cost nothing but the object must not be mutated by callers
+    """
+
+    def encode(self, value: T) -> T:
+        return value
+
+    def decode(self, value: T) -> T:
+        return value
+
+
+# Pickle stream and the out-of-band buffers it refers to
+PickledValue = tuple[bytes, list[pickle.PickleBuffer]]
+
+
+class PickleCodec(Codec[Any, PickledValue]):
+    """
+    Pickle protocol 5, with objects supporting out-of-band buffers (for example numpy arrays)
+    kept as buffers next to the pickle stream instead of being copied into it
+
+    The buffers are copied once on encode, so changing the original object afterwards does not
+    change the cached value, and are read-only, decoded objects share them without a copy.
+    """
+
+    def __init__(self, out_of_band: bool = True):
+        self.out_of_band = out_of_band
+
+    def encode(self, value: Any) -> PickledValue:
+        buffers: list[pickle.PickleBuffer] = []
+        data = pickle.dumps(
+            value,
+            protocol=5,
+            buffer_callback=buffers.append if self.out_of_band else None,
+        )
+        return data, [pickle.PickleBuffer(buffer.raw().tobytes()) for buffer in buffers]
+
+    def decode(self, value: PickledValue) -> Any:
+        data, buffers = value
+        return pickle.loads(data, buffers=buffers)
+
+
+class PickleBytesCodec(Codec[Any, bytes]):
+    """
+    Pickle to a single bytes object, for stores that keep values outside the process
+    """
+
+    def encode(self, value: Any) -> bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def decode(self, value: bytes) -> Any:
+        return pickle.loads(value)
+
+
+class MarshalCodec(Codec[Any, bytes]):
+    """
+    Fast for builtin types only (no classes), the format may change between Python versions
+    """
+
+    def encode(self, value: Any) -> bytes:
+        return marshal.dumps(value)
+
+    def decode(self, value: bytes) -> Any:
+        return marshal.loads(value)
+
+
+class JsonCodec(Codec[Any, str]):
+    def encode(self, value: Any) -> str:
+        return json.dumps(value)
+
+    def decode(self, value: str) -> Any:
+        return json.loads(value)
+
+
+# Compression of bytes, for CompressedStore or as the codec of a layer holding bytes.
+# lzma and bz2 are optional modules of some Python builds, so they are imported on use
+
+
+class ZlibCodec(Codec[bytes, bytes]):
+    """
+    Fast, level 1 compresses quickly, 9 compresses best
+    """
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def encode(self, value: bytes) -> bytes:
+        return zlib.compress(value, self.level)
+
+    def decode(self, value: bytes) -> bytes:
+        return zlib.decompress(value)
+
+
+class LzmaCodec(Codec[bytes, bytes]):
+    """
+    Compresses best and slowest, for large values that are rarely read
+    """
+
+    def __init__(self, preset: int = 6):
+        import lzma
+
+        self.preset = preset
+        self._lzma = lzma
+
+    def encode(self, value: bytes) -> bytes:
+        return self._lzma.compress(value, preset=self.preset)
+
+    def decode(self, value: bytes) -> bytes:
+        return self._lzma.decompress(value)
+
+
+class Bz2Codec(Codec[bytes, bytes]):
+    def __init__(self, level: int = 9):
+        import bz2
+
+        self.level = level
+        self._bz2 = bz2
+
+    def encode(self, value: bytes) -> bytes:
+        return self._bz2.compress(value, self.level)
+
+    def decode(self, value: bytes) -> bytes:
+        return self._bz2.decompress(value)
@@ -0,0 +1,89 @@
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Hashable
+from typing import TypeVar
+
+import asyncio
+import threading
+
+
+T = TypeVar("T")
+
+
+class _AsyncCall:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+class AsyncSingleFlight:
+    """
+    Coalesces concurrent calls made with the same key into one
+
+    The first caller starts the call as a separate task, concurrent callers with the same key
+    await the same task. A result or exception is delivered to every waiter.
+    A cancelled waiter leaves without affecting the others, the call is cancelled only when
+    all of its waiters are gone.
+
+    One instance may be shared between cache layers since async_cache_layer keys calls with
+    (identifier, key).
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, _AsyncCall] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+
+        if call is None:
+            call = self._calls[key] = _AsyncCall(asyncio.ensure_future(fn()))
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+
+        call.waiters += 1
+
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+
+            if not call.waiters and not call.task.done():
+                # Everyone waiting for the call has been cancelled
+                self._forget(key, call)
+                call.task.cancel()
+
+    def _forget(self, key: Hashable, call: _AsyncCall):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+
+class StripedLock:
+    """
+    Per-key locks for thread-safe cache layers, striped to bound their number
+
+    Keys hash into a fixed number of locks, so threads computing distinct keys rarely contend
+    and no global lock is held. Every identifier gets its own set of stripes, so one instance
+    may be shared between the layers of a chain without an outer layer's lock colliding with
+    an inner layer's one.
+    """
+
+    def __init__(self, stripes: int = 64):
+        if stripes < 1:
+            raise ValueError("stripes must be positive")
+
+        self._stripes = stripes
+        self._locks: dict[Any, list[threading.Lock]] = {}
+
+    def get(self, identifier: Any, key: Hashable) -> threading.Lock:
+        locks = self._locks.get(identifier)
+
+        if locks is None:
+            # setdefault is atomic, racing threads end up with the same stripes
+            locks = self._locks.setdefault(identifier, [threading.Lock() for _ in range(self._stripes)])
+
+        return locks[hash(key) % self._stripes]
@@ -1,4 +1,12 @@
-from multilayer_cache.util import to_async
+from multilayer_cache.concurrency import AsyncSingleFlight
+from multilayer_cache.concurrency import StripedLock
+from multilayer_cache.expiry import TTL
+from multilayer_cache.expiry import NegativeCache
+from multilayer_cache.expiry import Entry
+from multilayer_cache.metrics import Metrics
+from multilayer_cache.metrics import LayerMetrics
+from multilayer_cache.tracing import Tracer
+from multilayer_cache.tracing import Span
 
 from typing import Generic
 from typing import TypeVar
@@ -7,6 +15,11 @@ from typing import Callable
 from typing import Annotated
 from typing import Literal
 from typing import Awaitable
+from typing import Sequence
+from typing import Mapping
+from dataclasses import dataclass
+
+import time
 
 import pydantic
 
@@ -58,9 +71,128 @@ class CacheLayerInspectMiss(BaseModel, Generic[K]):
     choice: Literal["miss"] = "miss"
     key: K
 
+class CacheLayerInspectNegativeHit(BaseModel, Generic[K]):
+    choice: Literal["negative_hit"] = "negative_hit"
+    key: K
+
 class CacheLayerInspect(BaseModel, Generic[K]):
     identifier: str
-    value: Annotated[CacheLayerInspectHit[K] | CacheLayerInspectMiss[K], pydantic.Field(discriminator="choice")]
+    value: Annotated[
+        CacheLayerInspectHit[K] | CacheLayerInspectMiss[K] | CacheLayerInspectNegativeHit[K],
+        pydantic.Field(discriminator="choice"),
+    ]
+
+
+# Lightweight event handed to inspect handlers
+#
+# Built only when an inspect handler is attached, and converted to the validated
+# CacheLayerInspect model only when the handler asks for it (to_model)
+@dataclass(frozen=True, slots=True)
+class CacheLayerEvent(Generic[K]):
+    identifier: Any
+    choice: Literal["hit", "miss", "negative_hit"]
+    key: K
+
+    def to_model(self) -> CacheLayerInspect[K]:
+        return CacheLayerInspect(
+            identifier=self.identifier,
+            value=_INSPECT_VALUE_MODELS[self.choice](key=self.key),
+        )
+
+
+_INSPECT_VALUE_MODELS = {
+    "hit": CacheLayerInspectHit,
+    "miss": CacheLayerInspectMiss,
+    "negative_hit": CacheLayerInspectNegativeHit,
+}
+
+
+def _refreshed(ttl: TTL, key: K, entry: Entry | None) -> bool:
+    # Recorded since entry was read, entries are replaced on every record
+    refreshed = ttl.entry(key)
+    return refreshed is not None and refreshed is not entry
+
+
+def _fill(
+    key: K,
+    default: D,
+    set_cache_value: Callable[[K, T], None],
+    on_cache_miss_source: Callable[[K, D], T | D],
+    ttl: TTL | None,
+    negative_cache: NegativeCache | None,
+    layer_metrics: LayerMetrics | None,
+    record_cost: Callable[[K, float], None] | None,
+) -> T | D:
+    if ttl is not None:
+        started = ttl.clock()
+
+    if record_cost is not None:
+        cost_started = time.perf_counter()
+
+    if layer_metrics is None:
+        value = on_cache_miss_source(key, default)
+    else:
+        value = layer_metrics.timed_source(on_cache_miss_source, key, default)
+
+    if value is default:
+        if ttl is not None:
+            ttl.forget(key)
+
+        if negative_cache is not None:
+            negative_cache.add(key)
+
+        return default
+
+    if record_cost is not None:
+        record_cost(key, time.perf_counter() - cost_started)
+
+    set_cache_value(key, value)
+
+    if ttl is not None:
+        ttl.record(key, ttl.clock() - started)
+
+    return value
+
+
+async def _async_fill(
+    key: K,
+    default: D,
+    set_cache_value: Callable[[K, T], Awaitable[None]],
+    on_cache_miss_source: Callable[[K, D], Awaitable[T | D]],
+    ttl: TTL | None,
+    negative_cache: NegativeCache | None,
+    layer_metrics: LayerMetrics | None,
+    record_cost: Callable[[K, float], None] | None,
+) -> T | D:
+    if ttl is not None:
+        started = ttl.clock()
+
+    if record_cost is not None:
+        cost_started = time.perf_counter()
+
+    if layer_metrics is None:
+        value = await on_cache_miss_source(key, default)
+    else:
+        value = await layer_metrics.async_timed_source(on_cache_miss_source, key, default)
+
+    if value is default:
+        if ttl is not None:
+            ttl.forget(key)
+
+        if negative_cache is not None:
+            negative_cache.add(key)
+
+        return default
+
+    if record_cost is not None:
+        record_cost(key, time.perf_counter() - cost_started)
+
+    await set_cache_value(key, value)
+
+    if ttl is not None:
+        ttl.record(key, ttl.clock() - started)
+
+    return value
 
 
 def cache_layer(
@@ -77,42 +209,124 @@ def cache_layer(
     # A way to get an identifier for a cache layer
     get_identifier: Callable[[], Any],
     # Handler of generated events, for example for testing and logging
-    inspect: Callable[[CacheLayerInspect], None] = lambda _: None,
+    # (when omitted, no events are built at all)
+    inspect: Callable[[CacheLayerEvent], None] | None = None,
+    # Makes concurrent misses on the same key wait for the one thread computing the value
+    locks: StripedLock | None = None,
+    # Expires entries of the local cache
+    ttl: TTL | None = None,
+    # Remembers keys not found by the source
+    negative_cache: NegativeCache | None = None,
+    # Collects counters and latencies of the layer
+    metrics: Metrics | None = None,
+    # Links the lookup to lookups of outer and inner layers and times its phases
+    tracer: Tracer | None = None,
+    # Receives the seconds the source took to produce a value (inner layers included),
+    # before the value is stored, for cost-aware stores
+    record_cost: Callable[[K, float], None] | None = None,
 ) -> T | D:
-    cache_id = get_identifier()
-
     key = get_cache_key()
 
-    cached = get_cache_value(key, CACHE_MISS)
+    if tracer is None:
+        return _cache_layer(
+            key, get_cache_value, set_cache_value, on_cache_miss_source, get_default, get_identifier,
+            inspect, locks, ttl, negative_cache, metrics, record_cost, None, None,
+        )
+
+    span, token = tracer.start(get_identifier(), key)
+    get_cache_value, set_cache_value, on_cache_miss_source = tracer.instrument(
+        span, get_cache_value, set_cache_value, on_cache_miss_source,
+    )
+
+    try:
+        value = _cache_layer(
+            key, get_cache_value, set_cache_value, on_cache_miss_source, get_default, get_identifier,
+            inspect, locks, ttl, negative_cache, metrics, record_cost, tracer, span,
+        )
+    except BaseException as error:
+        tracer.end(span, token, error)
+        raise
+
+    tracer.end(span, token)
+    return value
+
+
+def _cache_layer(
+    key: K,
+    get_cache_value: Callable[[K, D], T | D],
+    set_cache_value: Callable[[K, T], None],
+    on_cache_miss_source: Callable[[K, D], T | D],
+    get_default: Callable[[], D],
+    get_identifier: Callable[[], Any],
+    inspect: Callable[[CacheLayerEvent], None] | None,
+    locks: StripedLock | None,
+    ttl: TTL | None,
+    negative_cache: NegativeCache | None,
+    metrics: Metrics | None,
+    record_cost: Callable[[K, float], None] | None,
+    tracer: Tracer | None,
+    span: Span | None,
+) -> T | D:
+    if metrics is None:
+        layer_metrics = None
+        cached = get_cache_value(key, CACHE_MISS)
+    else:
+        layer_metrics = metrics.layer(get_identifier())
+        cached = layer_metrics.timed_lookup(get_cache_value, key, CACHE_MISS)
+
+    if cached is not CACHE_MISS and ttl is not None and ttl.expired(key):
+        # Refreshed like a miss, so it re-derives from inner layers that may still be fresh
+        cached = CACHE_MISS
 
     if cached is CACHE_MISS:
-        inspect(CacheLayerInspect(
-            identifier=cache_id,
-            value=CacheLayerInspectMiss(
-                key=key,
-            )
-        ))
+        if negative_cache is not None and key in negative_cache:
+            if layer_metrics is not None:
+                layer_metrics.negative_hits += 1
+
+            if tracer is not None:
+                tracer.negative_hit(span)
+
+            if inspect is not None:
+                inspect(CacheLayerEvent(get_identifier(), "negative_hit", key))
+
+            return get_default()
+
+        if layer_metrics is not None:
+            layer_metrics.misses += 1
+
+        if inspect is not None:
+            inspect(CacheLayerEvent(get_identifier(), "miss", key))
 
         default = get_default()
 
-        value = on_cache_miss_source(key, default)
+        if locks is not None:
+            # Tells whether another thread has refreshed the entry while this one waited
+            entry = ttl.entry(key) if ttl is not None else None
 
-        if value is default:
-            return default
+            with locks.get(get_identifier(), key):
+                # Another thread may have computed the value while this one waited,
+                # or found the key gone from the source (leaving a stale value without an entry)
+                if negative_cache is not None and key in negative_cache:
+                    return default
 
-        set_cache_value(key, value)
-        return value
+                cached = get_cache_value(key, CACHE_MISS)
+
+                if cached is not CACHE_MISS and (ttl is None or _refreshed(ttl, key, entry)):
+                    return cached
+
+                return _fill(key, default, set_cache_value, on_cache_miss_source, ttl, negative_cache, layer_metrics, record_cost)
+
+        return _fill(key, default, set_cache_value, on_cache_miss_source, ttl, negative_cache, layer_metrics, record_cost)
 
     else:
-        inspect(CacheLayerInspect(
-            identifier=cache_id,
-            value=CacheLayerInspectHit(
-                key=key,
-            )
-        ))
+        if layer_metrics is not None:
+            layer_metrics.hits += 1
+
+        if inspect is not None:
+            inspect(CacheLayerEvent(get_identifier(), "hit", key))
 
         return cached
-    
+
 
 async def async_cache_layer(
     get_cache_key: Callable[[], Awaitable[K]],
@@ -121,43 +335,198 @@ async def async_cache_layer(
     on_cache_miss_source: Callable[[K, D], Awaitable[T | D]],
     get_default: Callable[[], Awaitable[D]],
     get_identifier: Callable[[], Awaitable[Any]],
-    inspect: Callable[[CacheLayerInspect], Awaitable[None]] = to_async(lambda _: None),
+    inspect: Callable[[CacheLayerEvent], Awaitable[None]] | None = None,
+    # Coalesces concurrent misses on the same (identifier, key) into one source call and cache update
+    single_flight: AsyncSingleFlight | None = None,
+    ttl: TTL | None = None,
+    negative_cache: NegativeCache | None = None,
+    metrics: Metrics | None = None,
+    tracer: Tracer | None = None,
+    record_cost: Callable[[K, float], None] | None = None,
 ) -> T | D:
-    cache_id = await get_identifier()
-
     key = await get_cache_key()
 
-    cached = await get_cache_value(key, CACHE_MISS)
+    if tracer is None:
+        return await _async_cache_layer(
+            key, get_cache_value, set_cache_value, on_cache_miss_source, get_default, get_identifier,
+            inspect, single_flight, ttl, negative_cache, metrics, record_cost, None, None,
+        )
+
+    span, token = tracer.start(await get_identifier(), key)
+    get_cache_value, set_cache_value, on_cache_miss_source = tracer.async_instrument(
+        span, get_cache_value, set_cache_value, on_cache_miss_source,
+    )
+
+    try:
+        value = await _async_cache_layer(
+            key, get_cache_value, set_cache_value, on_cache_miss_source, get_default, get_identifier,
+            inspect, single_flight, ttl, negative_cache, metrics, record_cost, tracer, span,
+        )
+    except BaseException as error:
+        tracer.end(span, token, error)
+        raise
+
+    tracer.end(span, token)
+    return value
+
+
+async def _async_cache_layer(
+    key: K,
+    get_cache_value: Callable[[K, D], Awaitable[T | D]],
+    set_cache_value: Callable[[K, T], Awaitable[None]],
+    on_cache_miss_source: Callable[[K, D], Awaitable[T | D]],
+    get_default: Callable[[], Awaitable[D]],
+    get_identifier: Callable[[], Awaitable[Any]],
+    inspect: Callable[[CacheLayerEvent], Awaitable[None]] | None,
+    single_flight: AsyncSingleFlight | None,
+    ttl: TTL | None,
+    negative_cache: NegativeCache | None,
+    metrics: Metrics | None,
+    record_cost: Callable[[K, float], None] | None,
+    tracer: Tracer | None,
+    span: Span | None,
+) -> T | D:
+    if metrics is None:
+        layer_metrics = None
+        cached = await get_cache_value(key, CACHE_MISS)
+    else:
+        layer_metrics = metrics.layer(await get_identifier())
+        cached = await layer_metrics.async_timed_lookup(get_cache_value, key, CACHE_MISS)
+
+    if cached is not CACHE_MISS and ttl is not None and ttl.expired(key):
+        cached = CACHE_MISS
 
     if cached is CACHE_MISS:
-        await inspect(CacheLayerInspect(
-            identifier=cache_id,
-            value=CacheLayerInspectMiss(
-                key=key,
-            )
-        ))
+        if negative_cache is not None and key in negative_cache:
+            if layer_metrics is not None:
+                layer_metrics.negative_hits += 1
+
+            if tracer is not None:
+                tracer.negative_hit(span)
+
+            if inspect is not None:
+                await inspect(CacheLayerEvent(await get_identifier(), "negative_hit", key))
+
+            return await get_default()
+
+        if layer_metrics is not None:
+            layer_metrics.misses += 1
+
+        if inspect is not None:
+            await inspect(CacheLayerEvent(await get_identifier(), "miss", key))
 
         default = await get_default()
 
-        value = await on_cache_miss_source(key, default)
+        if single_flight is not None:
+            async def fetch():
+                value = await _async_fill(key, default, set_cache_value, on_cache_miss_source, ttl, negative_cache, layer_metrics, record_cost)
+                # Waiters may have provided their own defaults
+                return CACHE_MISS if value is default else value
 
-        if value is default:
-            return default
+            value = await single_flight.do((await get_identifier(), key), fetch)
+            return default if value is CACHE_MISS else value
 
-        await set_cache_value(key, value)
-        return value
+        return await _async_fill(key, default, set_cache_value, on_cache_miss_source, ttl, negative_cache, layer_metrics, record_cost)
 
     else:
-        await inspect(CacheLayerInspect(
-            identifier=cache_id,
-            value=CacheLayerInspectHit(
-                key=key,
-            )
-        ))
+        if layer_metrics is not None:
+            layer_metrics.hits += 1
+
+        if inspect is not None:
+            await inspect(CacheLayerEvent(await get_identifier(), "hit", key))
 
         return cached
 
 
+def _merge_many(
+    keys: Sequence[K],
+    cached: Sequence[T | Any],
+    found: Mapping[K, T],
+    default: D,
+) -> list[T | D]:
+    return [
+        found.get(key, default) if value is CACHE_MISS else value
+        for key, value in zip(keys, cached)
+    ]
+
+
+def cache_layer_many(
+    # A way to get cache keys
+    get_cache_keys: Callable[[], Sequence[K]],
+    # A way to use the keys from local cache to get values (in the same order, default for missing)
+    get_cache_values: Callable[[Sequence[K], D], Sequence[T | D]],
+    # A way to update local cache with found keys and values
+    set_cache_values: Callable[[Mapping[K, T]], None],
+    # A way to get values from the dependant source with the keys missing from local cache
+    on_cache_miss_source_many: Callable[[Sequence[K], D], Sequence[T | D]],
+    get_default: Callable[[], D],
+    get_identifier: Callable[[], Any],
+    inspect: Callable[[CacheLayerEvent], None] | None = None,
+) -> list[T | D]:
+    keys = get_cache_keys()
+
+    cached = get_cache_values(keys, CACHE_MISS)
+
+    if inspect is not None:
+        cache_id = get_identifier()
+
+        for key, value in zip(keys, cached):
+            inspect(CacheLayerEvent(cache_id, "miss" if value is CACHE_MISS else "hit", key))
+
+    # Deduplicated, in order of appearance
+    missing = list(dict.fromkeys(key for key, value in zip(keys, cached) if value is CACHE_MISS))
+
+    if not missing:
+        return list(cached)
+
+    default = get_default()
+
+    values = on_cache_miss_source_many(missing, default)
+
+    found = {key: value for key, value in zip(missing, values) if value is not default}
+
+    if found:
+        set_cache_values(found)
+
+    return _merge_many(keys, cached, found, default)
+
+
+async def async_cache_layer_many(
+    get_cache_keys: Callable[[], Awaitable[Sequence[K]]],
+    get_cache_values: Callable[[Sequence[K], D], Awaitable[Sequence[T | D]]],
+    set_cache_values: Callable[[Mapping[K, T]], Awaitable[None]],
+    on_cache_miss_source_many: Callable[[Sequence[K], D], Awaitable[Sequence[T | D]]],
+    get_default: Callable[[], Awaitable[D]],
+    get_identifier: Callable[[], Awaitable[Any]],
+    inspect: Callable[[CacheLayerEvent], Awaitable[None]] | None = None,
+) -> list[T | D]:
+    keys = await get_cache_keys()
+
+    cached = await get_cache_values(keys, CACHE_MISS)
+
+    if inspect is not None:
+        cache_id = await get_identifier()
+
+        for key, value in zip(keys, cached):
+            await inspect(CacheLayerEvent(cache_id, "miss" if value is CACHE_MISS else "hit", key))
+
+    missing = list(dict.fromkeys(key for key, value in zip(keys, cached) if value is CACHE_MISS))
+
+    if not missing:
+        return list(cached)
+
+    default = await get_default()
+
+    values = await on_cache_miss_source_many(missing, default)
+
+    found = {key: value for key, value in zip(missing, values) if value is not default}
+
+    if found:
+        await set_cache_values(found)
+
+    return _merge_many(keys, cached, found, default)
+
+
 class type_hinted_cache_layer(Generic[T, K, D]):
     @staticmethod
     def new(
@@ -167,7 +536,13 @@ class type_hinted_cache_layer(Generic[T, K, D]):
         on_cache_miss_source: Callable[[K, D], T | D],
         get_default: Callable[[], D],
         get_identifier: Callable[[], Any],
-        inspect: Callable[[CacheLayerInspect], None] = lambda _: None,
+        inspect: Callable[[CacheLayerEvent], None] | None = None,
+        locks: StripedLock | None = None,
+        ttl: TTL | None = None,
+        negative_cache: NegativeCache | None = None,
+        metrics: Metrics | None = None,
+        tracer: Tracer | None = None,
+        record_cost: Callable[[K, float], None] | None = None,
     ) -> T | D:
         return cache_layer(
             get_cache_key=get_cache_key,
@@ -177,6 +552,12 @@ class type_hinted_cache_layer(Generic[T, K, D]):
             get_default=get_default,
             get_identifier=get_identifier,
             inspect=inspect,
+            locks=locks,
+            ttl=ttl,
+            negative_cache=negative_cache,
+            metrics=metrics,
+            tracer=tracer,
+            record_cost=record_cost,
         )
 
 
@@ -189,7 +570,13 @@ class type_hinted_async_cache_layer(Generic[T, K, D]):
         on_cache_miss_source: Callable[[K, D], Awaitable[T | D]],
         get_default: Callable[[], Awaitable[D]],
         get_identifier: Callable[[], Awaitable[Any]],
-        inspect: Callable[[CacheLayerInspect], Awaitable[None]] = to_async(lambda _: None),
+        inspect: Callable[[CacheLayerEvent], Awaitable[None]] | None = None,
+        single_flight: AsyncSingleFlight | None = None,
+        ttl: TTL | None = None,
+        negative_cache: NegativeCache | None = None,
+        metrics: Metrics | None = None,
+        tracer: Tracer | None = None,
+        record_cost: Callable[[K, float], None] | None = None,
     ) -> Awaitable[T | D]:
         return async_cache_layer(
             get_cache_key=get_cache_key,
@@ -199,38 +586,10 @@ class type_hinted_async_cache_layer(Generic[T, K, D]):
             get_default=get_default,
             get_identifier=get_identifier,
             inspect=inspect,
+            single_flight=single_flight,
+            ttl=ttl,
+            negative_cache=negative_cache,
+            metrics=metrics,
+            tracer=tracer,
+            record_cost=record_cost,
         )
-
-
-### class CacheName(...GenericArgs [T, C, S]) todo add cache key type
-###
-###     T type cache returns
-###     C type local cache stores values in
-###     S type on_cache_miss_source returns
-###
-###     on_cache_miss_source (key part -> S)
-###
-###     getter -> key
-###     getter -> (S -> T)
-###
-###     serialize -> (T, C)
-###     deserialize -> (C, T)
-###
-###     local_cache
-###
-###
-###     def get(self, getter)
-###         getter -> key
-###
-###         local_cache (key)
-###             hit:
-###                 deserialize
-###             miss:
-###                 on_cache_miss_source (key part)
-###                 getter -> (S -> T)
-###                 local_cache[key]=serialize
-###                 serialize
-###
-###
-###
-
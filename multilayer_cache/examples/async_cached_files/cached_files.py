@@ -1,4 +1,5 @@
 from multilayer_cache import async_cache_layer
+from multilayer_cache import async_cache_layer_many
 from multilayer_cache import KEY_NOT_FOUND
 from multilayer_cache.util import to_async
 from multilayer_cache.examples.async_cached_files.defs import BlobId
@@ -24,12 +25,26 @@ def bakein_on_cache_miss_source(bucket: Bucket):
     return on_cache_miss_source
 
 
+def bakein_on_cache_miss_source_many(bucket: Bucket):
+
+    async def on_cache_miss_source_many(cache_keys: list[BlobId], default) -> list[FileContents]:
+        return await bucket.get_many(cache_keys, default)
+
+    return on_cache_miss_source_many
+
+
 def bakein_get_cache_value(inner_cache: InnerCache):
     return to_async(lambda key, default: inner_cache.get(key, default))
 
 def bakein_set_cache_value(inner_cache: InnerCache):
     return to_async(lambda key, value: inner_cache.update({key: value}))
 
+def bakein_get_cache_values(inner_cache: InnerCache):
+    return to_async(lambda keys, default: [inner_cache.get(key, default) for key in keys])
+
+def bakein_set_cache_values(inner_cache: InnerCache):
+    return to_async(inner_cache.update)
+
 
 cache_layer_partial = partial(
     async_cache_layer,
@@ -42,3 +57,14 @@ cache_layer_partial = partial(
     # inspect
 )
 
+
+cache_layer_many_partial = partial(
+    async_cache_layer_many,
+    # get_cache_keys
+    # get_cache_values
+    # set_cache_values
+    # on_cache_miss_source_many
+    get_default=to_async(lambda: KEY_NOT_FOUND),
+    get_identifier=to_async(lambda: "cached_files"),
+    # inspect
+)
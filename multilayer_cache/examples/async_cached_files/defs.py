@@ -20,3 +20,6 @@ class Bucket(BaseModel):
     async def get(self, blob_id: BlobId, default) -> FileContents:
         return self.files.get(blob_id, default)
 
+    async def get_many(self, blob_ids: list[BlobId], default) -> list[FileContents]:
+        return [self.files.get(blob_id, default) for blob_id in blob_ids]
+
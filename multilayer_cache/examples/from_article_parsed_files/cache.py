@@ -65,7 +65,8 @@ files_cache_layer_partial = partial(
     on_cache_miss_source=on_cache_miss_source,
     # get_default=
     get_identifier=lambda: "raw_files",
-    inspect=lambda event: events.append(event),
+    # Events are lightweight records, convert them to pydantic models to match against.
+    inspect=lambda event: events.append(event.to_model()),
 )
 
 # Make a call with the key "a" (we know the bucket has it).
@@ -1,4 +1,5 @@
 from multilayer_cache import cache_layer
+from multilayer_cache import cache_layer_many
 from multilayer_cache import KEY_NOT_FOUND
 from multilayer_cache.examples.parsed_files.defs import BlobId
 from multilayer_cache.examples.parsed_files.defs import FileContents
@@ -22,12 +23,25 @@ def bakein_on_cache_miss_source(bucket: Bucket):
     
     return on_cache_miss_source
 
+def bakein_on_cache_miss_source_many(bucket: Bucket):
+
+    def on_cache_miss_source_many(cache_keys: list[BlobId], default) -> list[FileContents]:
+        return bucket.get_many(cache_keys, default)
+
+    return on_cache_miss_source_many
+
 def bakein_get_cache_value(inner_cache: InnerCache):
     return lambda key, default: inner_cache.get(key, default)
 
 def bakein_set_cache_value(inner_cache: InnerCache):
     return lambda key, value: inner_cache.update({key: value})
 
+def bakein_get_cache_values(inner_cache: InnerCache):
+    return lambda keys, default: [inner_cache.get(key, default) for key in keys]
+
+def bakein_set_cache_values(inner_cache: InnerCache):
+    return inner_cache.update
+
 
 cache_layer_partial = partial(
     cache_layer,
@@ -40,3 +54,14 @@ cache_layer_partial = partial(
     # inspect
 )
 
+
+cache_layer_many_partial = partial(
+    cache_layer_many,
+    # get_cache_keys
+    # get_cache_values
+    # set_cache_values
+    # on_cache_miss_source_many
+    get_default=lambda: KEY_NOT_FOUND,
+    get_identifier=lambda: "cached_files",
+    # inspect
+)
@@ -25,6 +25,9 @@ class Bucket(BaseModel):
     def get(self, blob_id: BlobId, default) -> FileContents:
         return self.files.get(blob_id, default)
 
+    def get_many(self, blob_ids: list[BlobId], default) -> list[FileContents]:
+        return [self.files.get(blob_id, default) for blob_id in blob_ids]
+
 
 class Parser(Protocol, Generic[T]):
     def version(self) -> ParserVersion:
@@ -1,9 +1,11 @@
 from multilayer_cache import cache_layer
+from multilayer_cache import cache_layer_many
 from multilayer_cache import KEY_NOT_FOUND
+from multilayer_cache.codecs import Codec
+from multilayer_cache.codecs import JsonCodec
 from multilayer_cache.examples.parsed_files.defs import BlobId
 
 from typing import TypeAlias
-import json
 from functools import partial
 
 import pydantic
@@ -13,12 +15,25 @@ import pydantic
 InnerCache: TypeAlias = dict[BlobId, str]
 
 
+# Values are stored JSON encoded by default,
+# IdentityCodec stores parsed values as they are, so hits do not reparse them
 
-def bakein_get_cache_value(inner_cache: InnerCache):
-    return lambda key, default: json.loads(cached) if (cached := inner_cache.get(key, default)) is not default else default
 
-def bakein_set_cache_value(inner_cache: InnerCache):
-    return lambda key, value: inner_cache.update({key: json.dumps(value)})
+def bakein_get_cache_value(inner_cache: InnerCache, codec: Codec = JsonCodec()):
+    decode = codec.decode
+    return lambda key, default: decode(cached) if (cached := inner_cache.get(key, default)) is not default else default
+
+def bakein_set_cache_value(inner_cache: InnerCache, codec: Codec = JsonCodec()):
+    encode = codec.encode
+    return lambda key, value: inner_cache.update({key: encode(value)})
+
+def bakein_get_cache_values(inner_cache: InnerCache, codec: Codec = JsonCodec()):
+    get_cache_value = bakein_get_cache_value(inner_cache, codec)
+    return lambda keys, default: [get_cache_value(key, default) for key in keys]
+
+def bakein_set_cache_values(inner_cache: InnerCache, codec: Codec = JsonCodec()):
+    encode = codec.encode
+    return lambda items: inner_cache.update({key: encode(value) for key, value in items.items()})
 
 
 
@@ -33,3 +48,14 @@ cache_layer_partial = partial(
     # inspect
 )
 
+
+cache_layer_many_partial = partial(
+    cache_layer_many,
+    # get_cache_keys
+    # get_cache_values
+    # set_cache_values
+    # on_cache_miss_source_many
+    get_default=lambda: KEY_NOT_FOUND,
+    get_identifier=lambda: "parsed_cached_files",
+    # inspect
+)
@@ -0,0 +1,176 @@
+from typing import Any
+from typing import Callable
+from typing import TypeVar
+from typing import ParamSpec
+from typing import TYPE_CHECKING
+
+import asyncio
+import threading
+import contextvars
+from collections import deque
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+
+if TYPE_CHECKING:
+    from multilayer_cache.metrics import Metrics
+
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+class ExecutorSaturated(Exception):
+    """
+    Raised by a non-blocking BoundedExecutor when its workers and queue are full
+    """
+
+
+@dataclass(slots=True, frozen=True)
+class ExecutorStats:
+    name: str
+    max_workers: int
+    max_queue: int
+    # Calls running in a worker
+    active: int
+    # Admitted calls waiting for a worker
+    queued: int
+    # Callers waiting to be admitted
+    waiting: int
+    submitted: int
+    rejected: int
+    # Calls that found the executor full
+    saturated: int
+
+    @property
+    def saturation(self) -> float:
+        return (self.active + self.queued) / (self.max_workers + self.max_queue)
+
+
+class BoundedExecutor:
+    """
+    A named thread pool for the blocking functions of async cache layers
+
+    At most max_workers calls run at once and at most max_queue more wait for a worker.
+    When both are full, callers wait for a slot (block=True), which propagates backpressure
+    to the awaiting coroutines, or get ExecutorSaturated (block=False). Giving each layer
+    (or each kind of blocking work) its own executor keeps one slow dependency from taking
+    the threads of the others, as it would with the loop's default executor.
+
+    Calls run with a copy of the caller's context, like asyncio.to_thread.
+    Admission is tracked per instance, which is meant to be used from one event loop.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int = 4,
+        max_queue: int = 64,
+        block: bool = True,
+        metrics: "Metrics | None" = None,
+    ):
+        if max_workers < 1:
+            raise ValueError("max_workers must be positive")
+
+        if max_queue < 0:
+            raise ValueError("max_queue must not be negative")
+
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.block = block
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._waiters: deque[asyncio.Future] = deque()
+        self._admitted = 0
+        self._active = 0
+        self._submitted = 0
+        self._rejected = 0
+        self._saturated = 0
+
+        if metrics is not None:
+            metrics.executors[name] = self
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def stats(self) -> ExecutorStats:
+        active = self._active
+        return ExecutorStats(
+            name=self.name,
+            max_workers=self.max_workers,
+            max_queue=self.max_queue,
+            active=active,
+            queued=self._admitted - active,
+            waiting=len(self._waiters),
+            submitted=self._submitted,
+            rejected=self._rejected,
+            saturated=self._saturated,
+        )
+
+    async def run(self, fn: Callable[P, T], /, *args: P.args, **kwargs: P.kwargs) -> T:
+        loop = asyncio.get_running_loop()
+
+        if self._admitted < self.capacity and not self._waiters:
+            self._admitted += 1
+        else:
+            self._saturated += 1
+
+            if not self.block:
+                self._rejected += 1
+                raise ExecutorSaturated(f"executor {self.name!r} is full")
+
+            waiter = loop.create_future()
+            self._waiters.append(waiter)
+
+            try:
+                # The slot of a finished call is handed over by _release
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._release()
+                else:
+                    self._waiters.remove(waiter)
+                raise
+
+        self._submitted += 1
+
+        try:
+            future = self._pool.submit(self._call, contextvars.copy_context(), fn, args, kwargs)
+        except BaseException:
+            self._release()
+            raise
+
+        # The slot is released when the call finishes, or is cancelled before it starts,
+        # not when the caller stops waiting
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+        return await asyncio.wrap_future(future, loop=loop)
+
+    def _call(self, context: contextvars.Context, fn: Callable[..., T], args: tuple, kwargs: dict[str, Any]) -> T:
+        with self._lock:
+            self._active += 1
+
+        try:
+            return context.run(fn, *args, **kwargs)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def _release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+        self._admitted -= 1
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait, cancel_futures=not wait)
+
+    def __enter__(self) -> "BoundedExecutor":
+        return self
+
+    def __exit__(self, *_):
+        self.shutdown()
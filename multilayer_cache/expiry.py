@@ -0,0 +1,125 @@
+from typing import Callable
+from typing import Hashable
+
+import math
+import time
+import random
+from collections import OrderedDict
+
+
+# Expiry metadata of an entry: (expires at, seconds it took to compute the value)
+Entry = tuple[float, float]
+
+
+class TTL:
+    """
+    Time to live of a cache layer's entries with probabilistic early refresh (XFetch)
+
+    Expiry metadata is kept here, next to the local cache, so stored values are left untouched.
+    A lookup treats an entry as expired a bit before its deadline with a probability growing
+    as the deadline approaches and with the time the value took to compute (scaled by beta),
+    so hot keys get refreshed by one lookup instead of all lookups stampeding at the deadline.
+
+    Entries without metadata (stored before the layer had a TTL, or purged) are expired.
+    """
+
+    def __init__(
+        self,
+        seconds: float,
+        beta: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        random: Callable[[], float] = random.random,
+    ):
+        if seconds <= 0:
+            raise ValueError("seconds must be positive")
+
+        self.seconds = seconds
+        self.beta = beta
+        self.clock = clock
+        self._random = random
+        self._entries: dict[Hashable, Entry] = {}
+        self._next_purge = 1024
+
+    def entry(self, key: Hashable) -> Entry | None:
+        return self._entries.get(key)
+
+    def expired(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return True
+
+        expires_at, delta = entry
+        # 1 - random() is in (0, 1], so the log is defined
+        return self.clock() - delta * self.beta * math.log(1.0 - self._random()) >= expires_at
+
+    def record(self, key: Hashable, delta: float):
+        entries = self._entries
+        entries[key] = (self.clock() + self.seconds, delta)
+
+        if len(entries) >= self._next_purge:
+            self.purge()
+            self._next_purge = max(1024, 2 * len(entries))
+
+    def forget(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def purge(self):
+        # Metadata of expired entries is dropped, so keys evicted from the local cache do not pile up
+        now = self.clock()
+        self._entries = {key: entry for key, entry in self._entries.items() if entry[0] > now}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class NegativeCache:
+    """
+    Remembers keys the source did not have, so a layer can answer "not found" locally
+
+    Bounded by entry count (least recently added keys go first) and by time to live.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 10_000,
+        seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+
+        if seconds <= 0:
+            raise ValueError("seconds must be positive")
+
+        self.capacity = capacity
+        self.seconds = seconds
+        self.clock = clock
+        # key -> expires at, in order of addition
+        self._entries: OrderedDict[Hashable, float] = OrderedDict()
+
+    def add(self, key: Hashable):
+        entries = self._entries
+        entries[key] = self.clock() + self.seconds
+        entries.move_to_end(key)
+
+        if len(entries) > self.capacity:
+            entries.popitem(last=False)
+
+    def discard(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def __contains__(self, key: Hashable) -> bool:
+        expires_at = self._entries.get(key)
+
+        if expires_at is None:
+            return False
+
+        if self.clock() >= expires_at:
+            del self._entries[key]
+            return False
+
+        return True
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,317 @@
+from multilayer_cache.core import cache_layer
+from multilayer_cache.core import async_cache_layer
+from multilayer_cache.core import CACHE_MISS
+from multilayer_cache.core import KEY_NOT_FOUND
+from multilayer_cache.core import CacheLayerEvent
+from multilayer_cache.concurrency import AsyncSingleFlight
+from multilayer_cache.concurrency import StripedLock
+from multilayer_cache.expiry import TTL
+from multilayer_cache.expiry import NegativeCache
+from multilayer_cache.metrics import Metrics
+from multilayer_cache.tracing import Tracer
+from multilayer_cache.codecs import Codec
+from multilayer_cache.codecs import IdentityCodec
+from multilayer_cache.offload import ProcessTransform
+from multilayer_cache.util import to_async
+
+from typing import Generic
+from typing import TypeVar
+from typing import Any
+from typing import Callable
+from typing import Awaitable
+
+
+# Represents value type a cache returns
+T = TypeVar("T")
+# Represents value type the local cache stores
+C = TypeVar("C")
+# Represents value type the source returns
+S = TypeVar("S")
+# Represents key type of the cache
+K = TypeVar("K")
+
+
+def _codec_functions(
+    codec: Codec | None,
+    serialize: Callable[[T], C] | None,
+    deserialize: Callable[[C], T] | None,
+) -> tuple[Callable[[T], C] | None, Callable[[C], T] | None]:
+    if codec is None:
+        return serialize, deserialize
+
+    if serialize is not None or deserialize is not None:
+        raise ValueError("codec replaces serialize and deserialize, provide either")
+
+    if isinstance(codec, IdentityCodec):
+        # Nothing to do on hits and stores
+        return None, None
+
+    return codec.encode, codec.decode
+
+
+def _compose_source(
+    source: Callable[[Any, Any], Any],
+    source_key: Callable[[K], Any] | None,
+    transform: Callable[[S], T] | None,
+) -> Callable[[K, Any], Any]:
+    if source_key is None and transform is None:
+        return source
+
+    if transform is None:
+        return lambda key, default: source(source_key(key), default)
+
+    if source_key is None:
+        source_key = lambda key: key
+
+    def on_cache_miss_source(key, default):
+        value = source(source_key(key), default)
+        return default if value is default else transform(value)
+
+    return on_cache_miss_source
+
+
+def _async_compose_source(
+    source: Callable[[Any, Any], Awaitable[Any]],
+    source_key: Callable[[K], Any] | None,
+    transform: Callable[[S], T] | None,
+    awaitable_transform: bool = False,
+) -> Callable[[K, Any], Awaitable[Any]]:
+    if source_key is None and transform is None:
+        return source
+
+    if source_key is None:
+        source_key = lambda key: key
+
+    if transform is None:
+        return lambda key, default: source(source_key(key), default)
+
+    if awaitable_transform:
+        async def on_cache_miss_source(key, default):
+            value = await source(source_key(key), default)
+            return default if value is default else await transform(value)
+
+        return on_cache_miss_source
+
+    async def on_cache_miss_source(key, default):
+        value = await source(source_key(key), default)
+        return default if value is default else transform(value)
+
+    return on_cache_miss_source
+
+
+class CacheLayer(Generic[K, T]):
+    """
+    A cache layer built once and looked up with get(key)
+
+    The local cache holds values serialized (T -> C) and deserializes them on hits (C -> T).
+    On misses the source is called with the key reduced by source_key, and the value it returns
+    is transformed (S -> T). The source is either a function with the get(key, default) contract
+    or a parent layer, so layers compose into chains and trees:
+
+        files = CacheLayer("cached_files", store.get, store.set, source=bucket.get)
+        parsed = CacheLayer(
+            "parsed_cached_files", parsed_store.get, parsed_store.set,
+            source=files, source_key=lambda key: key[0], transform=parser.parse,
+        )
+
+        parsed.get(("a", parser.version()))
+
+    Instead of serialize and deserialize a codec (see multilayer_cache.codecs) may be provided.
+
+    The identifier and the default are constants, and get is compiled at construction,
+    so a lookup costs no more than the layer's options require.
+    """
+
+    def __init__(
+        self,
+        identifier: Any,
+        get_cache_value: Callable[[K, Any], C | Any],
+        set_cache_value: Callable[[K, C], None],
+        source: "CacheLayer | Callable[[Any, Any], S | Any]",
+        source_key: Callable[[K], Any] | None = None,
+        transform: Callable[[S], T] | None = None,
+        serialize: Callable[[T], C] | None = None,
+        deserialize: Callable[[C], T] | None = None,
+        codec: Codec[T, C] | None = None,
+        default: Any = KEY_NOT_FOUND,
+        inspect: Callable[[CacheLayerEvent], None] | None = None,
+        locks: StripedLock | None = None,
+        ttl: TTL | None = None,
+        negative_cache: NegativeCache | None = None,
+        metrics: Metrics | None = None,
+        tracer: Tracer | None = None,
+        record_cost: Callable[[K, float], None] | None = None,
+    ):
+        self.identifier = identifier
+        self.default = default
+
+        serialize, deserialize = _codec_functions(codec, serialize, deserialize)
+
+        if deserialize is not None:
+            get_serialized = get_cache_value
+
+            def get_cache_value(key, default):
+                cached = get_serialized(key, default)
+                return default if cached is default else deserialize(cached)
+
+        if serialize is not None:
+            set_serialized = set_cache_value
+
+            def set_cache_value(key, value):
+                set_serialized(key, serialize(value))
+
+        if isinstance(source, CacheLayer):
+            source = source.get
+
+        if metrics is not None and transform is not None:
+            transform = metrics.timed_transform(identifier, transform)
+
+        if tracer is not None and transform is not None:
+            transform = tracer.timed_transform(transform)
+
+        on_cache_miss_source = _compose_source(source, source_key, transform)
+
+        if inspect is None and locks is None and ttl is None and negative_cache is None and metrics is None and tracer is None and record_cost is None:
+            def get(key: K, default: Any = default) -> T | Any:
+                cached = get_cache_value(key, CACHE_MISS)
+
+                if cached is not CACHE_MISS:
+                    return cached
+
+                value = on_cache_miss_source(key, default)
+
+                if value is default:
+                    return default
+
+                set_cache_value(key, value)
+                return value
+
+        else:
+            layer_default = default
+            get_layer_default = lambda: layer_default
+            get_identifier = lambda: identifier
+
+            def get(key: K, default: Any = layer_default) -> T | Any:
+                return cache_layer(
+                    get_cache_key=lambda: key,
+                    get_cache_value=get_cache_value,
+                    set_cache_value=set_cache_value,
+                    on_cache_miss_source=on_cache_miss_source,
+                    get_default=get_layer_default if default is layer_default else lambda: default,
+                    get_identifier=get_identifier,
+                    inspect=inspect,
+                    locks=locks,
+                    ttl=ttl,
+                    negative_cache=negative_cache,
+                    metrics=metrics,
+                    tracer=tracer,
+                    record_cost=record_cost,
+                )
+
+        self.get: Callable[..., T | Any] = get
+
+
+class AsyncCacheLayer(Generic[K, T]):
+    """
+    Asynchronous CacheLayer
+
+    The local cache and the source are asynchronous, serialize, deserialize,
+    source_key and transform are synchronous. A CPU-bound transform can be wrapped
+    in a ProcessTransform to run in worker processes off the event loop.
+    """
+
+    def __init__(
+        self,
+        identifier: Any,
+        get_cache_value: Callable[[K, Any], Awaitable[C | Any]],
+        set_cache_value: Callable[[K, C], Awaitable[None]],
+        source: "AsyncCacheLayer | Callable[[Any, Any], Awaitable[S | Any]]",
+        source_key: Callable[[K], Any] | None = None,
+        transform: Callable[[S], T] | ProcessTransform[S, T] | None = None,
+        serialize: Callable[[T], C] | None = None,
+        deserialize: Callable[[C], T] | None = None,
+        codec: Codec[T, C] | None = None,
+        default: Any = KEY_NOT_FOUND,
+        inspect: Callable[[CacheLayerEvent], Awaitable[None]] | None = None,
+        single_flight: AsyncSingleFlight | None = None,
+        ttl: TTL | None = None,
+        negative_cache: NegativeCache | None = None,
+        metrics: Metrics | None = None,
+        tracer: Tracer | None = None,
+        record_cost: Callable[[K, float], None] | None = None,
+    ):
+        self.identifier = identifier
+        self.default = default
+
+        serialize, deserialize = _codec_functions(codec, serialize, deserialize)
+
+        if deserialize is not None:
+            get_serialized = get_cache_value
+
+            async def get_cache_value(key, default):
+                cached = await get_serialized(key, default)
+                return default if cached is default else deserialize(cached)
+
+        if serialize is not None:
+            set_serialized = set_cache_value
+
+            async def set_cache_value(key, value):
+                await set_serialized(key, serialize(value))
+
+        if isinstance(source, AsyncCacheLayer):
+            source = source.get
+
+        offloaded = isinstance(transform, ProcessTransform)
+
+        if metrics is not None and transform is not None:
+            if offloaded:
+                transform = metrics.async_timed_transform(identifier, transform)
+            else:
+                transform = metrics.timed_transform(identifier, transform)
+
+        if tracer is not None and transform is not None:
+            if offloaded:
+                transform = tracer.async_timed_transform(transform)
+            else:
+                transform = tracer.timed_transform(transform)
+
+        on_cache_miss_source = _async_compose_source(source, source_key, transform, awaitable_transform=offloaded)
+
+        if inspect is None and single_flight is None and ttl is None and negative_cache is None and metrics is None and tracer is None and record_cost is None:
+            async def get(key: K, default: Any = default) -> T | Any:
+                cached = await get_cache_value(key, CACHE_MISS)
+
+                if cached is not CACHE_MISS:
+                    return cached
+
+                value = await on_cache_miss_source(key, default)
+
+                if value is default:
+                    return default
+
+                await set_cache_value(key, value)
+                return value
+
+        else:
+            layer_default = default
+            get_layer_default = to_async(lambda: layer_default)
+            get_identifier = to_async(lambda: identifier)
+
+            def get(key: K, default: Any = layer_default) -> Awaitable[T | Any]:
+                return async_cache_layer(
+                    get_cache_key=to_async(lambda: key),
+                    get_cache_value=get_cache_value,
+                    set_cache_value=set_cache_value,
+                    on_cache_miss_source=on_cache_miss_source,
+                    get_default=get_layer_default if default is layer_default else to_async(lambda: default),
+                    get_identifier=get_identifier,
+                    inspect=inspect,
+                    single_flight=single_flight,
+                    ttl=ttl,
+                    negative_cache=negative_cache,
+                    metrics=metrics,
+                    tracer=tracer,
+                    record_cost=record_cost,
+                )
+
+        self.get: Callable[..., Awaitable[T | Any]] = get
@@ -0,0 +1,342 @@
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Sequence
+from typing import TypeVar
+from typing import TYPE_CHECKING
+
+import time
+from bisect import bisect_left
+from functools import wraps
+
+if TYPE_CHECKING:
+    from multilayer_cache.executors import BoundedExecutor
+    from multilayer_cache.stores.budget import MemoryBudget
+    from multilayer_cache.stores.compressed import CompressedStore
+
+
+T = TypeVar("T")
+S = TypeVar("S")
+
+
+# Upper bounds (seconds) of latency histogram buckets
+DEFAULT_BUCKETS = (
+    0.000_001, 0.000_005, 0.000_01, 0.000_05, 0.000_1, 0.000_5,
+    0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0,
+)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram, the last bucket counts everything above the largest bound
+    """
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+# Operations sampled independently, so each histogram gets 1 in sample_every of its own
+LOOKUP = 0
+SOURCE = 1
+TRANSFORM = 2
+
+
+class LayerMetrics:
+    """
+    Counters and latency histograms of one cache layer
+
+    Counters are exact, latencies are measured for 1 in sample_every lookups, source calls
+    and transforms, each counted on its own.
+    Updates are not synchronized, so under concurrent threads counts are approximate.
+    """
+
+    __slots__ = (
+        "hits", "misses", "negative_hits", "not_found", "source_calls", "errors",
+        "lookup", "source", "transform", "sample_every", "clock", "_ticks",
+    )
+
+    def __init__(self, sample_every: int, bounds: Sequence[float], clock: Callable[[], float]):
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.not_found = 0
+        self.source_calls = 0
+        self.errors = 0
+        self.lookup = Histogram(bounds)
+        self.source = Histogram(bounds)
+        self.transform = Histogram(bounds)
+        self.sample_every = sample_every
+        self.clock = clock
+        self._ticks = [0, 0, 0]
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses + self.negative_hits
+        return (self.hits + self.negative_hits) / lookups if lookups else 0.0
+
+    def sampled(self, operation: int) -> bool:
+        ticks = self._ticks
+        ticks[operation] += 1
+        return ticks[operation] % self.sample_every == 0
+
+    def timed_lookup(self, get_cache_value: Callable[[Any, Any], Any], key: Any, default: Any) -> Any:
+        if not self.sampled(LOOKUP):
+            return get_cache_value(key, default)
+
+        started = self.clock()
+        value = get_cache_value(key, default)
+        self.lookup.observe(self.clock() - started)
+        return value
+
+    async def async_timed_lookup(self, get_cache_value: Callable[[Any, Any], Awaitable[Any]], key: Any, default: Any) -> Any:
+        if not self.sampled(LOOKUP):
+            return await get_cache_value(key, default)
+
+        started = self.clock()
+        value = await get_cache_value(key, default)
+        self.lookup.observe(self.clock() - started)
+        return value
+
+    def timed_source(self, on_cache_miss_source: Callable[[Any, Any], Any], key: Any, default: Any) -> Any:
+        self.source_calls += 1
+        sampled = self.sampled(SOURCE)
+
+        if sampled:
+            started = self.clock()
+
+        try:
+            value = on_cache_miss_source(key, default)
+        except BaseException:
+            self.errors += 1
+            raise
+
+        if sampled:
+            self.source.observe(self.clock() - started)
+
+        if value is default:
+            self.not_found += 1
+
+        return value
+
+    async def async_timed_source(self, on_cache_miss_source: Callable[[Any, Any], Awaitable[Any]], key: Any, default: Any) -> Any:
+        self.source_calls += 1
+        sampled = self.sampled(SOURCE)
+
+        if sampled:
+            started = self.clock()
+
+        try:
+            value = await on_cache_miss_source(key, default)
+        except BaseException:
+            self.errors += 1
+            raise
+
+        if sampled:
+            self.source.observe(self.clock() - started)
+
+        if value is default:
+            self.not_found += 1
+
+        return value
+
+
+class Metrics:
+    """
+    Metrics sink of cache layers, keyed by layer identifier
+
+    Passed as metrics to cache layers (one instance may serve all layers of a tree),
+    exported in the Prometheus text format with render().
+    Executors, memory budgets and compressed stores created with metrics=... are reported by name as well.
+    """
+
+    def __init__(
+        self,
+        sample_every: int = 1,
+        bounds: Sequence[float] = DEFAULT_BUCKETS,
+        namespace: str = "multilayer_cache",
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        if sample_every < 1:
+            raise ValueError("sample_every must be positive")
+
+        self.sample_every = sample_every
+        self.bounds = tuple(bounds)
+        self.namespace = namespace
+        self.clock = clock
+        self.layers: dict[Any, LayerMetrics] = {}
+        self.executors: dict[str, "BoundedExecutor"] = {}
+        self.budgets: dict[str, "MemoryBudget"] = {}
+        self.compressors: dict[str, "CompressedStore"] = {}
+
+    def layer(self, identifier: Any) -> LayerMetrics:
+        layer = self.layers.get(identifier)
+
+        if layer is None:
+            layer = self.layers.setdefault(identifier, LayerMetrics(self.sample_every, self.bounds, self.clock))
+
+        return layer
+
+    def timed_transform(self, identifier: Any, transform: Callable[[S], T]) -> Callable[[S], T]:
+        """
+        Wraps the transformation of source values of a layer to measure its latency
+        """
+
+        layer = self.layer(identifier)
+        histogram = layer.transform
+        clock = self.clock
+
+        @wraps(transform)
+        def timed(value: S) -> T:
+            if not layer.sampled(TRANSFORM):
+                return transform(value)
+
+            started = clock()
+            result = transform(value)
+            histogram.observe(clock() - started)
+            return result
+
+        return timed
+
+    def async_timed_transform(self, identifier: Any, transform: Callable[[S], Awaitable[T]]) -> Callable[[S], Awaitable[T]]:
+        """
+        timed_transform of an awaitable transformation, such as ProcessTransform
+        """
+
+        layer = self.layer(identifier)
+        histogram = layer.transform
+        clock = self.clock
+
+        async def timed(value: S) -> T:
+            if not layer.sampled(TRANSFORM):
+                return await transform(value)
+
+            started = clock()
+            result = await transform(value)
+            histogram.observe(clock() - started)
+            return result
+
+        return timed
+
+    def render(self) -> str:
+        ns = self.namespace
+        lines = []
+
+        def counter(name: str, help: str, samples: list[tuple[str, int]]):
+            lines.append(f"# HELP {ns}_{name} {help}")
+            lines.append(f"# TYPE {ns}_{name} counter")
+            lines.extend(f"{ns}_{name}{{{labels}}} {value}" for labels, value in samples)
+
+        def gauge(name: str, help: str, samples: list[tuple[str, float]]):
+            lines.append(f"# HELP {ns}_{name} {help}")
+            lines.append(f"# TYPE {ns}_{name} gauge")
+            lines.extend(f"{ns}_{name}{{{labels}}} {value}" for labels, value in samples)
+
+        def histogram(name: str, help: str, attribute: str):
+            lines.append(f"# HELP {ns}_{name} {help}")
+            lines.append(f"# TYPE {ns}_{name} histogram")
+
+            for identifier, layer in self.layers.items():
+                h: Histogram = getattr(layer, attribute)
+                label = f'layer="{_escape(identifier)}"'
+                cumulative = 0
+
+                for bound, count in zip(h.bounds, h.counts):
+                    cumulative += count
+                    lines.append(f'{ns}_{name}_bucket{{{label},le="{bound!r}"}} {cumulative}')
+
+                lines.append(f'{ns}_{name}_bucket{{{label},le="+Inf"}} {h.count}')
+                lines.append(f"{ns}_{name}_sum{{{label}}} {h.sum!r}")
+                lines.append(f"{ns}_{name}_count{{{label}}} {h.count}")
+
+        lookups = []
+        for identifier, layer in self.layers.items():
+            label = _escape(identifier)
+            lookups.append((f'layer="{label}",result="hit"', layer.hits))
+            lookups.append((f'layer="{label}",result="miss"', layer.misses))
+            lookups.append((f'layer="{label}",result="negative_hit"', layer.negative_hits))
+
+        counter("lookups_total", "Lookups of the local cache by result.", lookups)
+
+        for name, attribute, help in (
+            ("source_calls_total", "source_calls", "Calls of the dependant source."),
+            ("not_found_total", "not_found", "Source calls that did not find the key."),
+            ("errors_total", "errors", "Source calls that raised."),
+        ):
+            counter(name, help, [
+                (f'layer="{_escape(identifier)}"', getattr(layer, attribute))
+                for identifier, layer in self.layers.items()
+            ])
+
+        histogram("lookup_seconds", "Latency of local cache lookups.", "lookup")
+        histogram("source_seconds", "Latency of source calls, inner layers included.", "source")
+        histogram("transform_seconds", "Latency of transformations of source values.", "transform")
+
+        if self.executors:
+            executors = [(f'executor="{_escape(name)}"', executor.stats()) for name, executor in self.executors.items()]
+
+            for name, attribute, help in (
+                ("executor_active", "active", "Calls running in a worker."),
+                ("executor_queued", "queued", "Admitted calls waiting for a worker."),
+                ("executor_waiting", "waiting", "Callers waiting to be admitted."),
+                ("executor_saturation", "saturation", "Admitted calls over workers plus queue."),
+            ):
+                gauge(name, help, [(label, getattr(stats, attribute)) for label, stats in executors])
+
+            for name, attribute, help in (
+                ("executor_submitted_total", "submitted", "Calls submitted to workers."),
+                ("executor_rejected_total", "rejected", "Calls rejected by a full executor."),
+                ("executor_saturated_total", "saturated", "Calls that found the executor full."),
+            ):
+                counter(name, help, [(label, getattr(stats, attribute)) for label, stats in executors])
+
+        if self.budgets:
+            gauge("budget_max_bytes", "Bytes a memory budget allows.", [
+                (f'budget="{_escape(name)}"', budget.max_bytes) for name, budget in self.budgets.items()
+            ])
+            gauge("store_bytes", "Bytes held by a store of a memory budget.", [
+                (f'budget="{_escape(name)}",store="{_escape(store)}"', used)
+                for name, budget in self.budgets.items()
+                for store, used in budget.usage().items()
+            ])
+
+        if self.compressors:
+            compressors = [(f'store="{_escape(name)}"', store.compression) for name, store in self.compressors.items()]
+
+            gauge("compression_ratio", "Bytes before over bytes after compression.", [
+                (label, stats.ratio) for label, stats in compressors
+            ])
+
+            for name, attribute, help in (
+                ("compressed_total", "compressed", "Values stored compressed."),
+                ("incompressible_total", "incompressible", "Values that did not shrink and were stored as they are."),
+                ("decompressed_total", "decompressed", "Values decompressed on hits."),
+                ("compression_hot_hits_total", "hot_hits", "Hits on values kept decompressed."),
+                ("compression_input_bytes_total", "input_bytes", "Bytes of compressed values before compression."),
+                ("compression_output_bytes_total", "output_bytes", "Bytes of compressed values after compression."),
+            ):
+                counter(name, help, [(label, getattr(stats, attribute)) for label, stats in compressors])
+
+            counter("compression_cpu_seconds_total", "CPU time spent compressing and decompressing.", [
+                sample
+                for label, stats in compressors
+                for sample in (
+                    (f'{label},side="compress"', stats.compress_seconds),
+                    (f'{label},side="decompress"', stats.decompress_seconds),
+                )
+            ])
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(identifier: Any) -> str:
+    return str(identifier).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
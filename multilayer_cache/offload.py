@@ -0,0 +1,200 @@
+from typing import Any
+from typing import Callable
+from typing import Generic
+from typing import TypeVar
+
+import asyncio
+from concurrent.futures import Executor
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+
+# Represents value type the source returns
+S = TypeVar("S")
+# Represents value type of the transformation
+T = TypeVar("T")
+
+
+class _Shared:
+    """
+    A str or bytes value passed to a worker through a shared memory block
+    """
+
+    __slots__ = ("name", "size", "text")
+
+    def __init__(self, name: str, size: int, text: bool):
+        self.name = name
+        self.size = size
+        self.text = text
+
+    def __getstate__(self):
+        return self.name, self.size, self.text
+
+    def __setstate__(self, state):
+        self.name, self.size, self.text = state
+
+    def load(self) -> str | bytes:
+        shm = SharedMemory(self.name)
+
+        try:
+            data = bytes(shm.buf[:self.size])
+        finally:
+            shm.close()
+
+        return data.decode() if self.text else data
+
+
+def _run_batch(transform: Callable[[Any], Any], values: list[Any]) -> list[tuple[bool, Any]]:
+    # Runs in a worker process, a failed value does not fail the others
+    results = []
+
+    for value in values:
+        try:
+            if isinstance(value, _Shared):
+                value = value.load()
+            results.append((True, transform(value)))
+        except Exception as e:
+            results.append((False, e))
+
+    return results
+
+
+class ProcessTransform(Generic[S, T]):
+    """
+    Runs a CPU-bound transformation of source values in worker processes
+
+    Passed as the transform of AsyncCacheLayer (or awaited from an on_cache_miss_source)
+    to keep parsing off the event loop. Calls made within one loop tick (or within window seconds)
+    are micro-batched: they are split into one batch per worker, up to max_batch values each,
+    so a burst of misses costs a round trip per worker and uses every core.
+
+    str and bytes values of at least shared_memory_threshold bytes are written once into
+    shared memory instead of being pickled through the pool's pipe. Other values and results are pickled,
+    so the transform, its inputs and outputs must be picklable (module level functions,
+    methods of picklable objects). A given executor should be created after the first
+    ProcessTransform, or after multiprocessing.resource_tracker.ensure_running().
+    """
+
+    def __init__(
+        self,
+        transform: Callable[[S], T],
+        max_workers: int | None = None,
+        max_batch: int = 64,
+        window: float = 0.0,
+        shared_memory_threshold: int = 1 << 20,
+        executor: Executor | None = None,
+    ):
+        if max_batch < 1:
+            raise ValueError("max_batch must be positive")
+
+        self.transform = transform
+        self.max_batch = max_batch
+        self.window = window
+        self.shared_memory_threshold = shared_memory_threshold
+        self._owned = executor is None
+
+        if executor is None:
+            # Workers then share the tracker of the shared memory blocks this process creates and unlinks,
+            # instead of starting their own that would report the blocks they attached as leaked
+            resource_tracker.ensure_running()
+            executor = ProcessPoolExecutor(max_workers)
+
+        self._executor = executor
+        self._workers = getattr(self._executor, "_max_workers", None) or 1
+        self._pending: list[tuple[S, asyncio.Future]] = []
+        self._scheduled: asyncio.Handle | None = None
+        # Batches in flight, referenced so that they are not garbage collected while running
+        self._tasks: set[asyncio.Task] = set()
+        # Round trips and values sent to workers, values passed through shared memory
+        self.batches = 0
+        self.values = 0
+        self.shared = 0
+
+    def __call__(self, value: S) -> "asyncio.Future[T]":
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((value, future))
+
+        if len(self._pending) >= self.max_batch * self._workers:
+            self._dispatch()
+        elif self._scheduled is None:
+            self._scheduled = (
+                loop.call_later(self.window, self._dispatch) if self.window > 0
+                else loop.call_soon(self._dispatch)
+            )
+
+        return future
+
+    def _dispatch(self):
+        if self._scheduled is not None:
+            self._scheduled.cancel()
+            self._scheduled = None
+
+        pending = [(value, future) for value, future in self._pending if not future.cancelled()]
+        self._pending = []
+
+        if not pending:
+            return
+
+        # As many batches as workers, unless they would exceed max_batch
+        size = min(self.max_batch, -(-len(pending) // self._workers))
+
+        for start in range(0, len(pending), size):
+            task = asyncio.ensure_future(self._run(pending[start:start + size]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[S, asyncio.Future]]):
+        blocks: list[SharedMemory] = []
+
+        try:
+            values = [self._share(value, blocks) for value, _ in batch]
+            self.batches += 1
+            self.values += len(values)
+            results = await asyncio.wrap_future(self._executor.submit(_run_batch, self.transform, values))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        except BaseException:
+            for _, future in batch:
+                future.cancel()
+            raise
+        finally:
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+
+        for (_, future), (ok, result) in zip(batch, results):
+            if future.done():
+                continue
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(result)
+
+    def _share(self, value: Any, blocks: list[SharedMemory]) -> Any:
+        text = isinstance(value, str)
+
+        if not (text or isinstance(value, (bytes, bytearray, memoryview))) or len(value) < self.shared_memory_threshold:
+            return value
+
+        data = value.encode() if text else value
+        size = len(data) if not isinstance(data, memoryview) else data.nbytes
+        shm = SharedMemory(create=True, size=max(size, 1))
+        blocks.append(shm)
+        shm.buf[:size] = data
+        self.shared += 1
+        return _Shared(shm.name, size, text)
+
+    def shutdown(self, wait: bool = True):
+        if self._owned:
+            self._executor.shutdown(wait=wait)
+
+    def __enter__(self) -> "ProcessTransform[S, T]":
+        return self
+
+    def __exit__(self, *_):
+        self.shutdown()
@@ -0,0 +1,179 @@
+# Offline replay of access traces
+#
+#   python -m multilayer_cache.replay trace.bin \
+#       --config "parsed_cached_files=lru:1000,cached_files=w-tinylfu:10000:60" \
+#       --config "parsed_cached_files=lfu:1000,cached_files=lru:10000"
+#
+# Each --config gives every simulated layer a policy, a capacity and optionally a ttl in seconds.
+# Requests made by the application are replayed through the recorded tree: a simulated miss
+# looks the key up in the inner layer (with the inner key observed in the trace) and a miss
+# in the innermost layer is a source fetch. Layers without a config are not cached.
+# Traces recorded without a tree have no links, each layer is then replayed on its own stream.
+
+from multilayer_cache.access_trace import NO_LAYER
+from multilayer_cache.access_trace import TraceHeader
+from multilayer_cache.access_trace import read_trace
+from multilayer_cache.stores import Store
+from multilayer_cache.stores import LRUStore
+from multilayer_cache.stores import LFUStore
+from multilayer_cache.stores import WTinyLFUStore
+
+from typing import Callable
+
+import sys
+import argparse
+from dataclasses import field
+from dataclasses import dataclass
+
+
+POLICIES: dict[str, Callable[[int], Store]] = {
+    "lru": LRUStore,
+    "lfu": LFUStore,
+    "w-tinylfu": WTinyLFUStore,
+}
+
+MISSING = object()
+
+
+@dataclass(slots=True, frozen=True)
+class LayerConfig:
+    capacity: int
+    policy: str = "lru"
+    ttl: float | None = None
+
+
+@dataclass(slots=True)
+class LayerResult:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@dataclass(slots=True)
+class ReplayResult:
+    config: dict[str, LayerConfig]
+    layers: dict[str, LayerResult] = field(default_factory=dict)
+    requests: int = 0
+    source_fetches: int = 0
+
+
+class _Simulation:
+    def __init__(
+        self,
+        config: dict[str, LayerConfig],
+        header: TraceHeader,
+        keys: dict[tuple[int, int], int],
+    ):
+        names = {name: layer for layer, name in header.layers.items()}
+        unknown = set(config) - set(names)
+
+        if unknown:
+            raise ValueError(f"layers not in the trace: {', '.join(sorted(unknown))}")
+
+        for layer_config in config.values():
+            if layer_config.policy not in POLICIES:
+                raise ValueError(f"unknown policy {layer_config.policy!r}, expected one of {', '.join(POLICIES)}")
+
+        self.tree = header.tree
+        self.keys = keys
+        self.stores = {names[name]: POLICIES[c.policy](c.capacity) for name, c in config.items()}
+        self.ttls = {names[name]: c.ttl for name, c in config.items()}
+        self.result = ReplayResult(config, {name: LayerResult() for name in header.layers.values()})
+        self.counters = {layer: self.result.layers[name] for layer, name in header.layers.items()}
+
+    def lookup(self, layer: int, key_hash: int, now: float):
+        store = self.stores.get(layer)
+        counter = self.counters[layer]
+
+        if store is not None:
+            # Entries are stored as their expiry time
+            expires_at = store.get(key_hash, MISSING)
+
+            if expires_at is not MISSING and (expires_at is None or now < expires_at):
+                counter.hits += 1
+                return
+
+        counter.misses += 1
+        inner = self.tree.get(layer)
+        inner_key_hash = self.keys.get((layer, key_hash)) if inner is not None else None
+
+        if inner_key_hash is None:
+            self.result.source_fetches += 1
+        else:
+            self.lookup(inner, inner_key_hash, now)
+
+        if store is not None:
+            ttl = self.ttls[layer]
+            store.set(key_hash, None if ttl is None else now + ttl)
+
+
+def replay(path: str, configs: list[dict[str, LayerConfig]]) -> list[ReplayResult]:
+    """
+    Replays a trace under every config
+
+    Streams the trace twice: once to learn which inner key each outer key maps to,
+    then to run the application's requests through one simulation per config.
+    """
+
+    header = TraceHeader({}, {})
+    # (outer layer, outer key hash) -> inner key hash
+    keys: dict[tuple[int, int], int] = {}
+
+    for event in read_trace(path, header):
+        if event.caller_layer != NO_LAYER:
+            keys[event.caller_layer, event.caller_key_hash] = event.key_hash
+
+    simulations = [_Simulation(config, header, keys) for config in configs]
+
+    for event in read_trace(path):
+        if event.caller_layer != NO_LAYER:
+            continue
+
+        for simulation in simulations:
+            simulation.result.requests += 1
+            simulation.lookup(event.layer, event.key_hash, event.timestamp)
+
+    return [simulation.result for simulation in simulations]
+
+
+def parse_config(text: str) -> dict[str, LayerConfig]:
+    # layer=policy:capacity[:ttl],...
+    config = {}
+
+    for item in text.split(","):
+        name, _, spec = item.rpartition("=")
+        policy, capacity, *ttl = spec.split(":")
+        config[name.strip()] = LayerConfig(int(capacity), policy, float(ttl[0]) if ttl else None)
+
+    return config
+
+
+def format_result(result: ReplayResult) -> str:
+    config = ", ".join(
+        f"{name}={c.policy}:{c.capacity}" + (f":{c.ttl:g}" if c.ttl is not None else "")
+        for name, c in result.config.items()
+    )
+    lines = [f"{config}: {result.requests} requests, {result.source_fetches} source fetches"]
+
+    for name, layer in result.layers.items():
+        lines.append(f"  {name:<24} hits={layer.hits:<10} misses={layer.misses:<10} hit ratio={layer.hit_ratio:.3f}")
+
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Replay an access trace under cache configurations")
+    parser.add_argument("trace")
+    parser.add_argument("--config", action="append", required=True, help="layer=policy:capacity[:ttl],...")
+    args = parser.parse_args(argv)
+
+    for result in replay(args.trace, [parse_config(config) for config in args.config]):
+        print(format_result(result))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
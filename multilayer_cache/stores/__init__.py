@@ -0,0 +1,22 @@
+from multilayer_cache.stores.base import Store
+from multilayer_cache.stores.base import StoreStats
+from multilayer_cache.stores.memory import LRUStore
+from multilayer_cache.stores.memory import LFUStore
+from multilayer_cache.stores.memory import CountMinSketch
+from multilayer_cache.stores.memory import WTinyLFUStore
+from multilayer_cache.stores.memory import GDSFStore
+from multilayer_cache.stores.sqlite import SQLiteStore
+from multilayer_cache.stores.blobs import BlobStore
+from multilayer_cache.stores.shared import SharedMemoryStore
+from multilayer_cache.stores.resp import RESPStore
+from multilayer_cache.stores.resp import RESPPool
+from multilayer_cache.stores.resp import RESPError
+from multilayer_cache.stores.resp_server import RESPServer
+from multilayer_cache.stores.sharded import HashRing
+from multilayer_cache.stores.sharded import ShardedStore
+from multilayer_cache.stores.sharded import AsyncShardedStore
+from multilayer_cache.stores.budget import weigh
+from multilayer_cache.stores.budget import BudgetedStore
+from multilayer_cache.stores.budget import MemoryBudget
+from multilayer_cache.stores.compressed import CompressedStore
+from multilayer_cache.stores.compressed import CompressionStats
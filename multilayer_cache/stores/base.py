@@ -0,0 +1,61 @@
+from typing import Any
+from typing import Hashable
+from typing import Iterable
+from typing import Mapping
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class StoreStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class Store:
+    """
+    Local cache store base
+
+    Stores follow the get/set contract of cache layers and plug straight into them:
+
+        get_cache_value=store.get,
+        set_cache_value=store.set,
+        get_cache_values=store.get_many,
+        set_cache_values=store.set_many,
+    """
+
+    stats: StoreStats
+
+    def get(self, key: Hashable, default: Any) -> Any:
+        raise NotImplementedError
+
+    def set(self, key: Hashable, value: Any) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: Hashable) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __contains__(self, key: Hashable) -> bool:
+        raise NotImplementedError
+
+    def get_many(self, keys: Iterable[Hashable], default: Any) -> list[Any]:
+        get = self.get
+        return [get(key, default) for key in keys]
+
+    def set_many(self, items: Mapping[Hashable, Any]) -> None:
+        set = self.set
+        for key, value in items.items():
+            set(key, value)
+
+
+def check_capacity(capacity: int):
+    if capacity < 1:
+        raise ValueError("capacity must be positive")
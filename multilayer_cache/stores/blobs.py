@@ -0,0 +1,284 @@
+from multilayer_cache.stores.base import Store
+from multilayer_cache.stores.base import StoreStats
+
+from typing import Any
+from typing import Callable
+from typing import Hashable
+
+import os
+import mmap
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+class BlobStore(Store):
+    """
+    Directory of content-addressed blobs for raw file layers, read through mmap
+
+    Values (bytes-like or str, stored UTF-8 encoded) are written once per distinct content
+    to objects/<hash>, through a temporary file renamed into place, so a reader never sees
+    a partial blob and keys holding identical blobs share one file. Keys map to hashes
+    in an append-only index log, compacted when it grows to twice the live entries.
+
+    Hits return read-only memoryviews of the mapped files (decode=... may convert them,
+    e.g. codecs.decode for str), so a hit does not copy the blob into the heap.
+    A view stays valid after its key is overwritten, deleted or evicted.
+
+    With max_bytes, the least recently used keys are evicted while the blobs take more than
+    max_bytes. Recency is kept in memory and starts in index order when the directory is opened.
+    """
+
+    INDEX = "index.log"
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int | None = None,
+        encode_key: Callable[[Hashable], str] = repr,
+        decode: Callable[[memoryview], Any] | None = None,
+        max_open: int = 256,
+        fsync: bool = False,
+    ):
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError("max_bytes must be positive")
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.encode_key = encode_key
+        self.decode = decode
+        self.max_open = max_open
+        self.fsync = fsync
+        self.stats = StoreStats()
+
+        self._objects = os.path.join(directory, "objects")
+        os.makedirs(self._objects, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # Encoded key -> hash, in least recently used first order
+        self._index: OrderedDict[str, str] = OrderedDict()
+        # Hash -> (keys referring to it, size)
+        self._blobs: dict[str, list[int]] = {}
+        self._bytes = 0
+        # Hash -> mapping, bounded by max_open
+        self._maps: OrderedDict[str, mmap.mmap | None] = OrderedDict()
+        self._log_records = 0
+
+        self._load()
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self._objects, digest)
+
+    def _load(self):
+        path = os.path.join(self.directory, self.INDEX)
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8", newline="\n") as log:
+                for line in log:
+                    if not line.endswith("\n"):
+                        # Torn last write
+                        break
+
+                    self._log_records += 1
+                    encoded_key, _, digest = line[:-1].rpartition("\0")
+
+                    if digest:
+                        self._index[encoded_key] = digest
+                        self._index.move_to_end(encoded_key)
+                    else:
+                        self._index.pop(encoded_key, None)
+
+        for encoded_key, digest in list(self._index.items()):
+            blob = self._blobs.get(digest)
+
+            if blob is None:
+                try:
+                    blob = self._blobs[digest] = [0, os.path.getsize(self._object_path(digest))]
+                except FileNotFoundError:
+                    del self._index[encoded_key]
+                    continue
+
+                self._bytes += blob[1]
+
+            blob[0] += 1
+
+        for name in os.listdir(self._objects):
+            # Blobs of keys lost with a torn index write and temporary files of interrupted writes
+            if name not in self._blobs:
+                os.unlink(self._object_path(name))
+
+        self._compact()
+        self._log = open(path, "a", encoding="utf-8", newline="\n")
+
+    def _compact(self):
+        # Rewrites the log with live entries only, atomically
+        if self._log_records and self._log_records < 2 * len(self._index):
+            return
+
+        fd, temporary = tempfile.mkstemp(dir=self.directory, prefix=".index-")
+
+        with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as log:
+            log.writelines(f"{encoded_key}\0{digest}\n" for encoded_key, digest in self._index.items())
+
+        os.replace(temporary, os.path.join(self.directory, self.INDEX))
+        self._log_records = len(self._index)
+
+    def _append(self, encoded_key: str, digest: str):
+        self._log.write(f"{encoded_key}\0{digest}\n")
+        self._log.flush()
+        self._log_records += 1
+
+        if self._log_records > 1024 and self._log_records >= 2 * len(self._index):
+            self._log.close()
+            self._compact()
+            self._log = open(os.path.join(self.directory, self.INDEX), "a", encoding="utf-8", newline="\n")
+
+    def _map(self, digest: str) -> memoryview:
+        maps = self._maps
+
+        if digest in maps:
+            maps.move_to_end(digest)
+            mapped = maps[digest]
+        else:
+            with open(self._object_path(digest), "rb") as file:
+                # Empty files cannot be mapped
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(file.fileno()).st_size else None
+
+            maps[digest] = mapped
+
+            if len(maps) > self.max_open:
+                # Views handed out keep their mapping alive
+                maps.popitem(last=False)
+
+        return memoryview(mapped) if mapped is not None else memoryview(b"")
+
+    def get(self, key: Hashable, default: Any) -> Any:
+        encoded_key = self.encode_key(key)
+
+        with self._lock:
+            digest = self._index.get(encoded_key)
+
+            if digest is None:
+                self.stats.misses += 1
+                return default
+
+            self._index.move_to_end(encoded_key)
+            self.stats.hits += 1
+            view = self._map(digest)
+
+        return view if self.decode is None else self.decode(view)
+
+    def _write_temporary(self, data: Any) -> str:
+        fd, temporary = tempfile.mkstemp(dir=self._objects, prefix=".tmp-")
+
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+
+                if self.fsync:
+                    file.flush()
+                    os.fsync(file.fileno())
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+        return temporary
+
+    def set(self, key: Hashable, value: Any) -> None:
+        data = value.encode() if isinstance(value, str) else value
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        encoded_key = self.encode_key(key)
+        # New content is written outside the lock and renamed into place under it
+        temporary = self._write_temporary(data) if digest not in self._blobs else None
+
+        try:
+            with self._lock:
+                previous = self._index.get(encoded_key)
+
+                if previous == digest:
+                    self._index.move_to_end(encoded_key)
+                    return
+
+                blob = self._blobs.get(digest)
+
+                if blob is None:
+                    if temporary is None:
+                        # The blob was released since
+                        temporary = self._write_temporary(data)
+
+                    os.replace(temporary, self._object_path(digest))
+                    temporary = None
+                    blob = self._blobs[digest] = [0, memoryview(data).nbytes]
+                    self._bytes += blob[1]
+
+                blob[0] += 1
+                self._index[encoded_key] = digest
+                self._index.move_to_end(encoded_key)
+                self._append(encoded_key, digest)
+
+                if previous is not None:
+                    self._release(previous)
+
+                if self.max_bytes is not None:
+                    self._evict()
+        finally:
+            if temporary is not None:
+                os.unlink(temporary)
+
+    def _release(self, digest: str):
+        blob = self._blobs[digest]
+        blob[0] -= 1
+
+        if not blob[0]:
+            del self._blobs[digest]
+            self._maps.pop(digest, None)
+            self._bytes -= blob[1]
+
+            try:
+                os.unlink(self._object_path(digest))
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        index = self._index
+
+        while self._bytes > self.max_bytes and len(index) > 1:
+            encoded_key, digest = index.popitem(last=False)
+            self._append(encoded_key, "")
+            self._release(digest)
+            self.stats.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        encoded_key = self.encode_key(key)
+
+        with self._lock:
+            digest = self._index.pop(encoded_key, None)
+
+            if digest is not None:
+                self._append(encoded_key, "")
+                self._release(digest)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.encode_key(key) in self._index
+
+    def size(self) -> int:
+        """
+        Bytes taken by distinct blobs
+        """
+
+        return self._bytes
+
+    def close(self):
+        with self._lock:
+            self._log.close()
+            self._maps.clear()
+
+    def __enter__(self) -> "BlobStore":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
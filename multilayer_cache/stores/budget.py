@@ -0,0 +1,230 @@
+from multilayer_cache.stores.base import Store
+from multilayer_cache.stores.base import StoreStats
+
+from typing import Any
+from typing import Callable
+from typing import Hashable
+from typing import TYPE_CHECKING
+
+import sys
+import itertools
+import threading
+from collections import OrderedDict
+
+if TYPE_CHECKING:
+    from multilayer_cache.metrics import Metrics
+
+
+# Objects weigh walks at most by default
+MAX_WEIGHED_OBJECTS = 100_000
+
+
+def weigh(value: Any, max_objects: int = MAX_WEIGHED_OBJECTS) -> int:
+    """
+    Approximate bytes a value holds: sys.getsizeof of it and of everything it contains
+
+    Follows str, bytes, containers, mappings and objects' __dict__ or __slots__.
+    Objects reachable twice are counted once. The walk uses its own stack, so nesting depth
+    is not limited by recursion.
+
+    It takes time proportional to the objects walked, on every set of a store weighing with it.
+    At most max_objects are walked, the rest of a larger value is not counted. Where values have
+    a known shape, a cheaper weigher (len for bytes, for example) avoids the walk.
+    """
+
+    seen: set[int] = set()
+    stack = [value]
+    size = 0
+
+    while stack and len(seen) < max_objects:
+        value = stack.pop()
+
+        if id(value) in seen:
+            continue
+
+        seen.add(id(value))
+        size += sys.getsizeof(value)
+
+        if isinstance(value, (str, bytes, bytearray, int, float, bool, type(None))):
+            continue
+
+        if isinstance(value, memoryview):
+            size += value.nbytes
+            continue
+
+        if isinstance(value, dict):
+            stack.extend(value.keys())
+            stack.extend(value.values())
+            continue
+
+        if isinstance(value, (list, tuple, set, frozenset)):
+            stack.extend(value)
+            continue
+
+        attributes = getattr(value, "__dict__", None)
+
+        if attributes is not None:
+            stack.append(attributes)
+
+        for slot in getattr(type(value), "__slots__", ()):
+            if hasattr(value, slot):
+                stack.append(getattr(value, slot))
+
+    return size
+
+
+class BudgetedStore(Store):
+    """
+    LRU store bounded by bytes, the weight of values is measured by weigher
+
+    Bounded by its own max_bytes, by a MemoryBudget shared with other stores, or both.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_bytes: int | None = None,
+        budget: "MemoryBudget | None" = None,
+        weigher: Callable[[Any], int] = weigh,
+    ):
+        if max_bytes is None and budget is None:
+            raise ValueError("provide max_bytes, a budget or both")
+
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError("max_bytes must be positive")
+
+        self.name = name
+        self.max_bytes = max_bytes
+        self.budget = budget
+        self.weigher = weigher
+        self.bytes = 0
+        self.stats = StoreStats()
+        # key -> (value, weight, last access)
+        self._entries: OrderedDict[Hashable, tuple[Any, int, int]] = OrderedDict()
+        self._lock = budget.lock if budget is not None else threading.RLock()
+        self._tick = budget.tick if budget is not None else itertools.count().__next__
+
+        if budget is not None:
+            budget.add(self)
+
+    def get(self, key: Hashable, default: Any) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.stats.misses += 1
+                return default
+
+            value, weight, _ = entry
+            self._entries[key] = (value, weight, self._tick())
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        # Weighed outside the lock
+        weight = self.weigher(value)
+
+        with self._lock:
+            self._remove(key)
+
+            if (self.max_bytes is not None and weight > self.max_bytes) or (
+                self.budget is not None and weight > self.budget.max_bytes
+            ):
+                # Would evict everything and still not fit
+                return
+
+            self._entries[key] = (value, weight, self._tick())
+            self.bytes += weight
+
+            if self.max_bytes is not None:
+                while self.bytes > self.max_bytes:
+                    self.evict_coldest()
+
+            if self.budget is not None:
+                self.budget.charge(weight)
+
+    def _remove(self, key: Hashable) -> bool:
+        entry = self._entries.pop(key, None)
+
+        if entry is None:
+            return False
+
+        self.bytes -= entry[1]
+
+        if self.budget is not None:
+            self.budget.charge(-entry[1])
+
+        return True
+
+    def coldest(self) -> int | None:
+        """
+        Last access of the least recently used entry
+        """
+
+        for _, _, accessed in self._entries.values():
+            return accessed
+
+        return None
+
+    def evict_coldest(self):
+        with self._lock:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.stats.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+
+class MemoryBudget:
+    """
+    Bytes shared by the BudgetedStores of several layers
+
+    When the stores together exceed max_bytes, the least recently used entry across all of them
+    is evicted, so the layer holding the coldest bytes gives them up.
+    """
+
+    def __init__(self, max_bytes: int, name: str = "default", metrics: "Metrics | None" = None):
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be positive")
+
+        self.max_bytes = max_bytes
+        self.name = name
+        self.used = 0
+        self.stores: list[BudgetedStore] = []
+        self.lock = threading.RLock()
+        # Access order shared by the stores
+        self.tick = itertools.count().__next__
+
+        if metrics is not None:
+            metrics.budgets[name] = self
+
+    def add(self, store: BudgetedStore):
+        with self.lock:
+            self.stores.append(store)
+
+    def usage(self) -> dict[str, int]:
+        """
+        Bytes held by every store
+        """
+
+        return {store.name: store.bytes for store in self.stores}
+
+    def charge(self, weight: int):
+        with self.lock:
+            self.used += weight
+
+            while self.used > self.max_bytes:
+                coldest = min(
+                    (store for store in self.stores if len(store)),
+                    key=lambda store: store.coldest(),
+                )
+                coldest.evict_coldest()
@@ -0,0 +1,259 @@
+from multilayer_cache.stores.base import Store
+from multilayer_cache.stores.base import StoreStats
+from multilayer_cache.codecs import Codec
+from multilayer_cache.codecs import ZlibCodec
+
+from typing import Any
+from typing import Hashable
+from typing import Iterable
+from typing import TYPE_CHECKING
+from dataclasses import dataclass
+from collections import OrderedDict
+
+import time
+
+if TYPE_CHECKING:
+    from multilayer_cache.executors import BoundedExecutor
+    from multilayer_cache.metrics import Metrics
+
+
+_MISSING = object()
+
+
+class Compressed:
+    """
+    Compressed value as held by the wrapped store
+    """
+
+    __slots__ = ("data", "text")
+
+    def __init__(self, data: bytes, text: bool):
+        self.data = data
+        self.text = text
+
+
+@dataclass(slots=True)
+class CompressionStats:
+    # Values stored compressed, and values at or above the threshold that did not shrink
+    compressed: int = 0
+    incompressible: int = 0
+    # Bytes of compressed values before and after compression
+    input_bytes: int = 0
+    output_bytes: int = 0
+    # CPU time of the threads that compressed and decompressed
+    compress_seconds: float = 0.0
+    decompress_seconds: float = 0.0
+    decompressed: int = 0
+    hot_hits: int = 0
+
+    @property
+    def ratio(self) -> float:
+        return self.input_bytes / self.output_bytes if self.output_bytes else 1.0
+
+
+def _as_bytes(value: Any) -> tuple[Any, bool]:
+    if isinstance(value, str):
+        return value.encode(), True
+
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return value, False
+
+    return None, False
+
+
+def _encode(codec: Codec[bytes, bytes], data: bytes) -> tuple[bytes, float]:
+    started = time.thread_time()
+    compressed = codec.encode(data)
+    return compressed, time.thread_time() - started
+
+
+def _decode(codec: Codec[bytes, bytes], data: bytes) -> tuple[bytes, float]:
+    started = time.thread_time()
+    decompressed = codec.decode(data)
+    return decompressed, time.thread_time() - started
+
+
+class CompressedStore(Store):
+    """
+    Compresses the str and bytes values of a wrapped store
+
+    Values of at least threshold bytes (str as UTF-8) are stored compressed by codec
+    (ZlibCodec, LzmaCodec or Bz2Codec), smaller values and other types are stored as they are.
+    Hits return the type that was stored, bytearray and memoryview come back as bytes.
+
+    The hot values decompressed last are kept decompressed, so the hottest keys
+    skip decompression. async_get and async_set compress and decompress values of at least
+    offload_threshold bytes on the executor's threads (the stdlib codecs release the GIL).
+
+    Stats of compression are in store.compression, stores created with metrics=...
+    appear in Metrics.render() under their name.
+    """
+
+    def __init__(
+        self,
+        store: Store,
+        codec: Codec[bytes, bytes] | None = None,
+        threshold: int = 1024,
+        hot: int = 64,
+        executor: "BoundedExecutor | None" = None,
+        offload_threshold: int = 256 * 1024,
+        name: str = "compressed",
+        metrics: "Metrics | None" = None,
+    ):
+        if hot < 0:
+            raise ValueError("hot must not be negative")
+
+        self.store = store
+        self.codec = codec if codec is not None else ZlibCodec()
+        self.threshold = threshold
+        self.hot = hot
+        self.executor = executor
+        self.offload_threshold = offload_threshold
+        self.name = name
+        self.stats = StoreStats()
+        self.compression = CompressionStats()
+        self._hot: OrderedDict[Hashable, Any] = OrderedDict()
+        # Counts writes, so values decompressed across a write are not remembered
+        self._writes = 0
+
+        if metrics is not None:
+            metrics.compressors[name] = self
+
+    def _hot_get(self, key: Hashable) -> Any:
+        value = self._hot.get(key, _MISSING)
+
+        if value is not _MISSING:
+            self._hot.move_to_end(key)
+            self.stats.hits += 1
+            self.compression.hot_hits += 1
+
+        return value
+
+    def _remember(self, key: Hashable, value: Any):
+        if not self.hot:
+            return
+
+        self._hot[key] = value
+
+        if len(self._hot) > self.hot:
+            self._hot.popitem(last=False)
+
+    def _compressible(self, value: Any) -> tuple[Any, bool]:
+        data, text = _as_bytes(value)
+
+        if data is None or len(data) < self.threshold:
+            return None, False
+
+        return data, text
+
+    def _stored(self, value: Any, data: Any, text: bool, compressed: bytes, seconds: float) -> Any:
+        stats = self.compression
+        stats.compress_seconds += seconds
+
+        if len(compressed) >= len(data):
+            stats.incompressible += 1
+            return value
+
+        stats.compressed += 1
+        stats.input_bytes += len(data)
+        stats.output_bytes += len(compressed)
+        return Compressed(compressed, text)
+
+    def _value(self, stored: Compressed, decompressed: bytes, seconds: float) -> Any:
+        self.compression.decompressed += 1
+        self.compression.decompress_seconds += seconds
+        return decompressed.decode() if stored.text else decompressed
+
+    def _found(self, key: Hashable, stored: Any, default: Any) -> Any:
+        if stored is _MISSING:
+            self.stats.misses += 1
+            return default
+
+        self.stats.hits += 1
+
+        if not isinstance(stored, Compressed):
+            return stored
+
+        value = self._value(stored, *_decode(self.codec, stored.data))
+        self._remember(key, value)
+        return value
+
+    def get(self, key: Hashable, default: Any) -> Any:
+        value = self._hot_get(key)
+
+        if value is not _MISSING:
+            return value
+
+        return self._found(key, self.store.get(key, _MISSING), default)
+
+    def get_many(self, keys: Iterable[Hashable], default: Any) -> list[Any]:
+        keys = list(keys)
+        values = [self._hot_get(key) for key in keys]
+        cold = [key for key, value in zip(keys, values) if value is _MISSING]
+
+        if cold:
+            found = iter(self.store.get_many(cold, _MISSING))
+            values = [
+                self._found(key, next(found), default) if value is _MISSING else value
+                for key, value in zip(keys, values)
+            ]
+
+        return values
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._writes += 1
+        self._hot.pop(key, None)
+        data, text = self._compressible(value)
+
+        if data is not None:
+            value = self._stored(value, data, text, *_encode(self.codec, data))
+
+        self.store.set(key, value)
+
+    def delete(self, key: Hashable) -> None:
+        self._writes += 1
+        self._hot.pop(key, None)
+        self.store.delete(key)
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._hot or key in self.store
+
+    def _offloaded(self, data: Any) -> bool:
+        return self.executor is not None and len(data) >= self.offload_threshold
+
+    async def async_get(self, key: Hashable, default: Any) -> Any:
+        value = self._hot_get(key)
+
+        if value is not _MISSING:
+            return value
+
+        stored = self.store.get(key, _MISSING)
+
+        if not isinstance(stored, Compressed) or not self._offloaded(stored.data):
+            return self._found(key, stored, default)
+
+        self.stats.hits += 1
+        writes = self._writes
+        value = self._value(stored, *await self.executor.run(_decode, self.codec, stored.data))
+
+        if writes == self._writes:
+            self._remember(key, value)
+
+        return value
+
+    async def async_set(self, key: Hashable, value: Any) -> None:
+        data, text = self._compressible(value)
+
+        if data is None or not self._offloaded(data):
+            return self.set(key, value)
+
+        self._writes += 1
+        self._hot.pop(key, None)
+        stored = self._stored(value, data, text, *await self.executor.run(_encode, self.codec, data))
+        # Again, a lookup meanwhile may have remembered the previous value
+        self._writes += 1
+        self._hot.pop(key, None)
+        self.store.set(key, stored)
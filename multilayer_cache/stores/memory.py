@@ -0,0 +1,414 @@
+from multilayer_cache.stores.base import Store
+from multilayer_cache.stores.base import StoreStats
+from multilayer_cache.stores.base import check_capacity
+from multilayer_cache.stores.budget import weigh
+
+from typing import Any
+from typing import Callable
+from typing import Hashable
+from collections import OrderedDict
+
+import heapq
+
+
+class LRUStore(Store):
+    """
+    Bounded by entry count, evicts the least recently used entry
+    """
+
+    def __init__(self, capacity: int):
+        check_capacity(capacity)
+        self.capacity = capacity
+        self.stats = StoreStats()
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any) -> Any:
+        try:
+            self._entries.move_to_end(key)
+        except KeyError:
+            self.stats.misses += 1
+            return default
+
+        self.stats.hits += 1
+        return self._entries[key]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        entries = self._entries
+        entries[key] = value
+        entries.move_to_end(key)
+
+        if len(entries) > self.capacity:
+            entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+
+class LFUStore(Store):
+    """
+    Bounded by entry count, evicts the least frequently used entry
+    (the least recently used one among equally frequent)
+
+    All operations are O(1): keys are kept in per-frequency buckets
+    """
+
+    def __init__(self, capacity: int):
+        check_capacity(capacity)
+        self.capacity = capacity
+        self.stats = StoreStats()
+        self._values: dict[Hashable, Any] = {}
+        self._counts: dict[Hashable, int] = {}
+        # count -> keys in access order (dicts preserve insertion order)
+        self._buckets: dict[int, dict[Hashable, None]] = {}
+        self._min_count = 0
+
+    def _touch(self, key: Hashable):
+        count = self._counts[key]
+        bucket = self._buckets[count]
+        del bucket[key]
+
+        if not bucket:
+            del self._buckets[count]
+
+            if self._min_count == count:
+                self._min_count = count + 1
+
+        self._counts[key] = count + 1
+        self._buckets.setdefault(count + 1, {})[key] = None
+
+    def get(self, key: Hashable, default: Any) -> Any:
+        if key not in self._values:
+            self.stats.misses += 1
+            return default
+
+        self.stats.hits += 1
+        self._touch(key)
+        return self._values[key]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if key in self._values:
+            self._values[key] = value
+            self._touch(key)
+            return
+
+        if len(self._values) >= self.capacity:
+            bucket = self._buckets[self._min_count]
+            victim = next(iter(bucket))
+            self._remove(victim)
+            self.stats.evictions += 1
+
+        self._values[key] = value
+        self._counts[key] = 1
+        self._buckets.setdefault(1, {})[key] = None
+        self._min_count = 1
+
+    def _remove(self, key: Hashable):
+        count = self._counts.pop(key)
+        del self._values[key]
+        bucket = self._buckets[count]
+        del bucket[key]
+
+        if not bucket:
+            del self._buckets[count]
+
+    def delete(self, key: Hashable) -> None:
+        if key in self._values:
+            self._remove(key)
+
+            if self._buckets:
+                self._min_count = min(self._buckets)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._values
+
+
+class CountMinSketch:
+    """
+    Approximate frequency counter with 4-bit counters
+
+    Counters are halved every sample_size increments, so old popularity fades away
+    """
+
+    _SEEDS = (0x97CB3127, 0xB492B66F, 0x9AE16A3B, 0xCBF29CE4)
+    _MULTIPLIER = 0x9E3779B97F4A7C15
+    _MASK64 = 0xFFFF_FFFF_FFFF_FFFF
+
+    def __init__(self, width: int, sample_size: int | None = None):
+        self.width = 1 << max(width - 1, 1).bit_length()
+        self.sample_size = sample_size or 10 * self.width
+        self._mask = self.width - 1
+        self._table = bytearray(self.width * len(self._SEEDS))
+        self._additions = 0
+
+    def _indexes(self, key: Hashable) -> list[int]:
+        h = hash(key)
+        width = self.width
+        mask = self._mask
+        indexes = []
+
+        for row, seed in enumerate(self._SEEDS):
+            x = ((h ^ seed) * self._MULTIPLIER) & self._MASK64
+            indexes.append(row * width + ((x ^ (x >> 29)) & mask))
+
+        return indexes
+
+    def increment(self, key: Hashable):
+        table = self._table
+        added = False
+
+        for index in self._indexes(key):
+            if table[index] < 15:
+                table[index] += 1
+                added = True
+
+        if added:
+            self._additions += 1
+
+            if self._additions >= self.sample_size:
+                self._reset()
+
+    def estimate(self, key: Hashable) -> int:
+        table = self._table
+        return min(table[index] for index in self._indexes(key))
+
+    def _reset(self):
+        self._table = bytearray(value >> 1 for value in self._table)
+        self._additions //= 2
+
+
+class WTinyLFUStore(Store):
+    """
+    Bounded by entry count, W-TinyLFU admission and eviction
+
+    New entries land in a small LRU window. Entries leaving the window compete with the
+    eviction victim of the main segmented LRU (probation and protected segments), and the one
+    estimated by the frequency sketch to be more popular stays.
+
+    Frequencies are recorded on lookups.
+    """
+
+    def __init__(self, capacity: int, window_ratio: float = 0.01, protected_ratio: float = 0.8):
+        check_capacity(capacity)
+        self.capacity = capacity
+        self.stats = StoreStats()
+
+        self.window_capacity = max(1, int(capacity * window_ratio))
+        self.main_capacity = capacity - self.window_capacity
+        self.protected_capacity = int(self.main_capacity * protected_ratio)
+
+        self.sketch = CountMinSketch(capacity)
+
+        self._window: OrderedDict[Hashable, Any] = OrderedDict()
+        self._probation: OrderedDict[Hashable, Any] = OrderedDict()
+        self._protected: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any) -> Any:
+        self.sketch.increment(key)
+
+        if key in self._window:
+            self._window.move_to_end(key)
+            value = self._window[key]
+
+        elif key in self._protected:
+            self._protected.move_to_end(key)
+            value = self._protected[key]
+
+        elif key in self._probation:
+            value = self._probation.pop(key)
+            self._promote(key, value)
+
+        else:
+            self.stats.misses += 1
+            return default
+
+        self.stats.hits += 1
+        return value
+
+    def _promote(self, key: Hashable, value: Any):
+        self._protected[key] = value
+
+        if len(self._protected) > self.protected_capacity:
+            demoted, demoted_value = self._protected.popitem(last=False)
+            self._probation[demoted] = demoted_value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        for segment in (self._window, self._protected, self._probation):
+            if key in segment:
+                segment[key] = value
+                return
+
+        self._window[key] = value
+
+        if len(self._window) > self.window_capacity:
+            self._admit(*self._window.popitem(last=False))
+
+    def _admit(self, candidate: Hashable, value: Any):
+        if len(self._probation) + len(self._protected) < self.main_capacity:
+            self._probation[candidate] = value
+            return
+
+        self.stats.evictions += 1
+
+        segment = self._probation or self._protected
+
+        if not segment:
+            # No main segment to compete for
+            return
+
+        victim = next(iter(segment))
+
+        if self.sketch.estimate(candidate) > self.sketch.estimate(victim):
+            del segment[victim]
+            self._probation[candidate] = value
+
+    def delete(self, key: Hashable) -> None:
+        for segment in (self._window, self._protected, self._probation):
+            segment.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._window) + len(self._probation) + len(self._protected)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._window or key in self._probation or key in self._protected
+
+
+# Costs kept for keys that are not stored yet
+MAX_RECORDED_COSTS = 1024
+
+
+class GDSFStore(Store):
+    """
+    Store bounded by bytes, evicts by GreedyDual-Size-Frequency
+
+    An entry's priority is L + frequency * cost / weight, the entry of lowest priority is evicted
+    and L rises to its priority, so entries that are not used age out. Cheap to recompute,
+    large and rarely used entries go first, expensive and small ones stay.
+
+    Costs are the seconds the source took to produce a value, reported through record_cost,
+    which a layer calls before storing when passed as its record_cost:
+
+        store = GDSFStore(max_bytes=64 * 1024 * 1024)
+        layer = CacheLayer(..., get_cache_value=store.get, set_cache_value=store.set, record_cost=store.record_cost)
+
+    Values stored without a recorded cost keep their previous cost or get default_cost. The weight
+    of values is measured by weigher, with weigher=lambda value: 1 max_bytes bounds the number of entries.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        weigher: Callable[[Any], int] = weigh,
+        default_cost: float = 1.0,
+    ):
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be positive")
+
+        self.max_bytes = max_bytes
+        self.weigher = weigher
+        self.default_cost = default_cost
+        self.bytes = 0
+        self.stats = StoreStats()
+        # Inflation, the priority of the last evicted entry
+        self._age = 0.0
+        # key -> [value, weight, cost, frequency, sequence of its current heap item]
+        self._entries: dict[Hashable, list] = {}
+        # (priority, sequence, key), stale unless the entry of key holds the same sequence
+        self._heap: list[tuple[float, int, Hashable]] = []
+        self._sequence = 0
+        # Costs recorded for keys about to be stored, the oldest are dropped beyond MAX_RECORDED_COSTS
+        self._costs: dict[Hashable, float] = {}
+
+    def record_cost(self, key: Hashable, seconds: float):
+        costs = self._costs
+        costs.pop(key, None)
+        costs[key] = seconds
+
+        if len(costs) > MAX_RECORDED_COSTS:
+            # Recorded for values that were never stored
+            del costs[next(iter(costs))]
+
+    def _prioritize(self, key: Hashable, entry: list):
+        priority = self._age + entry[3] * entry[2] / max(entry[1], 1)
+        self._sequence += 1
+        entry[4] = self._sequence
+        heapq.heappush(self._heap, (priority, self._sequence, key))
+
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            # Drop stale heap items
+            entries = self._entries
+            self._heap = [item for item in self._heap if item[2] in entries and entries[item[2]][4] == item[1]]
+            heapq.heapify(self._heap)
+
+    def get(self, key: Hashable, default: Any) -> Any:
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self.stats.misses += 1
+            return default
+
+        self.stats.hits += 1
+        entry[3] += 1
+        self._prioritize(key, entry)
+        return entry[0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        # Taken first, so it does not linger when weighing fails
+        cost = self._costs.pop(key, None)
+        weight = self.weigher(value)
+        previous = self._entries.pop(key, None)
+        frequency = 1
+
+        if previous is not None:
+            self.bytes -= previous[1]
+            frequency = previous[3]
+
+            if cost is None:
+                cost = previous[2]
+
+        if cost is None:
+            cost = self.default_cost
+
+        if weight > self.max_bytes:
+            return
+
+        entry = self._entries[key] = [value, weight, cost, frequency, 0]
+        self.bytes += weight
+        self._prioritize(key, entry)
+
+        while self.bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        while True:
+            priority, sequence, key = heapq.heappop(self._heap)
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[4] == sequence:
+                break
+
+        del self._entries[key]
+        self.bytes -= entry[1]
+        self._age = priority
+        self.stats.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+
+        if entry is not None:
+            self.bytes -= entry[1]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
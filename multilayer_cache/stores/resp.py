@@ -0,0 +1,272 @@
+from multilayer_cache.codecs import Codec
+from multilayer_cache.codecs import PickleBytesCodec
+
+from typing import Any
+from typing import Callable
+from typing import Hashable
+from typing import Iterable
+from typing import Mapping
+
+import asyncio
+import itertools
+from collections import deque
+
+
+class RESPError(Exception):
+    """
+    Error reply of a RESP server
+    """
+
+
+def encode_command(args: Iterable[bytes | str | int]) -> bytes:
+    parts = []
+
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        elif isinstance(arg, int):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+
+    return b"*%d\r\n" % len(parts) + b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader) -> Any:
+    """
+    Reads one reply, error replies are returned as RESPError instances
+    """
+
+    line = await reader.readuntil(b"\r\n")
+    kind, payload = line[:1], line[1:-2]
+
+    if kind == b"+":
+        return payload.decode()
+    if kind == b"-":
+        return RESPError(payload.decode())
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        length = int(payload)
+        return None if length < 0 else (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        length = int(payload)
+        return None if length < 0 else [await read_reply(reader) for _ in range(length)]
+
+    raise RESPError(f"unexpected reply {line!r}")
+
+
+class _Connection:
+    """
+    A connection that pipelines: commands are written as they come, replies are matched
+    to their callers in order by a reader task
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._waiters: deque[asyncio.Future] = deque()
+        self.closed = False
+        self._task = asyncio.ensure_future(self._read_replies())
+
+    @property
+    def pending(self) -> int:
+        return len(self._waiters)
+
+    async def call(self, command: bytes) -> Any:
+        if self.closed:
+            raise ConnectionError("connection is closed")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self._writer.write(command)
+
+        if self._writer.transport.get_write_buffer_size() > 1 << 16:
+            await self._writer.drain()
+
+        reply = await future
+
+        if isinstance(reply, RESPError):
+            raise reply
+
+        return reply
+
+    async def _read_replies(self):
+        error = ConnectionError("connection is closed")
+
+        try:
+            while True:
+                reply = await read_reply(self._reader)
+                future = self._waiters.popleft()
+
+                # A cancelled caller's reply is dropped
+                if not future.done():
+                    future.set_result(reply)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = e if isinstance(e, ConnectionError) else ConnectionError(f"connection lost: {e!r}")
+        finally:
+            # Closed by close() or lost, callers still waiting fail
+            self.closed = True
+            self._writer.close()
+
+            while self._waiters:
+                future = self._waiters.popleft()
+                if not future.done():
+                    future.set_exception(error)
+
+    async def close(self):
+        self.closed = True
+        self._task.cancel()
+        self._writer.close()
+
+        try:
+            await self._writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+
+class RESPPool:
+    """
+    At most size connections to a RESP server, opened on demand
+
+    With pipeline=True commands of concurrent callers share connections and are written
+    without waiting for earlier replies. With pipeline=False a command holds a connection
+    until its reply arrives, callers beyond size wait for a free one.
+    """
+
+    def __init__(self, host: str, port: int, size: int = 4, pipeline: bool = True, connect_timeout: float = 5.0):
+        if size < 1:
+            raise ValueError("size must be positive")
+
+        self.host = host
+        self.port = port
+        self.size = size
+        self.pipeline = pipeline
+        self.connect_timeout = connect_timeout
+        self._connections: list[_Connection | None] = [None] * size
+        self._connecting: list[asyncio.Future | None] = [None] * size
+        self._next = itertools.count()
+        self._idle: list[int] = list(range(size))
+        self._available = asyncio.Semaphore(size)
+
+    async def _connection(self, slot: int) -> _Connection:
+        connection = self._connections[slot]
+
+        if connection is not None and not connection.closed:
+            return connection
+
+        connecting = self._connecting[slot]
+
+        if connecting is None:
+            # Concurrent callers of the slot wait for the same connect
+            connecting = self._connecting[slot] = asyncio.ensure_future(self._connect(slot))
+
+        try:
+            return await asyncio.shield(connecting)
+        finally:
+            if connecting.done():
+                self._connecting[slot] = None
+
+    async def _connect(self, slot: int) -> _Connection:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.connect_timeout)
+        connection = self._connections[slot] = _Connection(reader, writer)
+        return connection
+
+    async def call(self, *args: bytes | str | int) -> Any:
+        command = encode_command(args)
+
+        if self.pipeline:
+            slot = next(self._next) % self.size
+            return await (await self._connection(slot)).call(command)
+
+        async with self._available:
+            slot = self._idle.pop()
+
+            try:
+                return await (await self._connection(slot)).call(command)
+            finally:
+                self._idle.append(slot)
+
+    async def close(self):
+        for slot, connection in enumerate(self._connections):
+            if connection is not None:
+                await connection.close()
+                self._connections[slot] = None
+
+
+class RESPStore:
+    """
+    Async store on a Redis protocol server, for the shared tier between per-process layers and the source
+
+    get, set, get_many (MGET) and set_many (MSET) follow the contract of async_cache_layer
+    and async_cache_layer_many. Keys are stored as prefix + encode_key(key) (repr by default),
+    values as codec.encode(value) bytes (pickle by default). With ttl, entries expire on the server.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 6379,
+        pool_size: int = 4,
+        pipeline: bool = True,
+        prefix: str = "",
+        ttl: float | None = None,
+        codec: Codec[Any, bytes] | None = None,
+        encode_key: Callable[[Hashable], str] = repr,
+        connect_timeout: float = 5.0,
+    ):
+        self.pool = RESPPool(host, port, pool_size, pipeline, connect_timeout)
+        self.prefix = prefix
+        self.ttl = ttl
+        self.codec = codec or PickleBytesCodec()
+        self.encode_key = encode_key
+
+    def _key(self, key: Hashable) -> str:
+        return self.prefix + self.encode_key(key)
+
+    async def get(self, key: Hashable, default: Any) -> Any:
+        value = await self.pool.call("GET", self._key(key))
+        return default if value is None else self.codec.decode(value)
+
+    async def set(self, key: Hashable, value: Any) -> None:
+        if self.ttl is None:
+            await self.pool.call("SET", self._key(key), self.codec.encode(value))
+        else:
+            await self.pool.call("SET", self._key(key), self.codec.encode(value), "PX", int(self.ttl * 1000))
+
+    async def get_many(self, keys: Iterable[Hashable], default: Any) -> list[Any]:
+        keys = [self._key(key) for key in keys]
+
+        if not keys:
+            return []
+
+        decode = self.codec.decode
+        return [default if value is None else decode(value) for value in await self.pool.call("MGET", *keys)]
+
+    async def set_many(self, items: Mapping[Hashable, Any]) -> None:
+        if not items:
+            return
+
+        encode = self.codec.encode
+
+        if self.ttl is None:
+            args = []
+            for key, value in items.items():
+                args += (self._key(key), encode(value))
+            await self.pool.call("MSET", *args)
+        else:
+            # MSET has no expiry, the SETs are pipelined
+            await asyncio.gather(*(self.set(key, value) for key, value in items.items()))
+
+    async def delete(self, key: Hashable) -> None:
+        await self.pool.call("DEL", self._key(key))
+
+    async def close(self):
+        await self.pool.close()
+
+    async def __aenter__(self) -> "RESPStore":
+        return self
+
+    async def __aexit__(self, *_):
+        await self.close()
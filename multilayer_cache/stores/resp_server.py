@@ -0,0 +1,134 @@
+from multilayer_cache.stores.resp import RESPError
+from multilayer_cache.stores.resp import read_reply
+
+from typing import Any
+
+import time
+import asyncio
+
+
+def _encode_reply(reply: Any) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, RESPError):
+        return b"-%s\r\n" % str(reply).encode()
+    if isinstance(reply, str):
+        return b"+%s\r\n" % reply.encode()
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, bytes):
+        return b"$%d\r\n%s\r\n" % (len(reply), reply)
+    return b"*%d\r\n" % len(reply) + b"".join(map(_encode_reply, reply))
+
+
+class RESPServer:
+    """
+    In-process stand-in for a Redis server, for tests and benchmarks
+
+    Implements PING, GET, SET (with EX and PX), MGET, MSET, DEL, EXISTS, DBSIZE and FLUSHALL
+    over a dict.
+
+        async with RESPServer() as server:
+            store = RESPStore(*server.address)
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.data: dict[bytes, tuple[bytes, float | None]] = {}
+        # Commands handled
+        self.commands = 0
+        self._server: asyncio.Server | None = None
+        self._clients: dict[asyncio.StreamWriter, asyncio.Task] = {}
+
+    @property
+    def address(self) -> tuple[str, int]:
+        return self.host, self.port
+
+    async def start(self) -> "RESPServer":
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+
+            handlers = list(self._clients.values())
+
+            # Handlers see the end of their stream and return
+            for writer in list(self._clients):
+                writer.close()
+
+            await asyncio.gather(*handlers, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "RESPServer":
+        return await self.start()
+
+    async def __aexit__(self, *_):
+        await self.close()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._clients[writer] = asyncio.current_task()
+
+        try:
+            while True:
+                writer.write(_encode_reply(self._execute(await read_reply(reader))))
+
+                # Pipelined commands are answered without waiting for the client to read
+                if writer.transport.get_write_buffer_size() > 1 << 16:
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._clients.pop(writer, None)
+            writer.close()
+
+    def _get(self, key: bytes) -> bytes | None:
+        entry = self.data.get(key)
+
+        if entry is None:
+            return None
+
+        value, expires_at = entry
+
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self.data[key]
+            return None
+
+        return value
+
+    def _execute(self, command: list[bytes]) -> Any:
+        self.commands += 1
+        name, args = command[0].upper(), command[1:]
+
+        if name == b"PING":
+            return "PONG"
+        if name == b"GET":
+            return self._get(args[0])
+        if name == b"SET":
+            expires_at = None
+            if len(args) == 4 and args[2].upper() in (b"EX", b"PX"):
+                seconds = int(args[3]) / (1 if args[2].upper() == b"EX" else 1000)
+                expires_at = time.monotonic() + seconds
+            self.data[args[0]] = (args[1], expires_at)
+            return "OK"
+        if name == b"MGET":
+            return [self._get(key) for key in args]
+        if name == b"MSET":
+            for key, value in zip(args[::2], args[1::2]):
+                self.data[key] = (value, None)
+            return "OK"
+        if name == b"DEL":
+            return sum(self.data.pop(key, None) is not None for key in args)
+        if name == b"EXISTS":
+            return sum(self._get(key) is not None for key in args)
+        if name == b"DBSIZE":
+            return len(self.data)
+        if name == b"FLUSHALL":
+            self.data.clear()
+            return "OK"
+
+        return RESPError(f"ERR unknown command '{name.decode()}'")
@@ -0,0 +1,337 @@
+from multilayer_cache.stores.base import Store
+from multilayer_cache.stores.base import StoreStats
+
+from typing import Any
+from typing import Callable
+from typing import Generic
+from typing import Hashable
+from typing import Iterable
+from typing import Mapping
+from typing import TypeVar
+
+import time
+import asyncio
+import hashlib
+from bisect import bisect
+from bisect import insort
+from concurrent.futures import Executor
+
+
+N = TypeVar("N")
+
+# Result of a write that did not reach its node
+_DROPPED = object()
+
+# Errors of an unreachable node, its keys then miss
+UNREACHABLE = (ConnectionError, TimeoutError, asyncio.TimeoutError, OSError)
+
+
+def _point(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+class HashRing(Generic[N]):
+    """
+    Consistent hash ring with virtual nodes
+
+    Every node owns vnodes points of the ring and a key belongs to the node of the first point
+    at or after the key's hash, so adding or removing a node only moves the keys of its points.
+    """
+
+    def __init__(self, nodes: Mapping[str, N] | None = None, vnodes: int = 160):
+        if vnodes < 1:
+            raise ValueError("vnodes must be positive")
+
+        self.vnodes = vnodes
+        self.nodes: dict[str, N] = {}
+        self._points: list[tuple[int, str]] = []
+
+        for name, node in (nodes or {}).items():
+            self.add(name, node)
+
+    def add(self, name: str, node: N):
+        if name in self.nodes:
+            raise ValueError(f"node {name!r} is already in the ring")
+
+        self.nodes[name] = node
+
+        for replica in range(self.vnodes):
+            insort(self._points, (_point(f"{name}#{replica}".encode()), name))
+
+    def remove(self, name: str):
+        del self.nodes[name]
+        self._points = [point for point in self._points if point[1] != name]
+
+    def name_for(self, encoded_key: bytes) -> str:
+        if not self._points:
+            raise LookupError("the ring has no nodes")
+
+        index = bisect(self._points, (_point(encoded_key),))
+        return self._points[index % len(self._points)][1]
+
+
+class _Sharding(Generic[N]):
+    def __init__(
+        self,
+        nodes: Mapping[str, N],
+        vnodes: int,
+        encode_key: Callable[[Hashable], str],
+        errors: tuple[type[BaseException], ...],
+        retry_after: float,
+        clock: Callable[[], float],
+    ):
+        self.ring: HashRing[N] = HashRing(nodes, vnodes)
+        self.encode_key = encode_key
+        self.errors = errors
+        self.retry_after = retry_after
+        self.clock = clock
+        self.stats = StoreStats()
+        # Node name -> calls failed
+        self.failures: dict[str, int] = {}
+        # Node name -> time until which it is skipped
+        self._down: dict[str, float] = {}
+        # Node name -> keys whose writes it missed, deleted from it before it serves again
+        self._stale: dict[str, set[Hashable]] = {}
+        # Nodes deleting their stale keys, skipped meanwhile
+        self._recovering: set[str] = set()
+
+    def node_name(self, key: Hashable) -> str:
+        return self.ring.name_for(self.encode_key(key).encode())
+
+    def _available(self, name: str) -> bool:
+        if name in self._recovering:
+            return False
+
+        until = self._down.get(name)
+
+        if until is None:
+            return True
+
+        if self.clock() >= until:
+            del self._down[name]
+            return True
+
+        return False
+
+    def _failed(self, name: str):
+        self.failures[name] = self.failures.get(name, 0) + 1
+        self._down[name] = self.clock() + self.retry_after
+
+    def _missed(self, name: str, keys: Iterable[Hashable]):
+        self._stale.setdefault(name, set()).update(keys)
+
+    def _group(self, keys: Iterable[Hashable]) -> dict[str, list[int]]:
+        # Node name -> positions of its keys
+        groups: dict[str, list[int]] = {}
+
+        for position, key in enumerate(keys):
+            groups.setdefault(self.node_name(key), []).append(position)
+
+        return groups
+
+    def _count(self, values: list[Any], default: Any):
+        misses = sum(value is default for value in values)
+        self.stats.misses += misses
+        self.stats.hits += len(values) - misses
+
+
+class ShardedStore(_Sharding[Store], Store):
+    """
+    Spreads keys over stores with a consistent hash ring
+
+    get_many and set_many make one bulk call per node, in parallel on executor when given.
+    A node raising one of errors (connection errors by default) is treated as empty:
+    its gets miss and its sets are dropped, and it is skipped for retry_after seconds.
+    Keys written or deleted while a node is down are remembered and deleted from it
+    before it serves again, so it does not return values older than the dropped writes.
+    """
+
+    def __init__(
+        self,
+        nodes: Mapping[str, Store],
+        vnodes: int = 160,
+        encode_key: Callable[[Hashable], str] = repr,
+        executor: Executor | None = None,
+        errors: tuple[type[BaseException], ...] = UNREACHABLE,
+        retry_after: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__(nodes, vnodes, encode_key, errors, retry_after, clock)
+        self.executor = executor
+
+    def _call(self, name: str, method: str, *args: Any, fallback: Any = None) -> Any:
+        if not self._available(name):
+            return fallback
+
+        try:
+            if name in self._stale:
+                self._recover(name)
+
+            return getattr(self.ring.nodes[name], method)(*args)
+        except self.errors:
+            self._failed(name)
+            return fallback
+
+    def _recover(self, name: str):
+        node = self.ring.nodes[name]
+        stale = self._stale.pop(name)
+        self._recovering.add(name)
+
+        try:
+            for key in stale:
+                node.delete(key)
+        except BaseException:
+            self._missed(name, stale)
+            raise
+        finally:
+            self._recovering.discard(name)
+
+    def _write(self, name: str, keys: Iterable[Hashable], method: str, *args: Any):
+        if self._call(name, method, *args, fallback=_DROPPED) is _DROPPED:
+            self._missed(name, keys)
+
+    def get(self, key: Hashable, default: Any) -> Any:
+        value = self._call(self.node_name(key), "get", key, default, fallback=default)
+        self._count([value], default)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._write(self.node_name(key), [key], "set", key, value)
+
+    def delete(self, key: Hashable) -> None:
+        self._write(self.node_name(key), [key], "delete", key)
+
+    def get_many(self, keys: Iterable[Hashable], default: Any) -> list[Any]:
+        keys = list(keys)
+        groups = self._group(keys)
+
+        def load(name: str) -> list[Any]:
+            positions = groups[name]
+            return self._call(name, "get_many", [keys[p] for p in positions], default, fallback=[default] * len(positions))
+
+        if self.executor is not None and len(groups) > 1:
+            loaded = list(self.executor.map(load, groups))
+        else:
+            loaded = [load(name) for name in groups]
+
+        values = [default] * len(keys)
+
+        for positions, node_values in zip(groups.values(), loaded):
+            for position, value in zip(positions, node_values):
+                values[position] = value
+
+        self._count(values, default)
+        return values
+
+    def set_many(self, items: Mapping[Hashable, Any]) -> None:
+        keys = list(items)
+        groups = self._group(keys)
+
+        def store(name: str):
+            node_items = {keys[p]: items[keys[p]] for p in groups[name]}
+            self._write(name, node_items, "set_many", node_items)
+
+        if self.executor is not None and len(groups) > 1:
+            list(self.executor.map(store, groups))
+        else:
+            for name in groups:
+                store(name)
+
+    def __len__(self) -> int:
+        return sum(len(node) for name, node in self.ring.nodes.items() if self._available(name))
+
+    def __contains__(self, key: Hashable) -> bool:
+        return bool(self._call(self.node_name(key), "__contains__", key, fallback=False))
+
+
+class AsyncShardedStore(_Sharding[Any]):
+    """
+    ShardedStore of async stores (such as RESPStore), bulk calls of nodes run concurrently
+
+    A node call that raises one of errors or takes longer than timeout is treated as a miss,
+    keys it missed writes of are deleted from it before it serves again.
+    """
+
+    def __init__(
+        self,
+        nodes: Mapping[str, Any],
+        vnodes: int = 160,
+        encode_key: Callable[[Hashable], str] = repr,
+        timeout: float | None = None,
+        errors: tuple[type[BaseException], ...] = UNREACHABLE,
+        retry_after: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__(nodes, vnodes, encode_key, errors, retry_after, clock)
+        self.timeout = timeout
+
+    async def _call(self, name: str, method: str, *args: Any, fallback: Any = None) -> Any:
+        if not self._available(name):
+            return fallback
+
+        try:
+            if name in self._stale:
+                await self._recover(name)
+
+            return await asyncio.wait_for(getattr(self.ring.nodes[name], method)(*args), self.timeout)
+        except self.errors:
+            self._failed(name)
+            return fallback
+
+    async def _recover(self, name: str):
+        # Concurrent calls skip the node until its stale keys are deleted
+        node = self.ring.nodes[name]
+        stale = self._stale.pop(name)
+        self._recovering.add(name)
+
+        try:
+            await asyncio.wait_for(asyncio.gather(*(node.delete(key) for key in stale)), self.timeout)
+        except BaseException:
+            self._missed(name, stale)
+            raise
+        finally:
+            self._recovering.discard(name)
+
+    async def _write(self, name: str, keys: Iterable[Hashable], method: str, *args: Any):
+        if await self._call(name, method, *args, fallback=_DROPPED) is _DROPPED:
+            self._missed(name, keys)
+
+    async def get(self, key: Hashable, default: Any) -> Any:
+        value = await self._call(self.node_name(key), "get", key, default, fallback=default)
+        self._count([value], default)
+        return value
+
+    async def set(self, key: Hashable, value: Any) -> None:
+        await self._write(self.node_name(key), [key], "set", key, value)
+
+    async def delete(self, key: Hashable) -> None:
+        await self._write(self.node_name(key), [key], "delete", key)
+
+    async def get_many(self, keys: Iterable[Hashable], default: Any) -> list[Any]:
+        keys = list(keys)
+        groups = self._group(keys)
+
+        loaded = await asyncio.gather(*(
+            self._call(name, "get_many", [keys[p] for p in positions], default, fallback=[default] * len(positions))
+            for name, positions in groups.items()
+        ))
+
+        values = [default] * len(keys)
+
+        for positions, node_values in zip(groups.values(), loaded):
+            for position, value in zip(positions, node_values):
+                values[position] = value
+
+        self._count(values, default)
+        return values
+
+    async def set_many(self, items: Mapping[Hashable, Any]) -> None:
+        keys = list(items)
+        groups = self._group(keys)
+
+        node_items = {name: {keys[p]: items[keys[p]] for p in positions} for name, positions in groups.items()}
+
+        await asyncio.gather(*(
+            self._write(name, node_items[name], "set_many", node_items[name])
+            for name in groups
+        ))
@@ -0,0 +1,489 @@
+from multilayer_cache.stores.base import Store
+from multilayer_cache.stores.base import StoreStats
+from multilayer_cache.codecs import Codec
+from multilayer_cache.codecs import PickleBytesCodec
+
+from typing import Any
+from typing import Callable
+from typing import Hashable
+
+import os
+import time
+import random
+import struct
+import hashlib
+import tempfile
+import threading
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+# Segment layout
+#
+#   header       magic version slots page_size pages live used
+#   free lists   head chunk offset + 1 of every size class (0 when empty)
+#   pages        size class of every arena page (UNASSIGNED until first used)
+#   slots        open addressing index, linear probing
+#   arena        pages of page_size bytes, each split into chunks of one size class
+#
+# A chunk holds the encoded key followed by the encoded value. Size classes are powers of two
+# from MIN_CHUNK to page_size.
+#
+# Writers hold the store lock (a thread lock and an fcntl lock on a file next to the segment).
+# Readers take no lock: a writer makes a slot's version odd while changing the slot or freeing
+# its chunk, and readers retry when the version changed while they copied the entry.
+
+MAGIC = b"MLCSHM\0\0"
+VERSION = 1
+
+HEADER = struct.Struct("<8sIIIIII")
+HEAD = struct.Struct("<Q")
+SLOT = struct.Struct("<IBBHQQIIQ")
+
+EMPTY = 0
+LIVE = 1
+DELETED = 2
+
+MIN_CHUNK = 64
+UNASSIGNED = 0xFF
+MAX_PAGES = UNASSIGNED
+
+# Retries of a read racing writers before it counts as a miss
+READ_RETRIES = 8
+# Live entries compared to pick an eviction victim
+EVICTION_SAMPLES = 16
+
+
+def _key_hash(data: bytes) -> int:
+    # Stable across processes, unlike hash()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+def _align(offset: int, alignment: int = 64) -> int:
+    return -(-offset // alignment) * alignment
+
+
+class SharedMemoryStore(Store):
+    """
+    Store in a shared memory segment that the worker processes of a host attach to by name
+
+    One process creates the segment (create=True) with a fixed number of index slots and
+    a fixed arena, the others attach with the same name, so one worker's miss fills the cache
+    of all of them. Keys are matched by encode_key(key) (repr by default), values are stored
+    as codec.encode(value) bytes (pickle by default) and decoded on every hit.
+
+    Reads are lock-free, writes are serialized between processes. When the arena or the index
+    runs out of room, the least recently read of a few live entries (of the size needed) is evicted. Arena pages are
+    assigned to a size class for good, like memcached slabs, so once the arena is full entries
+    are only stored in sizes that already have pages. The arena holds at most 255 pages
+    (arena_bytes // page_size, page_size rounded up to a power of two). Entries larger than the page size
+    are not stored, and a write that cannot be stored drops the previous value of its key.
+    The segment lives until unlink() is called.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        create: bool = False,
+        slots: int = 65536,
+        arena_bytes: int = 64 * 1024 * 1024,
+        page_size: int = 1024 * 1024,
+        codec: Codec[Any, bytes] | None = None,
+        encode_key: Callable[[Hashable], str] = repr,
+        lock_path: str | None = None,
+    ):
+        if fcntl is None:
+            raise RuntimeError("SharedMemoryStore requires fcntl")
+
+        self.name = name
+        self.codec = codec or PickleBytesCodec()
+        self.encode_key = encode_key
+        self.stats = StoreStats()
+        # Writes not stored, for want of a page large enough, a chunk or a slot
+        self.rejected = 0
+
+        if create:
+            if slots < 1 or page_size < MIN_CHUNK or arena_bytes < page_size:
+                raise ValueError("slots must be positive and the arena must hold a page of at least MIN_CHUNK bytes")
+
+            page_size = 1 << (page_size - 1).bit_length()
+            pages = arena_bytes // page_size
+
+            if pages > MAX_PAGES:
+                # Page entries are one byte, UNASSIGNED included
+                raise ValueError(f"the arena must hold at most {MAX_PAGES} pages, use a larger page_size")
+
+            self._geometry(slots, page_size, pages)
+            self._shm = self._open(name, create=True, size=self._size)
+            buf = self._shm.buf
+            buf[:self._arena] = bytes(self._arena)
+            HEADER.pack_into(buf, 0, MAGIC, VERSION, slots, page_size, pages, 0, 0)
+            buf[self._pages_offset:self._pages_offset + pages] = bytes([UNASSIGNED]) * pages
+        else:
+            self._shm = self._open(name)
+            magic, version, slots, page_size, pages, _, _ = HEADER.unpack_from(self._shm.buf, 0)
+
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{name} is not a version {VERSION} shared memory store")
+
+            self._geometry(slots, page_size, pages)
+
+        self._buf = self._shm.buf
+        self._thread_lock = threading.Lock()
+        self._lock_path = lock_path or os.path.join(tempfile.gettempdir(), f"{name}.lock")
+        self._lock_file = open(self._lock_path, "a+b")
+
+    def _geometry(self, slots: int, page_size: int, pages: int):
+        self.slots = slots
+        self.page_size = page_size
+        self.pages = pages
+        self._classes = page_size.bit_length() - MIN_CHUNK.bit_length() + 1
+        self._heads_offset = HEADER.size
+        self._pages_offset = self._heads_offset + self._classes * HEAD.size
+        self._slots_offset = _align(self._pages_offset + pages, 8)
+        self._arena = _align(self._slots_offset + slots * SLOT.size)
+        self._size = self._arena + pages * page_size
+
+    @staticmethod
+    def _open(name: str, create: bool = False, size: int = 0) -> SharedMemory:
+        shm = SharedMemory(name, create=create, size=size)
+        # The segment outlives the processes using it, until unlink()
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+    # Locking
+
+    def _acquire(self):
+        self._thread_lock.acquire()
+        fcntl.lockf(self._lock_file, fcntl.LOCK_EX)
+
+    def _release(self):
+        fcntl.lockf(self._lock_file, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+    # Index
+
+    def _slot(self, index: int) -> int:
+        return self._slots_offset + index * SLOT.size
+
+    def _read(self, encoded_key: bytes, key_hash: int) -> bytes | None:
+        buf = self._buf
+        slots = self.slots
+        arena = self._arena
+        index = key_hash % slots
+
+        for _ in range(slots):
+            offset = self._slot(index)
+
+            for _ in range(READ_RETRIES):
+                version, state, _, _, slot_hash, chunk, key_length, value_length, _ = SLOT.unpack_from(buf, offset)
+
+                if version & 1:
+                    continue
+
+                if state == EMPTY:
+                    return None
+
+                if state != LIVE or slot_hash != key_hash or key_length != len(encoded_key):
+                    break
+
+                start = arena + chunk
+                data = bytes(buf[start:start + key_length + value_length])
+
+                if struct.unpack_from("<I", buf, offset)[0] != version:
+                    continue
+
+                if data[:key_length] != encoded_key:
+                    break
+
+                # Recency, a racing write of the stamp is harmless
+                struct.pack_into("<Q", buf, offset + SLOT.size - 8, time.monotonic_ns())
+                return data[key_length:]
+            else:
+                return None
+
+            index = (index + 1) % slots
+
+        return None
+
+    def _find(self, encoded_key: bytes, key_hash: int) -> tuple[int | None, int | None]:
+        # Under the lock: slot of the key, first reusable slot of its probe sequence
+        buf = self._buf
+        free = None
+        index = key_hash % self.slots
+
+        for _ in range(self.slots):
+            offset = self._slot(index)
+            _, state, _, _, slot_hash, chunk, key_length, _, _ = SLOT.unpack_from(buf, offset)
+
+            if state == EMPTY:
+                return None, free if free is not None else index
+
+            if state == DELETED:
+                if free is None:
+                    free = index
+
+            elif slot_hash == key_hash and key_length == len(encoded_key):
+                start = self._arena + chunk
+                if buf[start:start + key_length] == encoded_key:
+                    return index, free
+
+            index = (index + 1) % self.slots
+
+        return None, free
+
+    def _write_slot(self, index: int, state: int, size_class: int, key_hash: int, chunk: int, key_length: int, value_length: int):
+        buf = self._buf
+        offset = self._slot(index)
+        version = struct.unpack_from("<I", buf, offset)[0]
+        struct.pack_into("<I", buf, offset, (version + 1) & 0xFFFFFFFF)
+        SLOT.pack_into(
+            buf, offset, (version + 1) & 0xFFFFFFFF, state, size_class, 0,
+            key_hash, chunk, key_length, value_length, time.monotonic_ns(),
+        )
+        struct.pack_into("<I", buf, offset, (version + 2) & 0xFFFFFFFF)
+
+    def _state(self, index: int) -> int:
+        return self._buf[self._slot(index) + 4]
+
+    def _counts(self) -> tuple[int, int]:
+        return struct.unpack_from("<II", self._buf, HEADER.size - 8)
+
+    def _set_counts(self, live: int, used: int):
+        struct.pack_into("<II", self._buf, HEADER.size - 8, live, used)
+
+    def _remove(self, index: int):
+        _, _, size_class, _, _, chunk, _, _, _ = SLOT.unpack_from(self._buf, self._slot(index))
+        # The version changes before the chunk can be reused
+        self._write_slot(index, DELETED, 0, 0, 0, 0, 0)
+        self._free(size_class, chunk)
+        live, used = self._counts()
+        self._set_counts(live - 1, used)
+
+    def _rebuild(self):
+        # Drops deleted slots by reinserting live entries, readers may miss meanwhile
+        buf = self._buf
+        entries = []
+
+        for index in range(self.slots):
+            offset = self._slot(index)
+            _, state, size_class, _, key_hash, chunk, key_length, value_length, accessed = SLOT.unpack_from(buf, offset)
+
+            if state != EMPTY:
+                if state == LIVE:
+                    entries.append((size_class, key_hash, chunk, key_length, value_length, accessed))
+                self._write_slot(index, EMPTY, 0, 0, 0, 0, 0)
+
+        for size_class, key_hash, chunk, key_length, value_length, accessed in entries:
+            index = key_hash % self.slots
+
+            while SLOT.unpack_from(buf, self._slot(index))[1] != EMPTY:
+                index = (index + 1) % self.slots
+
+            self._write_slot(index, LIVE, size_class, key_hash, chunk, key_length, value_length)
+            struct.pack_into("<Q", buf, self._slot(index) + SLOT.size - 8, accessed)
+
+        self._set_counts(len(entries), len(entries))
+
+    def _evict(self, size_class: int | None = None) -> bool:
+        # Evicts the least recently read of EVICTION_SAMPLES live entries, of size_class when given.
+        # Slots are walked from a random one until enough candidates are found, a sample of random
+        # slots would rarely hold entries of a class with few, large chunks
+        buf = self._buf
+        victim = None
+        oldest = None
+        candidates = 0
+        start = random.randrange(self.slots)
+
+        for step in range(self.slots):
+            index = (start + step) % self.slots
+            offset = self._slot(index)
+
+            # State and size class bytes, unpacked only for candidates
+            if buf[offset + 4] != LIVE or (size_class is not None and buf[offset + 5] != size_class):
+                continue
+
+            accessed = struct.unpack_from("<Q", buf, offset + SLOT.size - 8)[0]
+
+            if oldest is None or accessed < oldest:
+                victim, oldest = index, accessed
+
+            candidates += 1
+
+            if candidates == EVICTION_SAMPLES:
+                break
+
+        if victim is None:
+            return False
+
+        self._remove(victim)
+        self.stats.evictions += 1
+        return True
+
+    # Arena
+
+    def _size_class(self, size: int) -> int:
+        return max(0, (size - 1).bit_length() - MIN_CHUNK.bit_length() + 1)
+
+    def _head(self, size_class: int) -> int:
+        return HEAD.unpack_from(self._buf, self._heads_offset + size_class * HEAD.size)[0]
+
+    def _set_head(self, size_class: int, head: int):
+        HEAD.pack_into(self._buf, self._heads_offset + size_class * HEAD.size, head)
+
+    def _free(self, size_class: int, chunk: int):
+        HEAD.pack_into(self._buf, self._arena + chunk, self._head(size_class))
+        self._set_head(size_class, chunk + 1)
+
+    def _allocate(self, size_class: int) -> int | None:
+        for _ in range(EVICTION_SAMPLES):
+            head = self._head(size_class)
+
+            if head:
+                chunk = head - 1
+                self._set_head(size_class, HEAD.unpack_from(self._buf, self._arena + chunk)[0])
+                return chunk
+
+            if self._assign_page(size_class):
+                continue
+
+            # Every page is taken, make room among entries of the same size
+            if not self._evict(size_class):
+                return None
+
+        return None
+
+    def _assign_page(self, size_class: int) -> bool:
+        buf = self._buf
+
+        for page in range(self.pages):
+            if buf[self._pages_offset + page] == UNASSIGNED:
+                buf[self._pages_offset + page] = size_class
+                chunk_size = MIN_CHUNK << size_class
+                start = page * self.page_size
+
+                for chunk in range(start + self.page_size - chunk_size, start - 1, -chunk_size):
+                    self._free(size_class, chunk)
+
+                return True
+
+        return False
+
+    # Store contract
+
+    def get(self, key: Hashable, default: Any) -> Any:
+        encoded_key = self.encode_key(key).encode()
+        value = self._read(encoded_key, _key_hash(encoded_key))
+
+        if value is None:
+            self.stats.misses += 1
+            return default
+
+        self.stats.hits += 1
+        return self.codec.decode(value)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        encoded_key = self.encode_key(key).encode()
+        key_hash = _key_hash(encoded_key)
+        data = encoded_key + self.codec.encode(value)
+        size_class = self._size_class(len(data))
+        self._acquire()
+
+        try:
+            chunk = self._allocate(size_class) if len(data) <= self.page_size else None
+
+            if chunk is None:
+                self._reject(encoded_key, key_hash)
+                return
+
+            start = self._arena + chunk
+            self._buf[start:start + len(data)] = data
+            existing, free = self._find(encoded_key, key_hash)
+
+            if existing is not None:
+                self._remove(existing)
+                free = existing
+            else:
+                live, used = self._counts()
+
+                if free is None or (self._state(free) == EMPTY and used + 1 > self.slots * 3 // 4):
+                    # Keep probe sequences short: once three quarters of the slots are used,
+                    # evict down to half of them live and drop deleted slots
+                    while live + 1 > self.slots // 2 and self._evict():
+                        live, _ = self._counts()
+
+                    self._rebuild()
+                    _, free = self._find(encoded_key, key_hash)
+
+                if free is None:
+                    self._free(size_class, chunk)
+                    self._reject(encoded_key, key_hash)
+                    return
+
+            live, used = self._counts()
+            reused = self._state(free) == DELETED
+            self._write_slot(free, LIVE, size_class, key_hash, chunk, len(encoded_key), len(data) - len(encoded_key))
+            self._set_counts(live + 1, used if reused else used + 1)
+        finally:
+            self._release()
+
+    def _reject(self, encoded_key: bytes, key_hash: int):
+        # Under the lock: the previous value of the key is stale once a write of it fails
+        self.rejected += 1
+        existing, _ = self._find(encoded_key, key_hash)
+
+        if existing is not None:
+            self._remove(existing)
+
+    def delete(self, key: Hashable) -> None:
+        encoded_key = self.encode_key(key).encode()
+        self._acquire()
+
+        try:
+            existing, _ = self._find(encoded_key, _key_hash(encoded_key))
+
+            if existing is not None:
+                self._remove(existing)
+        finally:
+            self._release()
+
+    def __len__(self) -> int:
+        return self._counts()[0]
+
+    def __contains__(self, key: Hashable) -> bool:
+        encoded_key = self.encode_key(key).encode()
+        return self._read(encoded_key, _key_hash(encoded_key)) is not None
+
+    def close(self):
+        """
+        Detaches this process from the segment
+        """
+
+        self._buf = None
+        self._shm.close()
+        self._lock_file.close()
+
+    def unlink(self):
+        """
+        Removes the segment, processes attached keep their mapping until they close
+        """
+
+        # Registered again so that unlink's own unregistration finds it
+        resource_tracker.register(self._shm._name, "shared_memory")
+        self._shm.unlink()
+
+        try:
+            os.unlink(self._lock_path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> "SharedMemoryStore":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
@@ -0,0 +1,392 @@
+from multilayer_cache.stores.base import Store
+from multilayer_cache.stores.base import StoreStats
+from multilayer_cache.codecs import Codec
+from multilayer_cache.codecs import PickleBytesCodec
+from multilayer_cache.executors import BoundedExecutor
+
+from typing import Any
+from typing import Callable
+from typing import Hashable
+from typing import Iterable
+from typing import Mapping
+
+import time
+import sqlite3
+import threading
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+"""
+
+# Keys per statement of bulk lookups, below SQLite's bound parameter limit
+CHUNK = 500
+
+# Marks a pending delete
+_DELETED = object()
+
+
+def _checked(value: Any) -> bytes | str:
+    # Anything else would fail the commit of the whole batch on the writer thread
+    if not isinstance(value, (bytes, str)):
+        raise TypeError(f"codec must encode values to bytes or str, not {type(value).__name__}")
+
+    return value
+
+
+def _size(value: bytes | str) -> int:
+    # Bytes of the stored payload, str is stored as UTF-8
+    return len(value.encode()) if isinstance(value, str) else len(value)
+
+
+class SQLiteStore(Store):
+    """
+    Persistent store in an SQLite database in WAL mode, surviving process restarts
+
+    Writes are queued and committed by a writer thread in one transaction per flush_interval
+    (or as soon as max_pending writes are queued), so a set does not wait for the disk.
+    Queued writes are visible to reads of this process right away and to other processes
+    once committed. Any number of processes may open the same database, WAL lets their
+    reads run alongside a commit.
+
+    With max_bytes, the writer evicts the least recently read entries every eviction_interval
+    while the values take more than max_bytes. Read times are recorded with the next commit.
+
+    Keys are stored as encode_key(key) (repr by default, stable for str, int and tuples of them),
+    values as codec.encode(value), which must be bytes or str (pickle by default).
+
+    async_get, async_get_many, async_set and async_set_many serve async_cache_layer,
+    reads run on a dedicated thread.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int | None = None,
+        codec: Codec[Any, bytes | str] | None = None,
+        encode_key: Callable[[Hashable], str] = repr,
+        flush_interval: float = 0.05,
+        max_pending: int = 1024,
+        eviction_interval: float = 1.0,
+        timeout: float = 30.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError("max_bytes must be positive")
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self.codec = codec or PickleBytesCodec()
+        self.encode_key = encode_key
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.eviction_interval = eviction_interval
+        self.timeout = timeout
+        self.clock = clock
+        self.stats = StoreStats()
+        # Failed commits, retried on sqlite3.Error and dropped otherwise
+        self.errors = 0
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Encoded key -> encoded value or _DELETED, queued and being committed
+        self._pending: dict[str, Any] = {}
+        self._committing: dict[str, Any] = {}
+        # Encoded key -> last read time, not yet committed
+        self._touched: dict[str, float] = {}
+        # Reader connections of all threads, closed by close()
+        self._readers: list[sqlite3.Connection] = []
+        self._wake = threading.Event()
+        self._flushed = threading.Condition(self._lock)
+        self._generation = 0
+        self._closed = False
+
+        self._writer_connection = self._connect()
+        self._writer_connection.execute("PRAGMA journal_mode=WAL")
+        self._writer_connection.execute("PRAGMA synchronous=NORMAL")
+        self._writer_connection.executescript(SCHEMA)
+
+        self._executor = BoundedExecutor(f"sqlite-store-{id(self):x}", max_workers=1)
+        self._writer = threading.Thread(target=self._write_loop, name=f"sqlite-store-writer-{id(self):x}", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+
+    def _reader(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+
+        if connection is None:
+            connection = self._local.connection = self._connect()
+            connection.execute("PRAGMA query_only=ON")
+
+            with self._lock:
+                self._readers.append(connection)
+
+        return connection
+
+    def _uncommitted(self, encoded_key: str) -> Any:
+        value = self._pending.get(encoded_key)
+        return self._committing.get(encoded_key) if value is None else value
+
+    def get(self, key: Hashable, default: Any) -> Any:
+        encoded_key = self.encode_key(key)
+        value = self._uncommitted(encoded_key)
+
+        if value is None:
+            row = self._reader().execute("SELECT value FROM cache WHERE key = ?", (encoded_key,)).fetchone()
+            value = _DELETED if row is None else row[0]
+
+        if value is _DELETED:
+            self.stats.misses += 1
+            return default
+
+        self.stats.hits += 1
+
+        if self.max_bytes is not None:
+            now = self.clock()
+
+            with self._lock:
+                self._touched[encoded_key] = now
+
+        return self.codec.decode(value)
+
+    def get_many(self, keys: Iterable[Hashable], default: Any) -> list[Any]:
+        encoded_keys = [self.encode_key(key) for key in keys]
+        uncommitted = self._uncommitted
+        found: dict[str, Any] = {}
+        missing = []
+
+        for encoded_key in encoded_keys:
+            value = uncommitted(encoded_key)
+
+            if value is None:
+                missing.append(encoded_key)
+            elif value is not _DELETED:
+                found[encoded_key] = value
+
+        connection = self._reader()
+
+        for start in range(0, len(missing), CHUNK):
+            chunk = missing[start:start + CHUNK]
+            found.update(connection.execute(
+                f"SELECT key, value FROM cache WHERE key IN ({','.join('?' * len(chunk))})", chunk,
+            ))
+
+        if self.max_bytes is not None:
+            now = self.clock()
+
+            with self._lock:
+                self._touched.update((encoded_key, now) for encoded_key in found)
+
+        decode = self.codec.decode
+        values = []
+
+        for encoded_key in encoded_keys:
+            value = found.get(encoded_key, _DELETED)
+
+            if value is _DELETED:
+                self.stats.misses += 1
+                values.append(default)
+            else:
+                self.stats.hits += 1
+                values.append(decode(value))
+
+        return values
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._queue({self.encode_key(key): _checked(self.codec.encode(value))})
+
+    def set_many(self, items: Mapping[Hashable, Any]) -> None:
+        encode_key = self.encode_key
+        encode = self.codec.encode
+        self._queue({encode_key(key): _checked(encode(value)) for key, value in items.items()})
+
+    def delete(self, key: Hashable) -> None:
+        self._queue({self.encode_key(key): _DELETED})
+
+    def _queue(self, writes: dict[str, Any]):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("store is closed")
+
+            self._pending.update(writes)
+            pending = len(self._pending)
+
+        if pending >= self.max_pending:
+            self._wake.set()
+
+    def __len__(self) -> int:
+        self.flush()
+        return self._reader().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def __contains__(self, key: Hashable) -> bool:
+        encoded_key = self.encode_key(key)
+        value = self._uncommitted(encoded_key)
+
+        if value is not None:
+            return value is not _DELETED
+
+        return self._reader().execute("SELECT 1 FROM cache WHERE key = ?", (encoded_key,)).fetchone() is not None
+
+    def size(self) -> int:
+        """
+        Bytes taken by committed values
+        """
+
+        return self._reader().execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+
+    def flush(self):
+        """
+        Waits until the writes queued so far are committed
+        """
+
+        with self._lock:
+            if self._closed:
+                return
+
+            generation = self._generation
+            self._wake.set()
+
+            while self._generation == generation and not self._closed:
+                self._flushed.wait()
+
+    def _write_loop(self):
+        evicted_at = time.monotonic()
+
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+
+            with self._lock:
+                pending = self._committing = self._pending
+                self._pending = {}
+                touched, self._touched = self._touched, {}
+                closed = self._closed
+
+            try:
+                self._commit(pending, touched)
+
+                if self.max_bytes is not None and (closed or time.monotonic() - evicted_at >= self.eviction_interval):
+                    self._evict()
+                    evicted_at = time.monotonic()
+            except sqlite3.Error:
+                # Busy beyond the timeout or out of disk, retried with the next commit
+                # unless written again since
+                self.errors += 1
+
+                with self._lock:
+                    self._pending = pending | self._pending
+            except Exception:
+                # Would fail again, the writes are dropped so the writer keeps running
+                self.errors += 1
+            finally:
+                with self._lock:
+                    self._committing = {}
+                    self._generation += 1
+                    self._flushed.notify_all()
+
+            if closed:
+                return
+
+    def _commit(self, pending: dict[str, Any], touched: dict[str, float]):
+        if not pending and not touched:
+            return
+
+        now = self.clock()
+        connection = self._writer_connection
+        connection.execute("BEGIN IMMEDIATE")
+
+        try:
+            deleted = [(key,) for key, value in pending.items() if value is _DELETED]
+            written = [(key, value, _size(value), now) for key, value in pending.items() if value is not _DELETED]
+
+            if deleted:
+                connection.executemany("DELETE FROM cache WHERE key = ?", deleted)
+            if written:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO cache (key, value, size, accessed) VALUES (?, ?, ?, ?)", written,
+                )
+            if touched:
+                connection.executemany(
+                    "UPDATE cache SET accessed = ? WHERE key = ?",
+                    [(accessed, key) for key, accessed in touched.items() if key not in pending],
+                )
+
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _evict(self):
+        connection = self._writer_connection
+        excess = connection.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0] - self.max_bytes
+
+        if excess <= 0:
+            return
+
+        victims = []
+
+        for key, size in connection.execute("SELECT key, size FROM cache ORDER BY accessed"):
+            victims.append((key,))
+            excess -= size
+
+            if excess <= 0:
+                break
+
+        connection.execute("BEGIN IMMEDIATE")
+
+        try:
+            connection.executemany("DELETE FROM cache WHERE key = ?", victims)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+        self.stats.evictions += len(victims)
+
+    async def async_get(self, key: Hashable, default: Any) -> Any:
+        return await self._executor.run(self.get, key, default)
+
+    async def async_get_many(self, keys: Iterable[Hashable], default: Any) -> list[Any]:
+        return await self._executor.run(self.get_many, list(keys), default)
+
+    async def async_set(self, key: Hashable, value: Any) -> None:
+        # Queuing does not block, the writer thread commits
+        self.set(key, value)
+
+    async def async_set_many(self, items: Mapping[Hashable, Any]) -> None:
+        self.set_many(items)
+
+    def close(self):
+        """
+        Commits queued writes, stops the writer and closes the connections of all threads
+        """
+
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+
+        self._wake.set()
+        self._writer.join()
+        self._executor.shutdown()
+        self._writer_connection.close()
+
+        with self._lock:
+            readers, self._readers = self._readers, []
+
+        for connection in readers:
+            connection.close()
+
+    def __enter__(self) -> "SQLiteStore":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
@@ -0,0 +1,192 @@
+from multilayer_cache import CacheLayer
+from multilayer_cache import AsyncCacheLayer
+from multilayer_cache.util import to_async
+from multilayer_cache.stores import LRUStore
+from multilayer_cache.access_trace import HIT
+from multilayer_cache.access_trace import MISS
+from multilayer_cache.access_trace import NO_LAYER
+from multilayer_cache.access_trace import TraceHeader
+from multilayer_cache.access_trace import TraceRecorder
+from multilayer_cache.access_trace import read_trace
+from multilayer_cache.replay import LayerConfig
+from multilayer_cache.replay import replay
+from multilayer_cache.replay import parse_config
+
+import pytest
+
+
+TREE = {"parsed": "raw"}
+
+
+def build(recorder: TraceRecorder, capacity: int) -> tuple[CacheLayer, CacheLayer]:
+    raw_store = LRUStore(capacity)
+    raw = CacheLayer(
+        "raw",
+        get_cache_value=raw_store.get,
+        set_cache_value=raw_store.set,
+        source=lambda key, default: key.upper(),
+        inspect=recorder,
+    )
+
+    parsed_store = LRUStore(capacity)
+    return raw, CacheLayer(
+        "parsed",
+        get_cache_value=parsed_store.get,
+        set_cache_value=parsed_store.set,
+        source=recorder.linked(raw),
+        source_key=lambda key: key[0],
+        inspect=recorder,
+    )
+
+
+def test_record_and_read(tmp_path):
+    path = str(tmp_path / "trace.bin")
+
+    with TraceRecorder(path, tree=TREE, buffer_size=64) as recorder:
+        _, parsed = build(recorder, capacity=10)
+        parsed.get(("a", 1))
+        parsed.get(("a", 1))
+        parsed.get(("a", 2))
+
+    header = TraceHeader({}, {})
+    events = list(read_trace(path, header, chunk_size=7))
+
+    assert header.layers == {0: "parsed", 1: "raw"}
+    assert header.tree == {0: 1}
+
+    match [(e.layer, e.result, e.caller_layer) for e in events]:
+        case [(0, 1, 0xFFFF), (1, 1, 0), (0, 0, 0xFFFF), (0, 1, 0xFFFF), (1, 0, 0)]:
+            pass
+        case other:
+            pytest.fail(f"unexpected events {other}")
+
+    assert events[1].caller_key_hash == events[0].key_hash
+    assert events[4].caller_key_hash == events[3].key_hash
+    assert events[1].result == MISS and events[4].result == HIT
+
+
+@pytest.mark.asyncio
+async def test_record_async(tmp_path):
+    path = str(tmp_path / "trace.bin")
+    cache = {}
+
+    async def source(key, default):
+        return key
+
+    with TraceRecorder(path) as recorder:
+        layer = AsyncCacheLayer(
+            "async",
+            get_cache_value=to_async(cache.get),
+            set_cache_value=to_async(cache.__setitem__),
+            source=source,
+            inspect=to_async(recorder),
+        )
+        await layer.get("a")
+        await layer.get("a")
+
+    assert [e.result for e in read_trace(path)] == [MISS, HIT]
+
+
+def test_replay(tmp_path):
+    path = str(tmp_path / "trace.bin")
+
+    with TraceRecorder(path, tree=TREE) as recorder:
+        _, parsed = build(recorder, capacity=100)
+
+        for _ in range(3):
+            for key in "abcd":
+                parsed.get((key, 1))
+                parsed.get((key, 2))
+
+    small, large = replay(path, [
+        {"parsed": LayerConfig(1), "raw": LayerConfig(1)},
+        {"parsed": LayerConfig(100), "raw": LayerConfig(100, ttl=60)},
+    ])
+
+    assert small.requests == large.requests == 24
+    # Cycling through more keys than fit, only the second version of a file hits the raw layer
+    assert small.layers["parsed"].hits == 0
+    assert small.layers["raw"].hits == 12
+    assert small.source_fetches == 12
+
+    assert large.layers["parsed"].misses == 8
+    assert large.layers["raw"].hits == 4
+    assert large.source_fetches == 4
+
+
+def test_replay_direct_inner_lookups(tmp_path):
+    path = str(tmp_path / "trace.bin")
+
+    with TraceRecorder(path, tree=TREE) as recorder:
+        raw, parsed = build(recorder, capacity=100)
+
+        parsed.get(("a", 1))
+        raw.get("b")
+        parsed.get(("c", 1))
+
+        # The outer lookup fails before its source looks up the inner layer
+        with pytest.raises(IndexError):
+            parsed.get(())
+
+        raw.get("c")
+        raw.get("d")
+
+    events = list(read_trace(path))
+    direct = [e for e in events if e.layer == 1 and e.caller_layer == NO_LAYER]
+    assert [e.result for e in direct] == [MISS, HIT, MISS]
+
+    [result] = replay(path, [{"parsed": LayerConfig(100), "raw": LayerConfig(100)}])
+
+    # 3 lookups of parsed and 3 direct lookups of raw, only the direct lookup of c hits raw.
+    # Misses of a, b, c and d reach the source, and so does the failed miss with no inner lookup
+    assert result.requests == 6
+    assert result.layers["raw"].hits == 1 and result.layers["raw"].misses == 4
+    assert result.source_fetches == 5
+
+
+@pytest.mark.asyncio
+async def test_async_linked(tmp_path):
+    path = str(tmp_path / "trace.bin")
+    raw_cache = {}
+    parsed_cache = {}
+
+    async def source(key, default):
+        return key
+
+    with TraceRecorder(path, tree=TREE) as recorder:
+        inspect = to_async(recorder)
+        raw = AsyncCacheLayer("raw", to_async(raw_cache.get), to_async(raw_cache.__setitem__), source=source, inspect=inspect)
+        parsed = AsyncCacheLayer(
+            "parsed", to_async(parsed_cache.get), to_async(parsed_cache.__setitem__),
+            source=recorder.async_linked(raw), inspect=inspect,
+        )
+
+        await parsed.get("a")
+        await raw.get("a")
+
+    assert [(e.layer, e.result, e.caller_layer) for e in read_trace(path)] == [
+        (0, MISS, NO_LAYER), (1, MISS, 0), (1, HIT, NO_LAYER),
+    ]
+
+
+def test_replay_unlinked(tmp_path):
+    path = str(tmp_path / "trace.bin")
+
+    with TraceRecorder(path) as recorder:
+        _, parsed = build(recorder, capacity=100)
+        parsed.get(("a", 1))
+        parsed.get(("a", 1))
+
+    [result] = replay(path, [{"parsed": LayerConfig(10)}])
+
+    # Without a tree every event is a request of its own layer
+    assert all(e.caller_layer == NO_LAYER for e in read_trace(path))
+    assert result.requests == 3
+    assert result.layers["parsed"].hits == 1
+
+
+def test_parse_config():
+    assert parse_config("parsed=lru:10,raw=w-tinylfu:100:30") == {
+        "parsed": LayerConfig(10, "lru"),
+        "raw": LayerConfig(100, "w-tinylfu", 30.0),
+    }
@@ -0,0 +1,99 @@
+from multilayer_cache import KEY_NOT_FOUND
+from multilayer_cache import AsyncCacheLayer
+from multilayer_cache import BatchLoader
+from multilayer_cache.util import to_async
+from multilayer_cache.examples.async_cached_files.defs import Bucket
+
+import asyncio
+
+import pytest
+
+
+class CountingBucket(Bucket):
+    requests: list[list[str]] = []
+
+    async def get_many(self, blob_ids, default):
+        self.requests.append(list(blob_ids))
+        return await super().get_many(blob_ids, default)
+
+
+@pytest.mark.asyncio
+async def test_batch_loader():
+    bucket = CountingBucket(files={"a": "A", "b": "B"}, requests=[])
+    load = BatchLoader(bucket.get_many)
+    missing = object()
+
+    results = await asyncio.gather(load("a", None), load("b", None), load("a", None), load("c", missing))
+
+    assert results == ["A", "B", "A", missing]
+    assert bucket.requests == [["a", "b", "c"]]
+
+    # A later tick is a new batch
+    assert await load("b", None) == "B"
+    assert bucket.requests[1:] == [["b"]]
+    assert (load.batches, load.keys) == (2, 4)
+
+
+@pytest.mark.asyncio
+async def test_batch_loader_max_batch_and_window():
+    bucket = CountingBucket(files={str(i): f"file {i}" for i in range(5)}, requests=[])
+    load = BatchLoader(bucket.get_many, max_batch=2, window=0.01)
+
+    async def later(key):
+        await asyncio.sleep(0.001)
+        return await load(key, None)
+
+    results = await asyncio.gather(load("0", None), later("1"), later("2"), load("3", None), later("4"))
+
+    assert results == [f"file {i}" for i in range(5)]
+    assert sorted(map(len, bucket.requests)) == [1, 2, 2]
+
+
+@pytest.mark.asyncio
+async def test_batch_loader_errors():
+    async def failing(keys, default):
+        raise RuntimeError("unavailable")
+
+    load = BatchLoader(failing)
+
+    results = await asyncio.gather(load("a", None), load("b", None), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_layer_batch_loader():
+    bucket = CountingBucket(files={"a": "A", "b": "B"}, requests=[])
+    store = {}
+
+    layer = AsyncCacheLayer(
+        "cached_files",
+        get_cache_value=to_async(store.get),
+        set_cache_value=to_async(store.__setitem__),
+        source=BatchLoader(bucket.get_many),
+    )
+
+    assert await asyncio.gather(*(layer.get(key) for key in "abcab")) == ["A", "B", KEY_NOT_FOUND, "A", "B"]
+    assert bucket.requests == [["a", "b", "c"]]
+    assert store == {"a": "A", "b": "B"}
+
+
+@pytest.mark.asyncio
+async def test_batch_loader_keeps_loads_referenced():
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def load_many(keys, default):
+        started.set()
+        await release.wait()
+        return keys
+
+    loader = BatchLoader(load_many)
+    result = asyncio.ensure_future(loader("a", None))
+    await started.wait()
+
+    assert len(loader._tasks) == 1
+
+    release.set()
+    assert await result == "a"
+    await asyncio.sleep(0)
+    assert not loader._tasks
@@ -0,0 +1,38 @@
+from multilayer_cache.benchmarks import overhead
+from multilayer_cache.benchmarks import inspect_overhead
+from multilayer_cache.benchmarks.__main__ import compare
+
+import pytest
+
+
+@pytest.mark.parametrize("api", overhead.APIS)
+def test_overhead_case(api):
+    result = overhead.run_case(overhead.Case(api, 2, 0.5, api != "dict"), ops=20, repeat=1, alloc_samples=5)
+
+    assert result.ns_per_op > 0
+    assert result.to_dict()["name"] == result.case.name
+
+
+def test_key_stream():
+    keys = overhead.key_stream(100, 0.25)
+    assert sum(key.startswith("h") for key in keys) == 25
+
+
+def test_compare():
+    baseline = {"results": [{"name": "a", "ns_per_op": 100.0}, {"name": "b", "ns_per_op": 100.0}]}
+    results = [{"name": "a", "ns_per_op": 150.0}, {"name": "b", "ns_per_op": 105.0}, {"name": "c", "ns_per_op": 1.0}]
+
+    [regression] = compare(results, baseline, threshold=0.1)
+    assert regression.startswith("a:")
+
+
+@pytest.mark.parametrize("hit", [True, False])
+def test_inspect_overhead_paths(hit):
+    events = []
+    get = inspect_overhead.build_chain(3, events.append, store_outer=hit)
+    get("a")
+    events.clear()
+
+    assert get("a") == "a"
+    # A warmed hit path stops at the outermost layer, the miss path reaches the innermost
+    assert [event.choice for event in events] == (["hit"] if hit else ["miss", "miss", "hit"])
@@ -0,0 +1,75 @@
+from multilayer_cache import CacheLayer
+from multilayer_cache.stores import BlobStore
+from multilayer_cache.examples.parsed_files.defs import Bucket
+
+import os
+import codecs
+
+
+def test_blob_store(tmp_path):
+    directory = str(tmp_path)
+
+    with BlobStore(directory) as store:
+        store.set("a", "contents")
+        store.set("b", "contents")
+        store.set(("c", 1), b"other")
+
+        view = store.get("a", None)
+        assert isinstance(view, memoryview) and view.readonly
+        assert bytes(view) == b"contents"
+        assert store.get("missing", None) is None
+
+        # Identical contents are stored once
+        assert len(os.listdir(os.path.join(directory, "objects"))) == 2
+        assert store.size() == len("contents") + len("other")
+
+        store.set("a", "changed")
+        store.delete("b")
+        # The view outlives the blob
+        assert bytes(view) == b"contents"
+        assert len(os.listdir(os.path.join(directory, "objects"))) == 2
+
+    with BlobStore(directory, decode=codecs.decode) as store:
+        assert len(store) == 2
+        assert store.get("a", None) == "changed"
+        assert store.get("b", None) is None
+        assert store.get(("c", 1), None) == "other"
+
+
+def test_blob_store_eviction(tmp_path):
+    with BlobStore(str(tmp_path), max_bytes=300) as store:
+        for key in "abc":
+            store.set(key, key * 100)
+        store.get("a", None)
+        store.set("d", "d" * 100)
+
+        assert store.size() == 300
+        assert "a" in store and "c" in store and "d" in store
+        assert "b" not in store
+        assert store.stats.evictions == 1
+
+
+def test_blob_store_compaction(tmp_path):
+    directory = str(tmp_path)
+
+    with BlobStore(directory) as store:
+        for i in range(3000):
+            store.set("a", str(i))
+
+    with open(os.path.join(directory, BlobStore.INDEX)) as log:
+        assert len(log.readlines()) < 2048
+
+    with BlobStore(directory, decode=codecs.decode) as store:
+        assert store.get("a", None) == "2999"
+        assert len(os.listdir(os.path.join(directory, "objects"))) == 1
+
+
+def test_blob_store_layer(tmp_path):
+    bucket = Bucket(files={"a": "A" * 1000})
+
+    with BlobStore(str(tmp_path)) as store:
+        cached_files = CacheLayer("cached_files", store.get, store.set, source=bucket.get)
+
+        assert cached_files.get("a") == "A" * 1000
+        assert bytes(cached_files.get("a")) == b"A" * 1000
+        assert store.stats.hits == 1
@@ -0,0 +1,108 @@
+from multilayer_cache import CacheLayer
+from multilayer_cache import Metrics
+from multilayer_cache.stores import weigh
+from multilayer_cache.stores import BudgetedStore
+from multilayer_cache.stores import MemoryBudget
+from multilayer_cache.examples.parsed_files.defs import Bucket
+from multilayer_cache.examples.parsed_files.defs import JsonParser
+
+import sys
+import json
+
+import pytest
+
+
+def test_weigh():
+    text = "x" * 1000
+    assert weigh(text) == sys.getsizeof(text)
+    assert weigh([text, text]) == sys.getsizeof([text, text]) + sys.getsizeof(text)
+    assert weigh({"records": [{"id": i} for i in range(100)]}) > 100 * sys.getsizeof({"id": 0})
+
+    class Parsed:
+        __slots__ = ("records",)
+
+        def __init__(self):
+            self.records = [text]
+
+    assert weigh(Parsed()) > 1000
+
+
+def test_weigh_deep_and_large_values():
+    nested = []
+    for _ in range(10_000):
+        nested = [nested]
+
+    # Deeper than the recursion limit
+    assert weigh(nested) == 10_000 * sys.getsizeof([[]]) + sys.getsizeof([])
+
+    records = [{"id": i} for i in range(1000)]
+    assert weigh(records, max_objects=10) < weigh(records)
+
+
+def test_budgeted_store():
+    store = BudgetedStore("raw", max_bytes=300, weigher=len)
+
+    store.set("a", "a" * 100)
+    store.set("b", "b" * 100)
+    store.get("a", None)
+    store.set("c", "c" * 150)
+
+    assert store.bytes == 250
+    assert "b" not in store and "a" in store
+    assert store.stats.evictions == 1
+
+    # Larger than the store is not kept
+    store.set("d", "d" * 400)
+    assert "d" not in store and store.bytes == 250
+
+    with pytest.raises(ValueError):
+        BudgetedStore("unbounded")
+
+
+def test_memory_budget_evicts_coldest_layer():
+    metrics = Metrics()
+    budget = MemoryBudget(1000, metrics=metrics)
+    raw = BudgetedStore("cached_files", budget=budget, weigher=len)
+    parsed = BudgetedStore("parsed_cached_files", budget=budget, weigher=len)
+
+    raw.set("a", "a" * 400)
+    parsed.set("a", "A" * 100)
+    raw.set("b", "b" * 400)
+    parsed.get("a", None)
+    raw.get("a", None)
+
+    # raw "b" holds the coldest bytes
+    parsed.set("b", "B" * 200)
+    assert "b" not in raw
+    assert budget.usage() == {"cached_files": 400, "parsed_cached_files": 300}
+    assert budget.used == 700
+
+    # Coldest now: parsed "a", then raw "a"
+    raw.set("c", "c" * 500)
+    assert "a" not in parsed and "a" not in raw
+    assert budget.usage() == {"cached_files": 500, "parsed_cached_files": 200}
+
+    rendered = metrics.render()
+    assert 'multilayer_cache_store_bytes{budget="default",store="cached_files"} 500' in rendered
+    assert 'multilayer_cache_budget_max_bytes{budget="default"} 1000' in rendered
+
+
+def test_memory_budget_layers():
+    files = {key: json.dumps({"key": key, "value": key * 1000}) for key in "abcdef"}
+    bucket = Bucket(files=files)
+    budget = MemoryBudget(8_000)
+    raw = BudgetedStore("cached_files", budget=budget)
+    parsed = BudgetedStore("parsed_cached_files", budget=budget)
+
+    cached_files = CacheLayer("cached_files", raw.get, raw.set, source=bucket.get)
+    parsed_cached_files = CacheLayer(
+        "parsed_cached_files", parsed.get, parsed.set,
+        source=cached_files, source_key=lambda key: key[0], transform=JsonParser().parse,
+    )
+
+    for key in "abcdef":
+        assert parsed_cached_files.get((key, "0"))["key"] == key
+
+    assert budget.used <= 8_000
+    assert sum(budget.usage().values()) == budget.used
+    assert raw.stats.evictions + parsed.stats.evictions > 0
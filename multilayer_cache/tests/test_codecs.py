@@ -0,0 +1,73 @@
+from multilayer_cache import CacheLayer
+from multilayer_cache import IdentityCodec
+from multilayer_cache import PickleCodec
+from multilayer_cache import MarshalCodec
+from multilayer_cache import JsonCodec
+from multilayer_cache.examples.parsed_files import parsed_cached_files
+
+import pickle
+
+import pytest
+
+
+PAYLOAD = {"key": "a", "values": [1, 2.5, "three", None, True], "nested": {"list": [[1], [2]]}}
+
+
+@pytest.mark.parametrize("codec", [IdentityCodec(), PickleCodec(), MarshalCodec(), JsonCodec()])
+def test_round_trip(codec):
+    assert codec.decode(codec.encode(PAYLOAD)) == PAYLOAD
+
+
+def test_pickle_out_of_band():
+    data = bytearray(b"x" * 100_000)
+
+    encoded, buffers = PickleCodec().encode(pickle.PickleBuffer(data))
+
+    # The buffer is not copied into the pickle stream
+    assert len(buffers) == 1
+    assert len(encoded) < 1000
+    assert PickleCodec().decode((encoded, buffers)) == data
+
+    # Changes to the original after encoding do not reach the cached value
+    data[0] = ord("y")
+    decoded = PickleCodec().decode((encoded, buffers))
+    assert bytes(decoded) == b"x" * 100_000
+    assert decoded.raw().readonly
+
+    encoded, buffers = PickleCodec(out_of_band=False).encode(pickle.PickleBuffer(data))
+    assert not buffers
+    assert len(encoded) > 100_000
+
+
+def test_layer_codecs():
+    source = lambda key, default: dict(PAYLOAD)
+
+    inner_cache = {}
+    layer = CacheLayer("layer", inner_cache.get, inner_cache.__setitem__, source=source, codec=IdentityCodec())
+
+    value = layer.get("a")
+    assert layer.get("a") is value
+
+    inner_cache = {}
+    layer = CacheLayer("layer", inner_cache.get, inner_cache.__setitem__, source=source, codec=MarshalCodec())
+
+    assert layer.get("a") == PAYLOAD
+    assert layer.get("a") == PAYLOAD
+    assert isinstance(inner_cache["a"], bytes)
+
+    with pytest.raises(ValueError):
+        CacheLayer("layer", inner_cache.get, inner_cache.__setitem__, source=source, codec=JsonCodec(), serialize=str)
+
+
+def test_example_codec():
+    inner_cache = {}
+
+    get_cache_value = parsed_cached_files.bakein_get_cache_value(inner_cache, IdentityCodec())
+    set_cache_value = parsed_cached_files.bakein_set_cache_value(inner_cache, IdentityCodec())
+
+    set_cache_value("a", PAYLOAD)
+    assert get_cache_value("a", None) is PAYLOAD
+
+    # JSON by default
+    parsed_cached_files.bakein_set_cache_value(inner_cache)("a", PAYLOAD)
+    assert inner_cache["a"] == JsonCodec().encode(PAYLOAD)
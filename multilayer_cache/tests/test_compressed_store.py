@@ -0,0 +1,121 @@
+from multilayer_cache import CacheLayer
+from multilayer_cache import Metrics
+from multilayer_cache import BoundedExecutor
+from multilayer_cache import ZlibCodec
+from multilayer_cache import LzmaCodec
+from multilayer_cache import Bz2Codec
+from multilayer_cache.stores import LRUStore
+from multilayer_cache.stores import CompressedStore
+from multilayer_cache.stores.compressed import Compressed
+
+import os
+import json
+import asyncio
+
+import pytest
+
+
+TEXT = json.dumps([{"id": i, "name": f"record-{i}", "active": True} for i in range(200)])
+
+
+@pytest.mark.parametrize("codec", [ZlibCodec(1), ZlibCodec(9), LzmaCodec(), Bz2Codec()])
+def test_codecs(codec):
+    data = TEXT.encode()
+    assert codec.decode(codec.encode(data)) == data
+    assert len(codec.encode(data)) < len(data) / 5
+
+
+def test_compressed_store():
+    inner = LRUStore(10)
+    store = CompressedStore(inner, threshold=100, hot=0)
+
+    store.set("text", TEXT)
+    store.set("bytes", TEXT.encode())
+    store.set("small", "x" * 10)
+    store.set("object", {"a": 1})
+
+    assert isinstance(inner.get("text", None), Compressed)
+    assert inner.get("small", None) == "x" * 10
+
+    assert store.get("text", None) == TEXT
+    assert store.get("bytes", None) == TEXT.encode()
+    assert store.get("small", None) == "x" * 10
+    assert store.get("object", None) == {"a": 1}
+    assert store.get("missing", None) is None
+    assert store.get_many(["text", "missing", "small"], None) == [TEXT, None, "x" * 10]
+
+    stats = store.compression
+    assert stats.compressed == 2
+    assert stats.decompressed == 3
+    assert stats.ratio > 5
+    assert stats.compress_seconds > 0
+    assert store.stats.hits == 6 and store.stats.misses == 2
+
+    store.delete("text")
+    assert "text" not in store
+    assert len(store) == 3
+
+
+def test_incompressible():
+    store = CompressedStore(LRUStore(10), threshold=10)
+    data = os.urandom(1000)
+
+    store.set("random", data)
+
+    assert store.compression.incompressible == 1
+    assert store.get("random", None) == data
+    assert store.compression.decompressed == 0
+
+
+def test_hot_set():
+    store = CompressedStore(LRUStore(10), threshold=100, hot=2)
+
+    for key in "abc":
+        store.set(key, TEXT + key)
+
+    store.get("a", None)
+    store.get("a", None)
+    store.get("b", None)
+    store.get("c", None)
+
+    assert store.compression.decompressed == 3
+    assert store.compression.hot_hits == 1
+    # a is the least recently read of the hot set
+    assert list(store._hot) == ["b", "c"]
+
+    store.set("b", "changed" * 100)
+    assert store.get("b", None) == "changed" * 100
+
+
+def test_layer_with_metrics():
+    metrics = Metrics()
+    store = CompressedStore(LRUStore(10), codec=ZlibCodec(1), name="raw", metrics=metrics)
+    layer = CacheLayer("raw", store.get, store.set, source=lambda key, default: TEXT)
+
+    assert layer.get("a") == TEXT
+    assert layer.get("a") == TEXT
+
+    rendered = metrics.render()
+    assert 'multilayer_cache_compressed_total{store="raw"} 1' in rendered
+    assert 'multilayer_cache_compression_cpu_seconds_total{store="raw",side="decompress"}' in rendered
+    assert 'multilayer_cache_compression_ratio{store="raw"}' in rendered
+
+
+@pytest.mark.asyncio
+async def test_offloaded():
+    with BoundedExecutor("compression", max_workers=2) as executor:
+        store = CompressedStore(LRUStore(10), threshold=100, executor=executor, offload_threshold=1000)
+
+        await asyncio.gather(
+            store.async_set("large", TEXT),
+            store.async_set("small", TEXT[:500]),
+        )
+
+        assert executor.stats().submitted == 1
+        assert await store.async_get("large", None) == TEXT
+        assert await store.async_get("small", None) == TEXT[:500]
+        assert await store.async_get("missing", None) is None
+        assert executor.stats().submitted == 2
+
+        assert await store.async_get("large", None) == TEXT
+        assert store.compression.hot_hits == 1
@@ -0,0 +1,232 @@
+from multilayer_cache import cache_layer
+from multilayer_cache import async_cache_layer
+from multilayer_cache import KEY_NOT_FOUND
+from multilayer_cache import AsyncSingleFlight
+from multilayer_cache import StripedLock
+from multilayer_cache.util import to_async
+from multilayer_cache.examples.async_cached_files.defs import Bucket
+from multilayer_cache.examples.async_cached_files import cached_files
+
+import json
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import pytest
+
+
+class CountingBucket(Bucket):
+    calls: int = 0
+
+    async def get(self, blob_id, default):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return self.files.get(blob_id, default)
+
+
+def get_test_bucket() -> CountingBucket:
+    return CountingBucket(
+        files = {
+            "a": json.dumps({"key": "a", "value": "a"}),
+        }
+    )
+
+
+@pytest.mark.asyncio
+async def test_single_flight_nested():
+    bucket = get_test_bucket()
+    single_flight = AsyncSingleFlight()
+
+    cached_files_inner_cache = {}
+    cached_files_sets = []
+
+    async def set_cached_file(key, value):
+        cached_files_sets.append(key)
+        cached_files_inner_cache[key] = value
+
+    cached_files_cache = partial(
+        cached_files.cache_layer_partial,
+        get_cache_value=cached_files.bakein_get_cache_value(cached_files_inner_cache),
+        set_cache_value=set_cached_file,
+        on_cache_miss_source=cached_files.bakein_on_cache_miss_source(bucket),
+        single_flight=single_flight,
+    )
+
+    parses = []
+
+    async def on_cache_miss_source(cache_key, default):
+        value = await cached_files_cache(
+            get_cache_key=to_async(lambda: cache_key),
+            get_default=to_async(lambda: default),
+        )
+
+        if value is default:
+            return default
+
+        parses.append(cache_key)
+        return json.loads(value)
+
+    parsed_inner_cache = {}
+
+    parsed_cached_files_cache = partial(
+        async_cache_layer,
+        get_cache_value=to_async(lambda key, default: parsed_inner_cache.get(key, default)),
+        set_cache_value=to_async(lambda key, value: parsed_inner_cache.update({key: value})),
+        on_cache_miss_source=on_cache_miss_source,
+        get_default=to_async(lambda: KEY_NOT_FOUND),
+        get_identifier=to_async(lambda: "parsed_cached_files"),
+        single_flight=single_flight,
+    )
+
+    results = await asyncio.gather(*(
+        parsed_cached_files_cache(get_cache_key=to_async(lambda: "a"))
+        for _ in range(20)
+    ))
+
+    assert results == [{"key": "a", "value": "a"}] * 20
+    assert bucket.calls == 1
+    assert cached_files_sets == ["a"]
+    assert parses == ["a"]
+    assert len(single_flight) == 0
+
+    # Not found keys are coalesced too and every caller gets its own default
+    defaults = [object() for _ in range(5)]
+
+    results = await asyncio.gather(*(
+        cached_files_cache(
+            get_cache_key=to_async(lambda: "c"),
+            get_default=to_async(lambda default=default: default),
+        )
+        for default in defaults
+    ))
+
+    assert all(result is default for result, default in zip(results, defaults))
+    assert bucket.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_single_flight_errors_and_cancellation():
+    single_flight = AsyncSingleFlight()
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("source is down")
+
+    results = await asyncio.gather(
+        *(single_flight.do("k", failing) for _ in range(3)),
+        return_exceptions=True,
+    )
+
+    assert calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow():
+        started.set()
+        await release.wait()
+        return "value"
+
+    first = asyncio.create_task(single_flight.do("k", slow))
+    second = asyncio.create_task(single_flight.do("k", slow))
+    await started.wait()
+
+    # A cancelled waiter does not affect the others
+    first.cancel()
+    release.set()
+
+    assert await second == "value"
+    assert first.cancelled()
+
+    # The call is cancelled once nobody waits for it
+    release.clear()
+    started.clear()
+    only = asyncio.create_task(single_flight.do("k", slow))
+    await started.wait()
+    only.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await only
+
+    assert len(single_flight) == 0
+
+
+def test_striped_lock_threads():
+    locks = StripedLock()
+    source_calls = []
+    parses = []
+
+    def source(key, default):
+        source_calls.append(key)
+        time.sleep(0.02)
+        return json.dumps({"key": key})
+
+    files_inner_cache = {}
+
+    files_cache = partial(
+        cache_layer,
+        get_cache_value=lambda key, default: files_inner_cache.get(key, default),
+        set_cache_value=lambda key, value: files_inner_cache.update({key: value}),
+        on_cache_miss_source=source,
+        get_identifier=lambda: "cached_files",
+        locks=locks,
+    )
+
+    def on_cache_miss_source(key, default):
+        value = files_cache(get_cache_key=lambda: key, get_default=lambda: default)
+
+        if value is default:
+            return default
+
+        parses.append(key)
+        return json.loads(value)
+
+    parsed_inner_cache = {}
+
+    parsed_cache = partial(
+        cache_layer,
+        get_cache_value=lambda key, default: parsed_inner_cache.get(key, default),
+        set_cache_value=lambda key, value: parsed_inner_cache.update({key: value}),
+        on_cache_miss_source=on_cache_miss_source,
+        get_default=lambda: KEY_NOT_FOUND,
+        get_identifier=lambda: "parsed_cached_files",
+        locks=locks,
+    )
+
+    with ThreadPoolExecutor(16) as pool:
+        results = list(pool.map(lambda _: parsed_cache(get_cache_key=lambda: 1), range(16)))
+
+    assert results == [{"key": 1}] * 16
+    assert source_calls == [1]
+    assert parses == [1]
+
+    # Distinct keys are computed in parallel
+    barrier = threading.Barrier(4, timeout=5)
+
+    def source(key, default):
+        barrier.wait()
+        return str(key)
+
+    cache = {}
+
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(
+            lambda key: cache_layer(
+                get_cache_key=lambda: key,
+                get_cache_value=lambda key, default: cache.get(key, default),
+                set_cache_value=lambda key, value: cache.update({key: value}),
+                on_cache_miss_source=source,
+                get_default=lambda: KEY_NOT_FOUND,
+                get_identifier=lambda: "layer",
+                locks=locks,
+            ),
+            range(10, 14),
+        ))
+
+    assert results == ["10", "11", "12", "13"]
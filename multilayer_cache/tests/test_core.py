@@ -0,0 +1,72 @@
+from multilayer_cache import cache_layer
+from multilayer_cache import async_cache_layer
+from multilayer_cache import KEY_NOT_FOUND
+from multilayer_cache import CacheLayerInspect
+from multilayer_cache import CacheLayerInspectHit
+from multilayer_cache import CacheLayerInspectMiss
+from multilayer_cache import CacheLayerEvent
+from multilayer_cache.util import to_async
+
+from functools import partial
+
+import pytest
+
+
+def test_inspect_events():
+    inner_cache = {}
+    events: list[CacheLayerEvent] = []
+
+    layer = partial(
+        cache_layer,
+        get_cache_value=lambda key, default: inner_cache.get(key, default),
+        set_cache_value=lambda key, value: inner_cache.update({key: value}),
+        on_cache_miss_source=lambda key, default: {"a": "A"}.get(key, default),
+        get_default=lambda: KEY_NOT_FOUND,
+        get_identifier=lambda: "layer",
+    )
+
+    # No inspect handler - no events are built
+    assert layer(get_cache_key=lambda: "a") == "A"
+    assert layer(get_cache_key=lambda: "a") == "A"
+
+    assert layer(get_cache_key=lambda: "a", inspect=events.append) == "A"
+    assert layer(get_cache_key=lambda: "c", inspect=events.append) is KEY_NOT_FOUND
+
+    match events:
+        case [
+            CacheLayerEvent("layer", "hit", "a"),
+            CacheLayerEvent("layer", "miss", "c"),
+        ]:
+            pass
+        case _:
+            raise ValueError
+
+    match [event.to_model() for event in events]:
+        case [
+            CacheLayerInspect(identifier="layer", value=CacheLayerInspectHit(key="a")),
+            CacheLayerInspect(identifier="layer", value=CacheLayerInspectMiss(key="c")),
+        ]:
+            pass
+        case _:
+            raise ValueError
+
+
+@pytest.mark.asyncio
+async def test_inspect_events_async():
+    inner_cache = {}
+    events: list[CacheLayerEvent] = []
+
+    layer = partial(
+        async_cache_layer,
+        get_cache_key=to_async(lambda: "a"),
+        get_cache_value=to_async(lambda key, default: inner_cache.get(key, default)),
+        set_cache_value=to_async(lambda key, value: inner_cache.update({key: value})),
+        on_cache_miss_source=to_async(lambda key, default: {"a": "A"}.get(key, default)),
+        get_default=to_async(lambda: KEY_NOT_FOUND),
+        get_identifier=to_async(lambda: "layer"),
+    )
+
+    assert await layer() == "A"
+    assert await layer(inspect=to_async(events.append)) == "A"
+
+    assert events == [CacheLayerEvent("layer", "hit", "a")]
@@ -0,0 +1,212 @@
+from multilayer_cache import CacheLayer
+from multilayer_cache import AsyncCacheLayer
+from multilayer_cache import cache_layer
+from multilayer_cache.stores import LRUStore
+from multilayer_cache.stores import GDSFStore
+from multilayer_cache.stores.memory import MAX_RECORDED_COSTS
+from multilayer_cache.benchmarks import cost
+
+import time
+import asyncio
+
+import pytest
+
+
+def test_gdsf_keeps_expensive_values():
+    store = GDSFStore(max_bytes=3, weigher=lambda value: 1)
+
+    store.record_cost("expensive", 10.0)
+    store.set("expensive", 1)
+
+    for key in ("a", "b", "c", "d"):
+        store.record_cost(key, 0.1)
+        store.set(key, 1)
+
+    assert "expensive" in store
+    assert len(store) == 3
+    assert store.stats.evictions == 2
+
+
+def test_gdsf_size_and_frequency():
+    store = GDSFStore(max_bytes=100, weigher=len)
+
+    # Same cost, the large value goes first
+    store.set("large", "x" * 60)
+    store.set("small", "x" * 20)
+    store.set("new", "x" * 30)
+
+    assert "large" not in store and "small" in store and "new" in store
+    assert store.bytes == 50
+
+    # Frequently used values outlast new ones
+    for _ in range(10):
+        store.get("small", None)
+
+    store.set("newer", "x" * 60)
+
+    assert "small" in store and "new" not in store
+
+
+def test_gdsf_ages_out_unused_values():
+    store = GDSFStore(max_bytes=2, weigher=lambda value: 1)
+
+    store.record_cost("old", 5.0)
+    store.set("old", 1)
+
+    for i in range(100):
+        store.record_cost(i, 1.0)
+        store.set(i, 1)
+        store.get(i, None)
+        store.get(i, None)
+
+    assert "old" not in store
+
+
+def test_gdsf_keeps_cost_on_replace():
+    store = GDSFStore(max_bytes=10, weigher=len)
+
+    store.record_cost("a", 2.0)
+    store.set("a", "x")
+    store.set("a", "xy")
+    store.delete("missing")
+
+    assert store._entries["a"][2] == 2.0
+    assert store.bytes == 2
+
+    store.set("huge", "x" * 11)
+    assert "huge" not in store
+
+    with pytest.raises(ValueError):
+        GDSFStore(max_bytes=0)
+
+
+def test_gdsf_skips_stale_heap_items():
+    store = GDSFStore(max_bytes=2, weigher=lambda value: 1)
+
+    # a is stored again with the priority of its removed entry
+    store.set("a", 1)
+    store.delete("a")
+    store.set("b", 1)
+    store.set("a", 1)
+    store.set("c", 1)
+
+    # b is older than the new entry of a
+    assert "a" in store and "c" in store and "b" not in store
+
+
+def test_gdsf_recorded_costs_are_bounded():
+    def weigher(value):
+        if value is None:
+            raise ValueError("cannot weigh")
+        return 1
+
+    store = GDSFStore(max_bytes=10, weigher=weigher)
+
+    store.record_cost("a", 1.0)
+    with pytest.raises(ValueError):
+        store.set("a", None)
+
+    assert not store._costs
+
+    for i in range(MAX_RECORDED_COSTS + 10):
+        store.record_cost(i, 1.0)
+
+    assert len(store._costs) == MAX_RECORDED_COSTS
+    assert 0 not in store._costs and MAX_RECORDED_COSTS + 9 in store._costs
+
+
+def test_record_cost_measures_source():
+    store = LRUStore(1000)
+    costs = {}
+
+    def source(key, default):
+        time.sleep(0.01)
+        return default if key == "missing" else key.upper()
+
+    layer = CacheLayer("layer", store.get, store.set, source=source, record_cost=costs.__setitem__)
+
+    assert layer.get("a") == "A"
+    assert layer.get("a") == "A"
+    layer.get("missing")
+
+    assert list(costs) == ["a"]
+    assert costs["a"] >= 0.01
+
+
+def test_record_cost_covers_inner_layers():
+    costs = {}
+
+    def bucket(key, default):
+        time.sleep(0.02)
+        return key
+
+    raw_store = LRUStore(1000)
+    raw = CacheLayer("raw", raw_store.get, raw_store.set, source=bucket)
+
+    parsed_store = GDSFStore(max_bytes=1 << 20)
+
+    def record_cost(key, seconds):
+        costs[key] = seconds
+        parsed_store.record_cost(key, seconds)
+
+    parsed = CacheLayer(
+        "parsed", parsed_store.get, parsed_store.set,
+        source=raw, transform=str.upper, record_cost=record_cost,
+    )
+
+    parsed.get("a")
+    assert costs["a"] >= 0.02
+    assert parsed_store._entries["a"][2] == costs["a"]
+
+    # Raw is warm, recomputing is cheap
+    parsed_store.delete("a")
+    parsed.get("a")
+    assert costs["a"] < 0.02
+
+
+def test_record_cost_functional():
+    costs = {}
+
+    cache_layer(
+        get_cache_key=lambda: "a",
+        get_cache_value=lambda key, default: default,
+        set_cache_value=lambda key, value: None,
+        on_cache_miss_source=lambda key, default: 1,
+        get_default=lambda: None,
+        get_identifier=lambda: "layer",
+        record_cost=costs.__setitem__,
+    )
+
+    assert list(costs) == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_async_record_cost():
+    store = LRUStore(1000)
+    costs = {}
+
+    async def source(key, default):
+        await asyncio.sleep(0.01)
+        return key
+
+    async def get(key, default):
+        return store.get(key, default)
+
+    async def set(key, value):
+        store.set(key, value)
+
+    layer = AsyncCacheLayer("layer", get, set, source=source, record_cost=costs.__setitem__)
+
+    assert await layer.get("a") == "a"
+    assert await layer.get("a") == "a"
+    assert costs["a"] >= 0.01
+
+
+def test_cost_benchmark():
+    costs, sizes = cost.key_costs(1000)
+    stream = [key % 100 for key in range(2000)]
+    max_bytes = sum(sizes[:100]) // 4
+
+    times = {name: cost.fetch_time(store, stream, costs) for name, store in cost.stores(max_bytes, sizes).items()}
+
+    assert times["gdsf"] < times["lru"]
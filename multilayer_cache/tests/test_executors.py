@@ -0,0 +1,95 @@
+from multilayer_cache import AsyncCacheLayer
+from multilayer_cache import BoundedExecutor
+from multilayer_cache import ExecutorSaturated
+from multilayer_cache import Metrics
+from multilayer_cache.util import to_async
+
+import asyncio
+import threading
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_bounded_executor_backpressure():
+    release = threading.Event()
+
+    with BoundedExecutor("disk", max_workers=2, max_queue=1) as executor:
+        blocked = to_async(release.wait, executor=executor)
+        tasks = [asyncio.create_task(blocked()) for _ in range(5)]
+        await asyncio.sleep(0.05)
+
+        stats = executor.stats()
+        assert (stats.active, stats.queued, stats.waiting) == (2, 1, 2)
+        assert stats.saturation == 1.0
+        assert stats.saturated == 2
+
+        release.set()
+        assert await asyncio.gather(*tasks) == [True] * 5
+
+        stats = executor.stats()
+        assert (stats.active, stats.queued, stats.waiting, stats.submitted) == (0, 0, 0, 5)
+
+
+@pytest.mark.asyncio
+async def test_bounded_executor_reject():
+    release = threading.Event()
+
+    with BoundedExecutor("sdk", max_workers=1, max_queue=0, block=False) as executor:
+        running = asyncio.create_task(executor.run(release.wait))
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(ExecutorSaturated):
+            await executor.run(release.wait)
+
+        release.set()
+        await running
+        assert executor.stats().rejected == 1
+        # The slot is free again
+        assert await executor.run(lambda: 1) == 1
+
+
+@pytest.mark.asyncio
+async def test_bounded_executor_cancel_waiting():
+    release = threading.Event()
+
+    with BoundedExecutor("disk", max_workers=1, max_queue=0) as executor:
+        running = asyncio.create_task(executor.run(release.wait))
+        waiting = asyncio.create_task(executor.run(lambda: "waited"))
+        await asyncio.sleep(0.01)
+
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+        assert executor.stats().waiting == 0
+        release.set()
+        await running
+        assert await executor.run(lambda: "next") == "next"
+        assert executor.stats().queued == 0
+
+
+@pytest.mark.asyncio
+async def test_layer_executors():
+    metrics = Metrics()
+    store = {}
+    files = {"a": "A"}
+
+    with BoundedExecutor("store", max_workers=1, metrics=metrics) as store_executor, \
+            BoundedExecutor("bucket", max_workers=4, metrics=metrics) as bucket_executor:
+        layer = AsyncCacheLayer(
+            "cached_files",
+            get_cache_value=to_async(store.get, executor=store_executor),
+            set_cache_value=to_async(store.__setitem__, executor=store_executor),
+            source=to_async(files.get, executor=bucket_executor),
+        )
+
+        assert await layer.get("a") == "A"
+        assert await layer.get("a") == "A"
+
+    assert store_executor.stats().submitted == 3
+    assert bucket_executor.stats().submitted == 1
+
+    rendered = metrics.render()
+    assert 'multilayer_cache_executor_submitted_total{executor="store"} 3' in rendered
+    assert 'multilayer_cache_executor_active{executor="bucket"} 0' in rendered
@@ -0,0 +1,270 @@
+from multilayer_cache import cache_layer
+from multilayer_cache import async_cache_layer
+from multilayer_cache import KEY_NOT_FOUND
+from multilayer_cache import TTL
+from multilayer_cache import NegativeCache
+from multilayer_cache import CacheLayerEvent
+from multilayer_cache import CacheLayerInspect
+from multilayer_cache import CacheLayerInspectNegativeHit
+from multilayer_cache import StripedLock
+from multilayer_cache.util import to_async
+
+import time
+import threading
+from functools import partial
+
+import pytest
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def build_chain(clock: Clock, source: dict, source_calls: list, random=lambda: 0.0):
+    files_inner_cache = {}
+
+    def on_files_miss(key, default):
+        source_calls.append(key)
+        # The source takes a second
+        clock.now += 1
+        return source.get(key, default)
+
+    files_cache = partial(
+        cache_layer,
+        get_cache_value=lambda key, default: files_inner_cache.get(key, default),
+        set_cache_value=lambda key, value: files_inner_cache.update({key: value}),
+        on_cache_miss_source=on_files_miss,
+        get_identifier=lambda: "cached_files",
+        ttl=TTL(100, clock=clock, random=random),
+    )
+
+    def on_parsed_miss(key, default):
+        value = files_cache(get_cache_key=lambda: key, get_default=lambda: default)
+        return default if value is default else value.upper()
+
+    parsed_inner_cache = {}
+
+    return partial(
+        cache_layer,
+        get_cache_value=lambda key, default: parsed_inner_cache.get(key, default),
+        set_cache_value=lambda key, value: parsed_inner_cache.update({key: value}),
+        on_cache_miss_source=on_parsed_miss,
+        get_default=lambda: KEY_NOT_FOUND,
+        get_identifier=lambda: "parsed_cached_files",
+        ttl=TTL(10, clock=clock, random=random),
+    )
+
+
+def test_ttl_nested():
+    clock = Clock()
+    source = {"a": "a"}
+    source_calls = []
+
+    parsed_cache = build_chain(clock, source, source_calls)
+
+    assert parsed_cache(get_cache_key=lambda: "a") == "A"
+    assert source_calls == ["a"]
+
+    clock.now += 5
+    source["a"] = "b"
+    assert parsed_cache(get_cache_key=lambda: "a") == "A"
+
+    # Expired at the outer layer, re-derived from the still fresh inner layer
+    clock.now += 10
+    assert parsed_cache(get_cache_key=lambda: "a") == "A"
+    assert source_calls == ["a"]
+
+    # Expired at both layers
+    clock.now += 100
+    assert parsed_cache(get_cache_key=lambda: "a") == "B"
+    assert source_calls == ["a", "a"]
+
+    # Gone from the source, the stale values are not served
+    del source["a"]
+    clock.now += 200
+    assert parsed_cache(get_cache_key=lambda: "a") is KEY_NOT_FOUND
+    assert parsed_cache(get_cache_key=lambda: "a") is KEY_NOT_FOUND
+
+
+@pytest.mark.parametrize("negative_cache", [None, NegativeCache()])
+def test_ttl_locks_gone_from_source(negative_cache):
+    clock = Clock()
+    source = {"a": "A"}
+    source_calls = []
+    release = threading.Event()
+    inner_cache = {}
+
+    def on_cache_miss(key, default):
+        source_calls.append(key)
+
+        if len(source_calls) > 1:
+            release.wait()
+
+        return source.get(key, default)
+
+    cache = partial(
+        cache_layer,
+        get_cache_key=lambda: "a",
+        get_cache_value=lambda key, default: inner_cache.get(key, default),
+        set_cache_value=lambda key, value: inner_cache.update({key: value}),
+        on_cache_miss_source=on_cache_miss,
+        get_default=lambda: KEY_NOT_FOUND,
+        get_identifier=lambda: "layer",
+        locks=StripedLock(),
+        ttl=TTL(10, clock=clock, random=lambda: 0.0),
+        negative_cache=negative_cache,
+    )
+
+    assert cache() == "A"
+
+    del source["a"]
+    clock.now += 20
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache())) for _ in range(2)]
+
+    # One thread calls the source, the other waits for the lock with the expired entry
+    for thread in threads:
+        thread.start()
+
+    time.sleep(0.05)
+    release.set()
+
+    for thread in threads:
+        thread.join()
+
+    # The stale value is not served to the waiting thread
+    assert results == [KEY_NOT_FOUND, KEY_NOT_FOUND]
+    assert len(source_calls) == (2 if negative_cache is not None else 3)
+
+
+def test_ttl_early_refresh():
+    clock = Clock()
+    ttl = TTL(10, clock=clock, random=lambda: 0.9)
+
+    # Took a second to compute, expires at 10
+    ttl.record("a", 1.0)
+
+    clock.now = 7
+    assert not ttl.expired("a")
+
+    # -log(1 - 0.9) is ~2.3 seconds of computation ahead of the deadline
+    clock.now = 7.8
+    assert ttl.expired("a")
+
+    assert ttl.expired("never recorded")
+
+    clock.now = 100
+    ttl.purge()
+    assert len(ttl) == 0
+
+
+@pytest.mark.asyncio
+async def test_ttl_async():
+    clock = Clock()
+    inner_cache = {}
+    source_calls = []
+
+    async def on_cache_miss_source(key, default):
+        source_calls.append(key)
+        return key * 2
+
+    layer = partial(
+        async_cache_layer,
+        get_cache_key=to_async(lambda: "a"),
+        get_cache_value=to_async(lambda key, default: inner_cache.get(key, default)),
+        set_cache_value=to_async(lambda key, value: inner_cache.update({key: value})),
+        on_cache_miss_source=on_cache_miss_source,
+        get_default=to_async(lambda: KEY_NOT_FOUND),
+        get_identifier=to_async(lambda: "layer"),
+        ttl=TTL(10, clock=clock, random=lambda: 0.0),
+    )
+
+    assert await layer() == "aa"
+    assert await layer() == "aa"
+    assert source_calls == ["a"]
+
+    clock.now += 10
+    assert await layer() == "aa"
+    assert source_calls == ["a", "a"]
+
+
+def test_negative_cache():
+    clock = Clock()
+    source_calls = []
+    events: list[CacheLayerEvent] = []
+    inner_cache = {}
+
+    def on_cache_miss_source(key, default):
+        source_calls.append(key)
+        return default
+
+    negative_cache = NegativeCache(capacity=2, seconds=5, clock=clock)
+
+    layer = partial(
+        cache_layer,
+        get_cache_value=lambda key, default: inner_cache.get(key, default),
+        set_cache_value=lambda key, value: inner_cache.update({key: value}),
+        on_cache_miss_source=on_cache_miss_source,
+        get_default=lambda: KEY_NOT_FOUND,
+        get_identifier=lambda: "layer",
+        inspect=events.append,
+        negative_cache=negative_cache,
+    )
+
+    assert layer(get_cache_key=lambda: "x") is KEY_NOT_FOUND
+    assert layer(get_cache_key=lambda: "x") is KEY_NOT_FOUND
+    assert source_calls == ["x"]
+
+    match events:
+        case [
+            CacheLayerEvent("layer", "miss", "x"),
+            CacheLayerEvent("layer", "negative_hit", "x"),
+        ]:
+            pass
+        case _:
+            raise ValueError
+
+    match events[1].to_model():
+        case CacheLayerInspect(identifier="layer", value=CacheLayerInspectNegativeHit(key="x")):
+            pass
+        case _:
+            raise ValueError
+
+    # Expired
+    clock.now += 5
+    assert layer(get_cache_key=lambda: "x") is KEY_NOT_FOUND
+    assert source_calls == ["x", "x"]
+
+    # Bounded
+    layer(get_cache_key=lambda: "y")
+    layer(get_cache_key=lambda: "z")
+    assert len(negative_cache) == 2
+    assert "x" not in negative_cache
+
+
+@pytest.mark.asyncio
+async def test_negative_cache_async():
+    source_calls = []
+
+    async def on_cache_miss_source(key, default):
+        source_calls.append(key)
+        return default
+
+    layer = partial(
+        async_cache_layer,
+        get_cache_key=to_async(lambda: "x"),
+        get_cache_value=to_async(lambda key, default: default),
+        set_cache_value=to_async(lambda key, value: None),
+        on_cache_miss_source=on_cache_miss_source,
+        get_default=to_async(lambda: KEY_NOT_FOUND),
+        get_identifier=to_async(lambda: "layer"),
+        negative_cache=NegativeCache(),
+    )
+
+    assert await layer() is KEY_NOT_FOUND
+    assert await layer() is KEY_NOT_FOUND
+    assert source_calls == ["x"]
@@ -0,0 +1,124 @@
+from multilayer_cache import KEY_NOT_FOUND
+from multilayer_cache import CacheLayer
+from multilayer_cache import AsyncCacheLayer
+from multilayer_cache import CacheLayerEvent
+from multilayer_cache import NegativeCache
+from multilayer_cache.util import to_async
+from multilayer_cache.examples.parsed_files.defs import Bucket
+from multilayer_cache.examples.parsed_files.defs import JsonParser
+from multilayer_cache.examples.async_cached_files.defs import Bucket as AsyncBucket
+
+import json
+
+import pytest
+
+
+FILES = {
+    "a": json.dumps({"key": "a", "value": "a"}),
+    "b": json.dumps({"key": "b", "value": "b"}),
+}
+
+
+def test_layer_chain():
+    bucket = Bucket(files=FILES)
+    parser = JsonParser()
+    events: list[CacheLayerEvent] = []
+
+    cached_files_inner_cache = {}
+
+    cached_files = CacheLayer(
+        "cached_files",
+        get_cache_value=cached_files_inner_cache.get,
+        set_cache_value=cached_files_inner_cache.__setitem__,
+        source=bucket.get,
+        inspect=events.append,
+    )
+
+    parsed_cached_files_inner_cache = {}
+
+    parsed_cached_files = CacheLayer(
+        "parsed_cached_files",
+        get_cache_value=parsed_cached_files_inner_cache.get,
+        set_cache_value=parsed_cached_files_inner_cache.__setitem__,
+        source=cached_files,
+        source_key=lambda key: key[0],
+        transform=parser.parse,
+        serialize=json.dumps,
+        deserialize=json.loads,
+    )
+
+    assert parsed_cached_files.get(("a", parser.version())) == {"key": "a", "value": "a"}
+    assert parsed_cached_files.get(("a", parser.version())) == {"key": "a", "value": "a"}
+    assert parsed_cached_files.get(("c", parser.version())) is KEY_NOT_FOUND
+
+    default = object()
+    assert parsed_cached_files.get(("c", parser.version()), default) is default
+
+    assert cached_files_inner_cache == {"a": FILES["a"]}
+    assert parsed_cached_files_inner_cache == {("a", "0"): json.dumps({"key": "a", "value": "a"})}
+
+    assert events == [
+        CacheLayerEvent("cached_files", "miss", "a"),
+        CacheLayerEvent("cached_files", "miss", "c"),
+        CacheLayerEvent("cached_files", "miss", "c"),
+    ]
+
+    assert cached_files.get("b") == FILES["b"]
+
+
+def test_layer_options():
+    source_calls = []
+
+    def source(key, default):
+        source_calls.append(key)
+        return default
+
+    layer = CacheLayer(
+        "layer",
+        get_cache_value=lambda key, default: default,
+        set_cache_value=lambda key, value: None,
+        source=source,
+        negative_cache=NegativeCache(),
+    )
+
+    assert layer.get("x") is KEY_NOT_FOUND
+    assert layer.get("x") is KEY_NOT_FOUND
+    assert source_calls == ["x"]
+
+
+@pytest.mark.asyncio
+async def test_async_layer_chain():
+    bucket = AsyncBucket(files=FILES)
+    parser = JsonParser()
+    events: list[CacheLayerEvent] = []
+
+    cached_files_inner_cache = {}
+
+    cached_files = AsyncCacheLayer(
+        "cached_files",
+        get_cache_value=to_async(cached_files_inner_cache.get),
+        set_cache_value=to_async(cached_files_inner_cache.__setitem__),
+        source=bucket.get,
+    )
+
+    parsed_cached_files_inner_cache = {}
+
+    parsed_cached_files = AsyncCacheLayer(
+        "parsed_cached_files",
+        get_cache_value=to_async(parsed_cached_files_inner_cache.get),
+        set_cache_value=to_async(parsed_cached_files_inner_cache.__setitem__),
+        source=cached_files,
+        source_key=lambda key: key[0],
+        transform=parser.parse,
+        inspect=to_async(events.append),
+    )
+
+    assert await parsed_cached_files.get(("a", "0")) == {"key": "a", "value": "a"}
+    assert await parsed_cached_files.get(("a", "0")) == {"key": "a", "value": "a"}
+    assert await parsed_cached_files.get(("c", "0")) is KEY_NOT_FOUND
+
+    assert events == [
+        CacheLayerEvent("parsed_cached_files", "miss", ("a", "0")),
+        CacheLayerEvent("parsed_cached_files", "hit", ("a", "0")),
+        CacheLayerEvent("parsed_cached_files", "miss", ("c", "0")),
+    ]
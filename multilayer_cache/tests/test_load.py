@@ -0,0 +1,46 @@
+from multilayer_cache.benchmarks import load
+from multilayer_cache.benchmarks.workloads import SimulatedBucket
+from multilayer_cache.benchmarks.workloads import SourceError
+from multilayer_cache.benchmarks.workloads import constant
+from multilayer_cache.benchmarks.workloads import zipf_stream
+from multilayer_cache.benchmarks.workloads import scan_stream
+
+import pytest
+
+
+def test_simulated_bucket():
+    bucket = SimulatedBucket({"a": "A"}, error_rate=1.0)
+
+    with pytest.raises(SourceError):
+        bucket.get("a", None)
+
+    bucket = SimulatedBucket({"a": "A"})
+    assert bucket.get("a", None) == "A"
+    assert bucket.get("b", None) is None
+    assert bucket.calls == 2
+
+
+def test_load_sync():
+    bucket = SimulatedBucket(load.build_files(100), latency=constant(0.001), concurrency=4)
+    keys = scan_stream(100, 300)
+
+    result = load.run_sync(load.sync_chain(bucket, capacity=100), keys, threads=8, bucket=bucket)
+
+    assert result.requests == 300
+    assert result.errors == 0
+    # Every key is fetched once, later scans hit
+    assert result.source_calls == 100
+    assert result.max_source_in_flight <= 4
+    assert result.p99_ms >= result.p50_ms
+
+
+@pytest.mark.asyncio
+async def test_load_async():
+    bucket = SimulatedBucket(load.build_files(50), latency=constant(0.001), error_rate=0.1, seed=0)
+    keys = zipf_stream(50, 500)
+
+    result = await load.run_async(load.async_chain(bucket, capacity=50), keys, concurrency=32, bucket=bucket)
+
+    assert result.requests == 500
+    assert result.source_calls <= 50 + result.source_errors
+    assert result.errors >= result.source_errors
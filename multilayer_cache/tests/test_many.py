@@ -0,0 +1,125 @@
+from multilayer_cache import KEY_NOT_FOUND
+from multilayer_cache import CacheLayerEvent
+from multilayer_cache.util import to_async
+from multilayer_cache.examples.parsed_files.defs import BlobId
+from multilayer_cache.examples.parsed_files.defs import ParserVersion
+from multilayer_cache.examples.parsed_files.defs import Bucket
+from multilayer_cache.examples.parsed_files.defs import JsonParser
+from multilayer_cache.examples.parsed_files import parsed_cached_files
+from multilayer_cache.examples.parsed_files import cached_files
+from multilayer_cache.examples.async_cached_files.defs import Bucket as AsyncBucket
+from multilayer_cache.examples.async_cached_files import cached_files as async_cached_files
+
+import json
+from functools import partial
+
+import pytest
+
+
+FILES = {
+    "a": json.dumps({"key": "a", "value": "a"}),
+    "b": json.dumps({"key": "b", "value": "b"}),
+    "c": json.dumps({"key": "c", "value": "c"}),
+}
+
+
+class RecordingBucket(Bucket):
+    requested: list[list[BlobId]] = []
+
+    def get_many(self, blob_ids, default):
+        self.requested.append(list(blob_ids))
+        return super().get_many(blob_ids, default)
+
+
+def test_many_nested():
+    inspect_queue: list[CacheLayerEvent] = []
+
+    bucket = RecordingBucket(files=FILES)
+    parser = JsonParser()
+
+    cached_files_inner_cache = {"a": FILES["a"]}
+
+    cached_files_cache = partial(
+        cached_files.cache_layer_many_partial,
+        get_cache_values=cached_files.bakein_get_cache_values(cached_files_inner_cache),
+        set_cache_values=cached_files.bakein_set_cache_values(cached_files_inner_cache),
+        on_cache_miss_source_many=cached_files.bakein_on_cache_miss_source_many(bucket),
+        inspect=inspect_queue.append,
+    )
+
+    def on_cache_miss_source_many(cache_keys: list[tuple[BlobId, ParserVersion]], default):
+        values = cached_files_cache(
+            get_cache_keys=lambda: [blob_id for blob_id, _ in cache_keys],
+            get_default=lambda: default,
+        )
+
+        return [default if value is default else parser.parse(value) for value in values]
+
+    parsed_cached_files_inner_cache = {("b", "0"): json.dumps({"key": "b", "value": "b"})}
+
+    parsed_cached_files_cache = partial(
+        parsed_cached_files.cache_layer_many_partial,
+        get_cache_values=parsed_cached_files.bakein_get_cache_values(parsed_cached_files_inner_cache),
+        set_cache_values=parsed_cached_files.bakein_set_cache_values(parsed_cached_files_inner_cache),
+        on_cache_miss_source_many=on_cache_miss_source_many,
+        inspect=inspect_queue.append,
+    )
+
+    keys = [(blob_id, parser.version()) for blob_id in ["c", "a", "b", "x", "c"]]
+
+    result = parsed_cached_files_cache(get_cache_keys=lambda: keys)
+
+    assert result == [
+        {"key": "c", "value": "c"},
+        {"key": "a", "value": "a"},
+        {"key": "b", "value": "b"},
+        KEY_NOT_FOUND,
+        {"key": "c", "value": "c"},
+    ]
+
+    # Only keys missing from every layer reach the bucket
+    assert bucket.requested == [["c", "x"]]
+
+    match inspect_queue:
+        case [
+            CacheLayerEvent("parsed_cached_files", "miss", ("c", "0")),
+            CacheLayerEvent("parsed_cached_files", "miss", ("a", "0")),
+            CacheLayerEvent("parsed_cached_files", "hit", ("b", "0")),
+            CacheLayerEvent("parsed_cached_files", "miss", ("x", "0")),
+            CacheLayerEvent("parsed_cached_files", "miss", ("c", "0")),
+            CacheLayerEvent("cached_files", "miss", "c"),
+            CacheLayerEvent("cached_files", "hit", "a"),
+            CacheLayerEvent("cached_files", "miss", "x"),
+        ]:
+            pass
+        case _:
+            raise ValueError
+
+    assert set(cached_files_inner_cache) == {"a", "c"}
+    assert set(parsed_cached_files_inner_cache) == {("a", "0"), ("b", "0"), ("c", "0")}
+
+    inspect_queue.clear()
+
+    result = parsed_cached_files_cache(get_cache_keys=lambda: keys[:3])
+
+    assert [value["key"] for value in result] == ["c", "a", "b"]
+    assert bucket.requested == [["c", "x"]]
+
+
+@pytest.mark.asyncio
+async def test_many_async():
+    bucket = AsyncBucket(files=FILES)
+
+    inner_cache = {}
+
+    cache = partial(
+        async_cached_files.cache_layer_many_partial,
+        get_cache_values=async_cached_files.bakein_get_cache_values(inner_cache),
+        set_cache_values=async_cached_files.bakein_set_cache_values(inner_cache),
+        on_cache_miss_source_many=async_cached_files.bakein_on_cache_miss_source_many(bucket),
+    )
+
+    result = await cache(get_cache_keys=to_async(lambda: ["a", "x"]))
+
+    assert result == [FILES["a"], KEY_NOT_FOUND]
+    assert inner_cache == {"a": FILES["a"]}
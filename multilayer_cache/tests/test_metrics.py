@@ -0,0 +1,109 @@
+from multilayer_cache import async_cache_layer
+from multilayer_cache import KEY_NOT_FOUND
+from multilayer_cache import CacheLayer
+from multilayer_cache import Metrics
+from multilayer_cache import NegativeCache
+from multilayer_cache.util import to_async
+
+import json
+from functools import partial
+
+import pytest
+
+
+def test_metrics_chain():
+    metrics = Metrics()
+    source = {"a": json.dumps({"key": "a"})}
+
+    def bucket_get(key, default):
+        if key == "boom":
+            raise RuntimeError("source is down")
+        return source.get(key, default)
+
+    cached_files_inner_cache = {}
+    cached_files = CacheLayer(
+        "cached_files",
+        cached_files_inner_cache.get,
+        cached_files_inner_cache.__setitem__,
+        source=bucket_get,
+        metrics=metrics,
+    )
+
+    parsed_inner_cache = {}
+    parsed = CacheLayer(
+        "parsed_cached_files",
+        parsed_inner_cache.get,
+        parsed_inner_cache.__setitem__,
+        source=cached_files,
+        transform=json.loads,
+        negative_cache=NegativeCache(),
+        metrics=metrics,
+    )
+
+    for _ in range(3):
+        assert parsed.get("a") == {"key": "a"}
+
+    assert parsed.get("c") is KEY_NOT_FOUND
+    assert parsed.get("c") is KEY_NOT_FOUND
+
+    with pytest.raises(RuntimeError):
+        parsed.get("boom")
+
+    files = metrics.layers["cached_files"]
+    assert (files.hits, files.misses, files.source_calls, files.not_found, files.errors) == (0, 3, 3, 1, 1)
+
+    layer = metrics.layers["parsed_cached_files"]
+    assert (layer.hits, layer.misses, layer.negative_hits, layer.source_calls, layer.not_found, layer.errors) == (2, 3, 1, 3, 1, 1)
+    assert layer.lookup.count == 6
+    assert layer.transform.count == 1
+    assert layer.hit_ratio == 0.5
+
+    text = metrics.render()
+
+    assert 'multilayer_cache_lookups_total{layer="parsed_cached_files",result="hit"} 2' in text
+    assert 'multilayer_cache_lookups_total{layer="parsed_cached_files",result="negative_hit"} 1' in text
+    assert 'multilayer_cache_source_calls_total{layer="cached_files"} 3' in text
+    assert 'multilayer_cache_errors_total{layer="cached_files"} 1' in text
+    assert 'multilayer_cache_lookup_seconds_bucket{layer="parsed_cached_files",le="+Inf"} 6' in text
+    assert 'multilayer_cache_transform_seconds_count{layer="parsed_cached_files"} 1' in text
+    assert "# TYPE multilayer_cache_source_seconds histogram" in text
+
+
+@pytest.mark.asyncio
+async def test_metrics_async_sampling():
+    metrics = Metrics(sample_every=2)
+    inner_cache = {}
+
+    layer = partial(
+        async_cache_layer,
+        get_cache_value=to_async(lambda key, default: inner_cache.get(key, default)),
+        set_cache_value=to_async(lambda key, value: inner_cache.update({key: value})),
+        on_cache_miss_source=to_async(lambda key, default: key),
+        get_default=to_async(lambda: KEY_NOT_FOUND),
+        get_identifier=to_async(lambda: "layer"),
+        metrics=metrics,
+    )
+
+    for key in range(4):
+        await layer(get_cache_key=to_async(lambda: key))
+        await layer(get_cache_key=to_async(lambda: key))
+
+    metrics = metrics.layers["layer"]
+    assert (metrics.hits, metrics.misses, metrics.source_calls) == (4, 4, 4)
+    # Counters are exact, latencies sampled
+    assert (metrics.lookup.count, metrics.source.count) == (4, 2)
+
+
+def test_metrics_sampling_per_histogram():
+    metrics = Metrics(sample_every=3)
+    layer = CacheLayer(
+        "layer", lambda key, default: default, lambda key, value: None,
+        source=lambda key, default: key, transform=str, metrics=metrics,
+    )
+
+    for key in range(300):
+        layer.get(key)
+
+    # Every lookup misses and transforms, each histogram samples 1 in 3 of its own
+    layer = metrics.layers["layer"]
+    assert (layer.lookup.count, layer.source.count, layer.transform.count) == (100, 100, 100)
@@ -0,0 +1,78 @@
+from multilayer_cache import AsyncCacheLayer
+from multilayer_cache import ProcessTransform
+from multilayer_cache import Metrics
+from multilayer_cache.util import to_async
+
+import json
+import asyncio
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_process_transform_batches():
+    with ProcessTransform(json.loads, max_workers=2, max_batch=4) as parse:
+        documents = [json.dumps({"key": i}) for i in range(10)]
+
+        results = await asyncio.gather(*(parse(document) for document in documents))
+
+        assert results == [{"key": i} for i in range(10)]
+        # The first 8 calls fill a batch of 4 per worker, the last 2 are split between the workers
+        assert parse.batches == 4
+        assert parse.values == 10
+
+
+@pytest.mark.asyncio
+async def test_process_transform_errors():
+    with ProcessTransform(int, max_workers=1) as to_int:
+        ok, failed = await asyncio.gather(to_int("1"), to_int("x"), return_exceptions=True)
+
+        assert ok == 1
+        assert isinstance(failed, ValueError)
+
+
+@pytest.mark.asyncio
+async def test_process_transform_shared_memory():
+    with ProcessTransform(len, max_workers=1, shared_memory_threshold=1024) as measure:
+        large = "é" * 10_000
+
+        assert await measure(large) == 10_000
+        assert await measure(b"\0" * 4096) == 4096
+        assert await measure("small") == 5
+        assert measure.shared == 2
+
+
+@pytest.mark.asyncio
+async def test_layer_process_transform():
+    metrics = Metrics()
+    files = {"a": json.dumps({"key": "a"}), "b": json.dumps({"key": "b"})}
+    store = {}
+
+    with ProcessTransform(json.loads, max_workers=2) as parse:
+        layer = AsyncCacheLayer(
+            "parsed_cached_files",
+            get_cache_value=to_async(store.get),
+            set_cache_value=to_async(store.__setitem__),
+            source=to_async(files.get),
+            transform=parse,
+            metrics=metrics,
+        )
+
+        assert await asyncio.gather(layer.get("a"), layer.get("b"), layer.get("c")) == [
+            {"key": "a"}, {"key": "b"}, layer.default,
+        ]
+
+    assert store == {"a": {"key": "a"}, "b": {"key": "b"}}
+    assert metrics.layer("parsed_cached_files").transform.count == 2
+
+
+@pytest.mark.asyncio
+async def test_process_transform_keeps_batches_referenced():
+    with ProcessTransform(str.upper, max_batch=2) as transform:
+        results = asyncio.gather(*(transform(value) for value in "abc"))
+        await asyncio.sleep(0)
+
+        assert len(transform._tasks) == 2
+        assert await results == ["A", "B", "C"]
+        await asyncio.sleep(0)
+        assert not transform._tasks
@@ -3,6 +3,7 @@ from multilayer_cache import KEY_NOT_FOUND
 from multilayer_cache import CacheLayerInspect
 from multilayer_cache import CacheLayerInspectHit
 from multilayer_cache import CacheLayerInspectMiss
+from multilayer_cache import CacheLayerEvent
 from multilayer_cache.examples.parsed_files.defs import BlobId
 from multilayer_cache.examples.parsed_files.defs import ParserVersion
 from multilayer_cache.examples.parsed_files.defs import FileContents
@@ -36,9 +37,9 @@ def test_foo():
 
     inspect_queue: list[CacheLayerInspect] = []
 
-    def inspect(value: CacheLayerInspect):
+    def inspect(value: CacheLayerEvent):
         print(repr(value))
-        inspect_queue.append(value)
+        inspect_queue.append(value.to_model())
 
     log = lambda value: print(value)
 
@@ -0,0 +1,123 @@
+from multilayer_cache import AsyncCacheLayer
+from multilayer_cache import KEY_NOT_FOUND
+from multilayer_cache import async_cache_layer_many
+from multilayer_cache.stores import RESPStore
+from multilayer_cache.stores import RESPPool
+from multilayer_cache.stores import RESPError
+from multilayer_cache.stores import RESPServer
+from multilayer_cache.stores.resp import _Connection
+from multilayer_cache.util import to_async
+from multilayer_cache.examples.async_cached_files.defs import Bucket
+
+import asyncio
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_resp_store():
+    async with RESPServer() as server, RESPStore(*server.address, pool_size=2) as store:
+        await store.set("a", "A")
+        await store.set_many({("b", "0"): {"parsed": True}, "c": b"C"})
+
+        assert await store.get("a", None) == "A"
+        assert await store.get("missing", None) is None
+        assert await store.get_many(["a", ("b", "0"), "missing", "c"], None) == ["A", {"parsed": True}, None, b"C"]
+
+        await store.delete("a")
+        assert await store.get("a", None) is None
+
+        with pytest.raises(RESPError):
+            await store.pool.call("NOPE")
+
+
+@pytest.mark.asyncio
+async def test_resp_pool_pipelining():
+    async with RESPServer() as server:
+        for pipeline in (True, False):
+            pool = RESPPool(*server.address, size=2, pipeline=pipeline)
+            replies = await asyncio.gather(*(pool.call("SET", f"{pipeline}-{i}", i) for i in range(100)))
+            assert replies == ["OK"] * 100
+            assert await pool.call("GET", f"{pipeline}-42") == b"42"
+            assert sum(connection is not None for connection in pool._connections) == 2
+            await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_resp_store_ttl():
+    async with RESPServer() as server, RESPStore(*server.address, ttl=0.05) as store:
+        await store.set_many({"a": "A", "b": "B"})
+        assert await store.get("a", None) == "A"
+        await asyncio.sleep(0.1)
+        assert await store.get_many(["a", "b"], None) == [None, None]
+
+
+@pytest.mark.asyncio
+async def test_resp_store_unreachable():
+    server = await RESPServer().start()
+    address = server.address
+    await server.close()
+
+    store = RESPStore(*address)
+    with pytest.raises(OSError):
+        await store.get("a", None)
+
+
+@pytest.mark.asyncio
+async def test_resp_connection_lost():
+    async def drop(reader, writer):
+        # Reads one command and hangs up without replying
+        await reader.read(1)
+        writer.close()
+
+    server = await asyncio.start_server(drop, "127.0.0.1", 0)
+    host, port = server.sockets[0].getsockname()[:2]
+
+    try:
+        connection = _Connection(*await asyncio.open_connection(host, port))
+
+        with pytest.raises(ConnectionError):
+            await asyncio.gather(connection.call(b"*1\r\n$4\r\nPING\r\n"), connection.call(b"*1\r\n$4\r\nPING\r\n"))
+
+        await asyncio.sleep(0)
+        assert connection.closed and connection.pending == 0
+        assert connection._writer.is_closing()
+        assert connection._task.done() and not connection._task.cancelled()
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_resp_connection_close():
+    async with RESPServer() as server:
+        connection = _Connection(*await asyncio.open_connection(*server.address))
+        await connection.close()
+        await asyncio.sleep(0)
+
+        # Cancellation of the reader task is not swallowed
+        assert connection._task.cancelled()
+
+        with pytest.raises(ConnectionError):
+            await connection.call(b"*1\r\n$4\r\nPING\r\n")
+
+
+@pytest.mark.asyncio
+async def test_resp_store_layers():
+    bucket = Bucket(files={"a": "A", "b": "B"})
+
+    async with RESPServer() as server, RESPStore(*server.address) as store:
+        cached_files = AsyncCacheLayer("cached_files", store.get, store.set, source=bucket.get)
+        assert await cached_files.get("a") == "A"
+        assert server.data
+
+        values = await async_cache_layer_many(
+            get_cache_keys=to_async(lambda: ["a", "b", "c"]),
+            get_cache_values=store.get_many,
+            set_cache_values=store.set_many,
+            on_cache_miss_source_many=bucket.get_many,
+            get_default=to_async(lambda: KEY_NOT_FOUND),
+            get_identifier=to_async(lambda: "cached_files"),
+        )
+        assert values == ["A", "B", KEY_NOT_FOUND]
+        assert await store.get("b", None) == "B"
@@ -0,0 +1,194 @@
+from multilayer_cache import CacheLayer
+from multilayer_cache.stores import HashRing
+from multilayer_cache.stores import LRUStore
+from multilayer_cache.stores import ShardedStore
+from multilayer_cache.stores import AsyncShardedStore
+from multilayer_cache.stores import RESPServer
+from multilayer_cache.stores import RESPStore
+from multilayer_cache.examples.parsed_files.defs import Bucket
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+
+class UnreachableStore(LRUStore):
+    def get(self, key, default):
+        raise ConnectionRefusedError
+
+    def set(self, key, value):
+        raise ConnectionRefusedError
+
+    def get_many(self, keys, default):
+        raise ConnectionRefusedError
+
+
+class FlakyStore(LRUStore):
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        self.down = False
+
+    def _check(self):
+        if self.down:
+            raise ConnectionRefusedError
+
+    def get(self, key, default):
+        self._check()
+        return super().get(key, default)
+
+    def set(self, key, value):
+        self._check()
+        super().set(key, value)
+
+    def delete(self, key):
+        self._check()
+        super().delete(key)
+
+    def set_many(self, items):
+        self._check()
+        super().set_many(items)
+
+
+class AsyncNode:
+    def __init__(self, store):
+        self.store = store
+
+    async def get(self, key, default):
+        return self.store.get(key, default)
+
+    async def set(self, key, value):
+        self.store.set(key, value)
+
+    async def delete(self, key):
+        self.store.delete(key)
+
+
+def test_hash_ring_moves_few_keys():
+    keys = [repr(i).encode() for i in range(10_000)]
+    ring = HashRing({f"node-{n}": n for n in range(4)})
+    before = [ring.name_for(key) for key in keys]
+
+    # Keys spread over all nodes
+    assert {name: before.count(name) > 1500 for name in ring.nodes} == {name: True for name in ring.nodes}
+
+    ring.add("node-4", 4)
+    after = [ring.name_for(key) for key in keys]
+    moved = [(b, a) for b, a in zip(before, after) if b != a]
+
+    # Only keys taken over by the new node move, about a fifth of them
+    assert all(a == "node-4" for _, a in moved)
+    assert 1000 < len(moved) < 3000
+
+
+def test_sharded_store():
+    nodes = {f"node-{n}": LRUStore(1000) for n in range(3)}
+
+    with ThreadPoolExecutor(3) as executor:
+        store = ShardedStore(nodes, executor=executor)
+        store.set_many({i: f"value-{i}" for i in range(300)})
+
+        assert store.get(7, None) == "value-7"
+        assert store.get_many([1, 2, 500, 299], None) == ["value-1", "value-2", None, "value-299"]
+        assert len(store) == 300
+        assert all(len(node) > 50 for node in nodes.values())
+        assert 7 in nodes[store.node_name(7)]
+
+
+def test_sharded_store_unreachable_node():
+    now = [0.0]
+    nodes = {"up": LRUStore(100), "down": UnreachableStore(100)}
+    store = ShardedStore(nodes, retry_after=5, clock=lambda: now[0])
+
+    keys = list(range(50))
+    store.set_many({key: key for key in keys})
+    values = store.get_many(keys, None)
+
+    # Keys of the unreachable node miss, the others hit
+    for key, value in zip(keys, values):
+        assert value == (None if store.node_name(key) == "down" else key)
+
+    failures = store.failures["down"]
+    down_key = next(key for key in keys if store.node_name(key) == "down")
+    assert store.get(down_key, None) is None
+    # Skipped while down
+    assert store.failures["down"] == failures
+
+    now[0] = 10
+    assert store.get(down_key, None) is None
+    assert store.failures["down"] == failures + 1
+
+
+def test_sharded_store_writes_during_outage():
+    now = [0.0]
+    node = FlakyStore(100)
+    store = ShardedStore({"node": node}, retry_after=5, clock=lambda: now[0])
+
+    store.set_many({"a": "old", "b": "old", "c": "old"})
+
+    node.down = True
+    store.set("a", "new")
+    store.delete("b")
+    store.set_many({"c": "new"})
+    node.down = False
+
+    # Skipped while down, then the node's values older than the dropped writes are gone
+    assert store.get("a", None) is None
+    now[0] = 10
+    assert store.get_many(["a", "b", "c"], None) == [None, None, None]
+
+    store.set("a", "new")
+    assert store.get("a", None) == "new"
+    assert not store._stale
+
+
+def test_sharded_store_layer():
+    bucket = Bucket(files={"a": "A", "b": "B"})
+    store = ShardedStore({f"node-{n}": LRUStore(10) for n in range(2)})
+    cached_files = CacheLayer("cached_files", store.get, store.set, source=bucket.get)
+
+    assert [cached_files.get(key) for key in "abab"] == ["A", "B", "A", "B"]
+    assert store.stats.hits == 2
+
+
+@pytest.mark.asyncio
+async def test_async_sharded_store():
+    servers = [await RESPServer().start() for _ in range(3)]
+    stores = {f"node-{n}": RESPStore(*server.address) for n, server in enumerate(servers)}
+
+    try:
+        store = AsyncShardedStore(stores)
+        await store.set_many({i: i * 2 for i in range(100)})
+
+        assert await store.get(21, None) == 42
+        assert all(server.data for server in servers)
+
+        # A stopped node degrades to misses
+        await stores["node-1"].close()
+        await servers[1].close()
+        values = await store.get_many(list(range(100)), None)
+
+        for key, value in enumerate(values):
+            assert value == (None if store.node_name(key) == "node-1" else key * 2)
+
+        assert store.failures == {"node-1": 1}
+    finally:
+        for node in stores.values():
+            await node.close()
+        for server in servers:
+            await server.close()
+
+
+@pytest.mark.asyncio
+async def test_async_sharded_store_writes_during_outage():
+    node = FlakyStore(100)
+    store = AsyncShardedStore({"node": AsyncNode(node)}, retry_after=0)
+
+    await store.set("a", "old")
+
+    node.down = True
+    await store.set("a", "new")
+    node.down = False
+
+    assert await store.get("a", None) is None
+    assert "a" not in node
+
@@ -0,0 +1,140 @@
+from multilayer_cache import CacheLayer
+from multilayer_cache.stores import SharedMemoryStore
+from multilayer_cache.examples.parsed_files.defs import Bucket
+
+import uuid
+import multiprocessing
+
+import pytest
+
+
+@pytest.fixture
+def name():
+    return f"mlc-test-{uuid.uuid4().hex[:12]}"
+
+
+def worker(name: str, keys: list[str]):
+    store = SharedMemoryStore(name)
+
+    for key in keys:
+        store.set(key, {"key": key})
+
+    store.close()
+
+
+def test_shared_memory_store(name):
+    store = SharedMemoryStore(name, create=True, slots=64, arena_bytes=64 * 1024, page_size=4096)
+
+    try:
+        attached = SharedMemoryStore(name)
+
+        store.set("a", "A")
+        store.set(("b", "0"), {"parsed": True})
+        assert attached.get("a", None) == "A"
+        assert attached.get(("b", "0"), None) == {"parsed": True}
+        assert attached.get("c", None) is None
+
+        attached.set("a", "A" * 1000)
+        attached.delete(("b", "0"))
+        assert store.get("a", None) == "A" * 1000
+        assert ("b", "0") not in store
+        assert len(store) == 1
+
+        # Larger than a page
+        store.set("large", "x" * 5000)
+        assert store.rejected == 1 and "large" not in store
+
+        attached.close()
+    finally:
+        store.close()
+        store.unlink()
+
+
+def test_shared_memory_store_eviction(name):
+    store = SharedMemoryStore(name, create=True, slots=64, arena_bytes=8192, page_size=4096)
+
+    try:
+        for i in range(200):
+            store.set(i, "x" * 100)
+            assert store.get(i, None) == "x" * 100
+
+        # At most three quarters of the slots are used
+        assert 0 < len(store) <= 48
+        assert store.stats.evictions >= 200 - 48
+        assert sum(store.get(i, None) is not None for i in range(200)) == len(store)
+    finally:
+        store.close()
+        store.unlink()
+
+
+def test_shared_memory_store_rejected_write_drops_old_value(name):
+    store = SharedMemoryStore(name, create=True, slots=64, arena_bytes=8192, page_size=4096)
+
+    try:
+        store.set("k", "old")
+        store.set("k", "x" * 10000)
+
+        # The old value would be stale
+        assert store.get("k", None) is None
+        assert store.rejected == 1 and len(store) == 0
+    finally:
+        store.close()
+        store.unlink()
+
+    with pytest.raises(ValueError):
+        SharedMemoryStore(name, create=True, arena_bytes=256 * 4096, page_size=4096)
+
+
+def test_shared_memory_store_eviction_by_size_class(name):
+    # Few large entries among the default slots
+    store = SharedMemoryStore(name, create=True, arena_bytes=8 * 1024 * 1024)
+    value = "x" * 200_000
+
+    try:
+        for i in range(200):
+            store.set(i, value)
+
+        assert store.rejected == 0
+        assert store.stats.evictions == 200 - len(store)
+        # Eviction is approximate LRU: nearly all of the newest entries are stored
+        newest = sum(store.get(i, None) == value for i in range(200 - len(store), 200))
+        assert len(store) == 32 and newest >= 24
+        assert store.get(199, None) == value
+    finally:
+        store.close()
+        store.unlink()
+
+
+def test_shared_memory_store_processes(name):
+    store = SharedMemoryStore(name, create=True, slots=1024, arena_bytes=1024 * 1024, page_size=64 * 1024)
+
+    try:
+        context = multiprocessing.get_context("fork")
+        processes = [context.Process(target=worker, args=(name, [f"{p}-{i}" for i in range(100)])) for p in range(4)]
+
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+            assert process.exitcode == 0
+
+        assert len(store) == 400
+        assert store.get("3-99", None) == {"key": "3-99"}
+    finally:
+        store.close()
+        store.unlink()
+
+
+def test_shared_memory_store_layer(name):
+    bucket = Bucket(files={"a": "A"})
+
+    with SharedMemoryStore(name, create=True, slots=64, arena_bytes=64 * 1024, page_size=4096) as store:
+        first = CacheLayer("cached_files", store.get, store.set, source=bucket.get)
+        assert first.get("a") == "A"
+
+        # Another worker's layer hits what the first one fetched
+        with SharedMemoryStore(name) as attached:
+            second = CacheLayer("cached_files", attached.get, attached.set, source=Bucket(files={}).get)
+            assert second.get("a") == "A"
+
+        store.unlink()
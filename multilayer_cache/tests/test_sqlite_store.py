@@ -0,0 +1,171 @@
+from multilayer_cache import CacheLayer
+from multilayer_cache import AsyncCacheLayer
+from multilayer_cache.stores import SQLiteStore
+from multilayer_cache.codecs import Codec
+from multilayer_cache.examples.parsed_files.defs import Bucket
+from multilayer_cache.examples.async_cached_files.defs import Bucket as AsyncBucket
+
+import sys
+import sqlite3
+import threading
+import subprocess
+
+import pytest
+
+
+FILES = {"a": "A" * 100, "b": "B" * 100}
+
+
+def test_sqlite_store_persists(tmp_path):
+    path = str(tmp_path / "cache.db")
+
+    with SQLiteStore(path, flush_interval=10) as store:
+        store.set("a", "A")
+        store.set_many({("b", "0"): {"parsed": True}, "c": "C"})
+        store.delete("c")
+
+        # Queued writes are visible before they are committed
+        assert store.get("a", None) == "A"
+        assert "c" not in store
+
+        store.flush()
+        assert len(store) == 2
+
+    with SQLiteStore(path) as store:
+        assert store.get_many(["a", ("b", "0"), "c"], None) == ["A", {"parsed": True}, None]
+        assert (store.stats.hits, store.stats.misses) == (2, 1)
+
+
+def test_sqlite_store_eviction(tmp_path):
+    path = str(tmp_path / "cache.db")
+    clock = iter(range(1000)).__next__
+
+    with SQLiteStore(path, max_bytes=1000, eviction_interval=0, clock=clock) as store:
+        # Pickled, three values fit
+        for i in range(3):
+            store.set(i, b"x" * 300)
+            store.flush()
+
+        # The first entry is read, so the second one is the least recently read
+        store.get(0, None)
+        store.set(3, b"x" * 300)
+        store.flush()
+
+        assert store.size() <= 1000
+        assert 0 in store and 3 in store
+        assert 1 not in store
+        assert store.stats.evictions == 1
+
+
+class TextCodec(Codec[str, str]):
+    def encode(self, value: str) -> str:
+        return value
+
+    def decode(self, value: str) -> str:
+        return value
+
+
+def test_sqlite_store_text_size(tmp_path):
+    path = str(tmp_path / "cache.db")
+
+    with SQLiteStore(path, codec=TextCodec()) as store:
+        # Sizes are of the UTF-8 payload, not of the str
+        store.set("a", "\u00e9" * 100)
+        store.flush()
+
+        assert store.size() == 200
+        assert store.get("a", None) == "\u00e9" * 100
+
+
+def test_sqlite_store_bad_codec(tmp_path):
+    path = str(tmp_path / "cache.db")
+
+    with SQLiteStore(path, codec=TextCodec()) as store:
+        with pytest.raises(TypeError):
+            store.set("a", 1)
+        with pytest.raises(TypeError):
+            store.set_many({"b": "B", "c": 1})
+
+        store.set("d", "D")
+        store.flush()
+        assert store.get_many(["a", "b", "c", "d"], None) == [None, None, None, "D"]
+
+        # The writer survives unexpected failures of a commit
+        commit = store._commit
+
+        def fail_once(pending, touched):
+            store._commit = commit
+            raise RuntimeError("unexpected")
+
+        store._commit = fail_once
+        store.set("e", "E")
+        store.flush()
+        store.set("f", "F")
+        store.flush()
+
+        assert store.errors == 1
+        assert "f" in store
+
+
+def test_sqlite_store_closes_readers(tmp_path):
+    path = str(tmp_path / "cache.db")
+    store = SQLiteStore(path, max_bytes=1000)
+    store.set("a", "A")
+    store.flush()
+
+    thread = threading.Thread(target=store.get, args=("a", None))
+    thread.start()
+    thread.join()
+    store.get("a", None)
+
+    readers = list(store._readers)
+    store.close()
+
+    assert len(readers) == 2
+    for connection in readers:
+        with pytest.raises(sqlite3.ProgrammingError):
+            connection.execute("SELECT 1")
+
+
+def test_sqlite_store_reader_process(tmp_path):
+    path = str(tmp_path / "cache.db")
+
+    with SQLiteStore(path) as store:
+        store.set("a", "A")
+        store.flush()
+
+        reader = (
+            "from multilayer_cache.stores import SQLiteStore\n"
+            f"store = SQLiteStore({path!r})\n"
+            "print(store.get('a', None))\n"
+            "store.close()\n"
+        )
+        result = subprocess.run([sys.executable, "-c", reader], capture_output=True, text=True, check=True)
+
+        assert result.stdout.strip() == "A"
+
+
+def test_sqlite_store_layer(tmp_path):
+    path = str(tmp_path / "cache.db")
+    bucket = Bucket(files=FILES)
+
+    with SQLiteStore(path) as store:
+        cached_files = CacheLayer("cached_files", store.get, store.set, source=bucket.get)
+        assert cached_files.get("a") == FILES["a"]
+
+    # A restart keeps the layer warm
+    with SQLiteStore(path) as store:
+        cached_files = CacheLayer("cached_files", store.get, store.set, source=Bucket(files={}).get)
+        assert cached_files.get("a") == FILES["a"]
+
+
+@pytest.mark.asyncio
+async def test_sqlite_store_async_layer(tmp_path):
+    path = str(tmp_path / "cache.db")
+    bucket = AsyncBucket(files=FILES)
+
+    with SQLiteStore(path) as store:
+        cached_files = AsyncCacheLayer("cached_files", store.async_get, store.async_set, source=bucket.get)
+
+        assert await cached_files.get("b") == FILES["b"]
+        assert await store.async_get_many(["b", "c"], None) == [FILES["b"], None]
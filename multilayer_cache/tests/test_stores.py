@@ -0,0 +1,112 @@
+from multilayer_cache import cache_layer
+from multilayer_cache import KEY_NOT_FOUND
+from multilayer_cache.stores import LRUStore
+from multilayer_cache.stores import LFUStore
+from multilayer_cache.stores import WTinyLFUStore
+from multilayer_cache.stores import CountMinSketch
+
+from functools import partial
+
+import pytest
+
+
+MISSING = object()
+
+
+def test_lru():
+    store = LRUStore(2)
+    store.set("a", 1)
+    store.set("b", 2)
+
+    assert store.get("a", MISSING) == 1
+
+    store.set("c", 3)
+
+    assert "b" not in store
+    assert store.get("b", MISSING) is MISSING
+    assert store.get_many(["a", "c"], MISSING) == [1, 3]
+    assert (store.stats.hits, store.stats.misses, store.stats.evictions) == (3, 1, 1)
+
+
+def test_lfu():
+    store = LFUStore(2)
+    store.set("a", 1)
+    store.set("b", 2)
+
+    store.get("a", MISSING)
+    store.get("a", MISSING)
+    store.get("b", MISSING)
+
+    store.set("c", 3)
+
+    # "b" is less frequent than "a"
+    assert set(store.get_many(["a", "b", "c"], MISSING)) == {1, 3, MISSING}
+    assert "b" not in store
+
+    # Among equally frequent entries the least recently used goes
+    store.set("d", 4)
+    assert "c" not in store
+    assert len(store) == 2
+    assert store.stats.evictions == 2
+
+    store.delete("a")
+    store.set("e", 5)
+    store.set("f", 6)
+    assert len(store) == 2
+
+
+def test_count_min_sketch():
+    sketch = CountMinSketch(64, sample_size=100)
+
+    for _ in range(10):
+        sketch.increment("hot")
+    sketch.increment("cold")
+
+    assert sketch.estimate("hot") >= 10
+    assert sketch.estimate("hot") > sketch.estimate("cold")
+    assert sketch.estimate("never") <= 1
+
+    # Counters saturate and age
+    for _ in range(200):
+        sketch.increment("hot")
+    assert sketch.estimate("hot") <= 15
+
+
+def test_w_tiny_lfu_admission():
+    store = WTinyLFUStore(100)
+
+    for key in range(100):
+        store.get(key, MISSING)
+        store.set(key, key)
+
+    # Make the first half popular
+    for _ in range(3):
+        for key in range(50):
+            store.get(key, MISSING)
+
+    # A scan of one-hit wonders does not flush popular entries
+    for key in range(1000, 2000):
+        store.get(key, MISSING)
+        store.set(key, key)
+
+    assert len(store) == 100
+    assert all(key in store for key in range(50))
+    assert store.stats.evictions >= 1000
+
+
+@pytest.mark.parametrize("store", [LRUStore(10), LFUStore(10), WTinyLFUStore(10)])
+def test_store_as_local_cache(store):
+    layer = partial(
+        cache_layer,
+        get_cache_value=store.get,
+        set_cache_value=store.set,
+        on_cache_miss_source=lambda key, default: key * 2 if key < 100 else default,
+        get_default=lambda: KEY_NOT_FOUND,
+        get_identifier=lambda: "layer",
+    )
+
+    for key in range(30):
+        assert layer(get_cache_key=lambda: key) == key * 2
+
+    assert layer(get_cache_key=lambda: 100) is KEY_NOT_FOUND
+    assert len(store) == 10
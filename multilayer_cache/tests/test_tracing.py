@@ -0,0 +1,176 @@
+from multilayer_cache import cache_layer
+from multilayer_cache import KEY_NOT_FOUND
+from multilayer_cache import AsyncCacheLayer
+from multilayer_cache import Tracer
+from multilayer_cache import AsyncSingleFlight
+from multilayer_cache import NegativeCache
+from multilayer_cache import InMemoryExporter
+from multilayer_cache import OTLPFileExporter
+from multilayer_cache.util import to_async
+
+import json
+import asyncio
+from functools import partial
+
+import pytest
+
+
+def test_tracing_nested(tmp_path):
+    exporter = InMemoryExporter()
+    tracer = Tracer(exporter)
+    source = {"a": json.dumps({"key": "a"})}
+
+    files_inner_cache = {}
+
+    files_cache = partial(
+        cache_layer,
+        get_cache_value=lambda key, default: files_inner_cache.get(key, default),
+        set_cache_value=lambda key, value: files_inner_cache.update({key: value}),
+        on_cache_miss_source=lambda key, default: source.get(key, default),
+        get_identifier=lambda: "cached_files",
+        tracer=tracer,
+    )
+
+    parse = tracer.timed_transform(json.loads)
+
+    def on_cache_miss_source(key, default):
+        value = files_cache(get_cache_key=lambda: key, get_default=lambda: default)
+        return default if value is default else parse(value)
+
+    parsed_inner_cache = {}
+
+    parsed_cache = partial(
+        cache_layer,
+        get_cache_value=lambda key, default: parsed_inner_cache.get(key, default),
+        set_cache_value=lambda key, value: parsed_inner_cache.update({key: value}),
+        on_cache_miss_source=on_cache_miss_source,
+        get_default=lambda: KEY_NOT_FOUND,
+        get_identifier=lambda: "parsed_cached_files",
+        tracer=tracer,
+    )
+
+    assert parsed_cache(get_cache_key=lambda: "a") == {"key": "a"}
+    assert parsed_cache(get_cache_key=lambda: "a") == {"key": "a"}
+    assert parsed_cache(get_cache_key=lambda: "c") is KEY_NOT_FOUND
+
+    miss, hit, not_found = exporter.spans
+
+    assert (miss.identifier, miss.key, miss.result) == ("parsed_cached_files", "a", "miss")
+    assert set(miss.phases) == {"lookup", "source", "transform", "store"}
+    assert miss.phases["source"] >= miss.phases["transform"]
+
+    [child] = miss.children
+    assert (child.identifier, child.result, child.parent) == ("cached_files", "miss", miss)
+    assert child.trace_id == miss.trace_id
+    assert child.start_ns >= miss.start_ns and child.end_ns <= miss.end_ns
+
+    assert (hit.result, hit.children) == ("hit", [])
+    assert set(hit.phases) == {"lookup"}
+
+    assert not_found.result == "not_found"
+    assert [child.result for child in not_found.children] == ["not_found"]
+
+    assert "cached_files 'a' miss" in miss.format()
+
+    path = tmp_path / "traces.jsonl"
+    OTLPFileExporter(str(path))(miss)
+    [request] = [json.loads(line) for line in path.read_text().splitlines()]
+    spans = request["resourceSpans"][0]["scopeSpans"][0]["spans"]
+
+    assert [span["name"] for span in spans] == ["cache_layer parsed_cached_files", "cache_layer cached_files"]
+    assert spans[1]["parentSpanId"] == spans[0]["spanId"]
+    assert spans[0]["traceId"] == spans[1]["traceId"]
+
+
+def test_tracing_errors():
+    exporter = InMemoryExporter()
+
+    def on_cache_miss_source(key, default):
+        raise RuntimeError("source is down")
+
+    with pytest.raises(RuntimeError):
+        cache_layer(
+            get_cache_key=lambda: "a",
+            get_cache_value=lambda key, default: default,
+            set_cache_value=lambda key, value: None,
+            on_cache_miss_source=on_cache_miss_source,
+            get_default=lambda: KEY_NOT_FOUND,
+            get_identifier=lambda: "layer",
+            tracer=Tracer(exporter),
+        )
+
+    [span] = exporter.spans
+    assert span.result == "error"
+    assert "source is down" in span.error
+
+
+@pytest.mark.asyncio
+async def test_tracing_async():
+    exporter = InMemoryExporter()
+    tracer = Tracer(exporter)
+
+    async def bucket_get(key, default):
+        await asyncio.sleep(0.001)
+        return key.upper()
+
+    files_inner_cache = {}
+    files = AsyncCacheLayer(
+        "cached_files",
+        to_async(files_inner_cache.get),
+        to_async(files_inner_cache.__setitem__),
+        source=bucket_get,
+        tracer=tracer,
+    )
+
+    parsed_inner_cache = {}
+    parsed = AsyncCacheLayer(
+        "parsed_cached_files",
+        to_async(parsed_inner_cache.get),
+        to_async(parsed_inner_cache.__setitem__),
+        source=files,
+        transform=lambda value: value * 2,
+        tracer=tracer,
+    )
+
+    assert await asyncio.gather(parsed.get("a"), parsed.get("b")) == ["AA", "BB"]
+
+    assert len(exporter.spans) == 2
+
+    for span in exporter.spans:
+        [child] = span.children
+        assert child.key == span.key
+        assert child.parent is span
+        assert "transform" in span.phases
+
+
+@pytest.mark.asyncio
+async def test_tracing_single_flight_waiters():
+    exporter = InMemoryExporter()
+    negative_cache = NegativeCache(100, 60)
+
+    async def bucket_get(key, default):
+        await asyncio.sleep(0.01)
+        return default if key == "missing" else key.upper()
+
+    inner_cache = {}
+    files = AsyncCacheLayer(
+        "cached_files",
+        to_async(inner_cache.get),
+        to_async(inner_cache.__setitem__),
+        source=bucket_get,
+        single_flight=AsyncSingleFlight(),
+        negative_cache=negative_cache,
+        tracer=Tracer(exporter),
+    )
+
+    # Waiters of the one source call are misses, not negative hits
+    assert await asyncio.gather(*(files.get("a") for _ in range(3))) == ["A"] * 3
+    assert [span.result for span in exporter.spans] == ["miss"] * 3
+
+    exporter.clear()
+    await asyncio.gather(*(files.get("missing") for _ in range(3)))
+    assert [span.result for span in exporter.spans] == ["not_found", "miss", "miss"]
+
+    exporter.clear()
+    await files.get("missing")
+    assert [span.result for span in exporter.spans] == ["negative_hit"]
@@ -0,0 +1,318 @@
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import TypeVar
+
+import json
+import time
+import random
+import threading
+import contextvars
+from functools import wraps
+from dataclasses import dataclass
+from dataclasses import field
+
+
+T = TypeVar("T")
+S = TypeVar("S")
+
+
+@dataclass(slots=True, eq=False)
+class Span:
+    """
+    Lookup of one cache layer
+
+    Phases are the monotonic nanoseconds spent in the local cache lookup, the source call
+    (inner layers included, they are children spans), the transform and the local cache update.
+    """
+
+    identifier: Any
+    key: Any
+    trace_id: int
+    span_id: int
+    parent: "Span | None"
+    start_ns: int
+    end_ns: int = 0
+    # hit, miss, negative_hit, not_found or error
+    result: str | None = None
+    error: str | None = None
+    phases: dict[str, int] = field(default_factory=dict)
+    children: list["Span"] = field(default_factory=list)
+
+    @property
+    def duration_ns(self) -> int:
+        return self.end_ns - self.start_ns
+
+    def add_phase(self, phase: str, duration_ns: int):
+        self.phases[phase] = self.phases.get(phase, 0) + duration_ns
+
+    def walk(self):
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "identifier": self.identifier,
+            "key": repr(self.key),
+            "result": self.result,
+            "error": self.error,
+            "duration_ns": self.duration_ns,
+            "phases": dict(self.phases),
+            "children": [child.to_dict() for child in self.children],
+        }
+
+    def format(self, indent: int = 0) -> str:
+        phases = " ".join(f"{phase}={duration / 1000:.1f}us" for phase, duration in self.phases.items())
+        line = f"{'  ' * indent}{self.identifier} {self.key!r} {self.result} {self.duration_ns / 1000:.1f}us {phases}".rstrip()
+        return "\n".join([line, *(child.format(indent + 1) for child in self.children)])
+
+
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar("multilayer_cache_span", default=None)
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+class Tracer:
+    """
+    Links lookups of nested cache layers into span trees
+
+    The span of a layer lookup is current (a context variable) while the layer runs,
+    so lookups of inner layers made from on_cache_miss_source become its children,
+    across awaits and tasks too. A finished tree (a lookup of the outermost layer)
+    is handed to the exporter.
+    """
+
+    def __init__(
+        self,
+        exporter: Callable[[Span], None] | None = None,
+        clock: Callable[[], int] = time.perf_counter_ns,
+    ):
+        self.exporter = exporter
+        self.clock = clock
+        self._random = random.Random()
+
+    def start(self, identifier: Any, key: Any) -> tuple[Span, contextvars.Token]:
+        parent = _current_span.get()
+
+        span = Span(
+            identifier=identifier,
+            key=key,
+            trace_id=parent.trace_id if parent is not None else self._random.getrandbits(128),
+            span_id=self._random.getrandbits(64),
+            parent=parent,
+            start_ns=self.clock(),
+        )
+
+        if parent is not None:
+            parent.children.append(span)
+
+        return span, _current_span.set(span)
+
+    def end(self, span: Span, token: contextvars.Token, error: BaseException | None = None):
+        span.end_ns = self.clock()
+        _current_span.reset(token)
+
+        if error is not None:
+            span.result = "error"
+            span.error = repr(error)
+
+        if span.parent is None and self.exporter is not None:
+            self.exporter(span)
+
+    def negative_hit(self, span: Span):
+        """
+        Marks a lookup answered "not found" by the negative cache of the layer
+        """
+
+        span.result = "negative_hit"
+
+    def instrument(
+        self,
+        span: Span,
+        get_cache_value: Callable[[Any, Any], Any],
+        set_cache_value: Callable[[Any, Any], None],
+        on_cache_miss_source: Callable[[Any, Any], Any],
+    ):
+        clock = self.clock
+
+        def traced_get_cache_value(key, default):
+            started = clock()
+            value = get_cache_value(key, default)
+            span.add_phase("lookup", clock() - started)
+            span.result = "miss" if value is default else "hit"
+            return value
+
+        def traced_set_cache_value(key, value):
+            started = clock()
+            set_cache_value(key, value)
+            span.add_phase("store", clock() - started)
+
+        def traced_on_cache_miss_source(key, default):
+            started = clock()
+            value = on_cache_miss_source(key, default)
+            span.add_phase("source", clock() - started)
+            span.result = "not_found" if value is default else "miss"
+            return value
+
+        return traced_get_cache_value, traced_set_cache_value, traced_on_cache_miss_source
+
+    def async_instrument(
+        self,
+        span: Span,
+        get_cache_value: Callable[[Any, Any], Awaitable[Any]],
+        set_cache_value: Callable[[Any, Any], Awaitable[None]],
+        on_cache_miss_source: Callable[[Any, Any], Awaitable[Any]],
+    ):
+        clock = self.clock
+
+        async def traced_get_cache_value(key, default):
+            started = clock()
+            value = await get_cache_value(key, default)
+            span.add_phase("lookup", clock() - started)
+            span.result = "miss" if value is default else "hit"
+            return value
+
+        async def traced_set_cache_value(key, value):
+            started = clock()
+            await set_cache_value(key, value)
+            span.add_phase("store", clock() - started)
+
+        async def traced_on_cache_miss_source(key, default):
+            started = clock()
+            value = await on_cache_miss_source(key, default)
+            span.add_phase("source", clock() - started)
+            span.result = "not_found" if value is default else "miss"
+            return value
+
+        return traced_get_cache_value, traced_set_cache_value, traced_on_cache_miss_source
+
+    def timed_transform(self, transform: Callable[[S], T]) -> Callable[[S], T]:
+        """
+        Wraps the transformation of source values to record it as a phase of the current span
+        """
+
+        clock = self.clock
+
+        @wraps(transform)
+        def timed(value: S) -> T:
+            span = _current_span.get()
+
+            if span is None:
+                return transform(value)
+
+            started = clock()
+            result = transform(value)
+            span.add_phase("transform", clock() - started)
+            return result
+
+        return timed
+
+    def async_timed_transform(self, transform: Callable[[S], Awaitable[T]]) -> Callable[[S], Awaitable[T]]:
+        """
+        timed_transform of an awaitable transformation, such as ProcessTransform
+        """
+
+        clock = self.clock
+
+        async def timed(value: S) -> T:
+            span = _current_span.get()
+
+            if span is None:
+                return await transform(value)
+
+            started = clock()
+            result = await transform(value)
+            span.add_phase("transform", clock() - started)
+            return result
+
+        return timed
+
+
+class InMemoryExporter:
+    """
+    Keeps finished span trees
+    """
+
+    def __init__(self):
+        self.spans: list[Span] = []
+
+    def __call__(self, span: Span):
+        self.spans.append(span)
+
+    def clear(self):
+        self.spans.clear()
+
+
+def to_otlp(
+    root: Span,
+    service_name: str = "multilayer_cache",
+    epoch_offset_ns: int | None = None,
+) -> dict[str, Any]:
+    """
+    Span tree in the OpenTelemetry protocol JSON encoding (ExportTraceServiceRequest)
+
+    epoch_offset_ns converts span timestamps to Unix time, by default for the default clock of Tracer
+    """
+
+    if epoch_offset_ns is None:
+        epoch_offset_ns = time.time_ns() - time.perf_counter_ns()
+
+    def attribute(key: str, value: Any) -> dict[str, Any]:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return {"key": key, "value": {"intValue": str(value)}}
+        return {"key": key, "value": {"stringValue": str(value)}}
+
+    spans = []
+
+    for span in root.walk():
+        attributes = [
+            attribute("cache.layer", span.identifier),
+            attribute("cache.key", repr(span.key)),
+            attribute("cache.result", span.result),
+            *(attribute(f"cache.phase.{phase}_ns", duration) for phase, duration in span.phases.items()),
+        ]
+
+        spans.append({
+            "traceId": f"{span.trace_id:032x}",
+            "spanId": f"{span.span_id:016x}",
+            "parentSpanId": f"{span.parent.span_id:016x}" if span.parent is not None else "",
+            "name": f"cache_layer {span.identifier}",
+            # SPAN_KIND_INTERNAL
+            "kind": 1,
+            "startTimeUnixNano": str(span.start_ns + epoch_offset_ns),
+            "endTimeUnixNano": str(span.end_ns + epoch_offset_ns),
+            "attributes": attributes,
+            # STATUS_CODE_ERROR or STATUS_CODE_UNSET
+            "status": {"code": 2, "message": span.error} if span.error is not None else {},
+        })
+
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [attribute("service.name", service_name)]},
+            "scopeSpans": [{
+                "scope": {"name": "multilayer_cache"},
+                "spans": spans,
+            }],
+        }],
+    }
+
+
+class OTLPFileExporter:
+    """
+    Appends span trees to a file in the OpenTelemetry protocol JSON encoding, one request per line
+    (the format of the OpenTelemetry collector file exporter)
+    """
+
+    def __init__(self, path: str, service_name: str = "multilayer_cache"):
+        self.path = path
+        self.service_name = service_name
+        self._lock = threading.Lock()
+
+    def __call__(self, span: Span):
+        line = json.dumps(to_otlp(span, self.service_name))
+
+        with self._lock, open(self.path, "a") as file:
+            file.write(line + "\n")
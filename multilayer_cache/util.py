@@ -3,23 +3,40 @@ from typing import Callable
 from typing import TypeVar
 from typing import Awaitable
 from typing import ParamSpec
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from multilayer_cache.executors import BoundedExecutor
 
 
 P = ParamSpec("P")
 T = TypeVar("T")
 
 
-def to_async(fn: Callable[P, T], to_thread: bool = False) -> Callable[P, Awaitable[T]]:
+def to_async(
+    fn: Callable[P, T],
+    to_thread: bool = False,
+    executor: "BoundedExecutor | None" = None,
+) -> Callable[P, Awaitable[T]]:
     """
     Converts a synchronous function into an async function with option to run in a seperate thread
+
+    With an executor the function runs on its threads, otherwise to_thread uses the loop's default executor.
     """
 
-    if to_thread:
+    if executor is not None:
+        run = executor.run
+
+        @wraps(fn)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+            return await run(fn, *args, **kwargs)
+
+    elif to_thread:
         import asyncio
 
         @wraps(fn)
         async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
-            return await asyncio.to_thread(lambda: fn(*args, **kwargs))
+            return await asyncio.to_thread(fn, *args, **kwargs)
 
     else:
         @wraps(fn)